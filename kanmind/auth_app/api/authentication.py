@@ -0,0 +1,154 @@
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from core.db_routing import use_primary
+
+
+REVOCATION_KEY = "kanmind:token-auth:{digest}"
+
+
+def _revocation_key(key):
+    return REVOCATION_KEY.format(digest=hashlib.sha256(key.encode()).hexdigest())
+
+
+def token_generation(key):
+    """Shared-cache marker of a token, replaced on every revocation; entries of other generations are stale"""
+    return cache.get_or_set(_revocation_key(key), uuid.uuid4().hex, None)
+
+
+async def atoken_generation(key):
+    return await cache.aget_or_set(_revocation_key(key), uuid.uuid4().hex, None)
+
+
+def revoke_tokens(keys):
+    """Makes every process drop its cached entries of these tokens; replaced again after commit, so a
+    process loading the token while the change is uncommitted cannot keep the old state"""
+    keys = [_revocation_key(key) for key in keys]
+    if not keys:
+        return
+
+    def revoke():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    revoke()
+    transaction.on_commit(revoke)
+
+
+class TokenCache:
+    """Bounded in-process LRU cache for token -> (user, token) with TTL and hit/miss counters
+
+    Entries remember the token's generation (token_generation) they were loaded under and only hit for
+    that generation, so revocations in other processes take effect on their next request.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic() or entry[3] != generation:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key, user, token, generation=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user, token, generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[1].pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+token_cache = TokenCache(settings.TOKEN_AUTH_CACHE_SIZE, settings.TOKEN_AUTH_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in TokenAuthentication keeping token lookups in token_cache, invalidated by auth_app.signals"""
+
+    def authenticate_credentials(self, key):
+        """The generation is read before the database, so a revocation racing the load makes the entry stale"""
+        generation = token_generation(key)
+        cached = token_cache.get(key, generation)
+        if cached is not None:
+            user, token = cached
+            """Copy, so per-request changes to request.user never leak into other requests"""
+            return copy.copy(user), token
+
+        """A token created moments ago may not have reached the read replica yet"""
+        with use_primary():
+            user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, generation)
+        return copy.copy(user), token
+
+    async def aauthenticate(self, request):
+        """Async counterpart of authenticate() for plain Django async views, same cache and errors"""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. No credentials provided."))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. Token string should not contain invalid characters."))
+
+        generation = await atoken_generation(key)
+        cached = token_cache.get(key, generation)
+        if cached is not None:
+            user, token = cached
+            return copy.copy(user), token
+
+        with use_primary():
+            token = await Token.objects.select_related("user").filter(key=key).afirst()
+        if token is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        token_cache.set(key, token.user, token, generation)
+        return copy.copy(token.user), token
@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import AuthenticationFailed
+from kanban_app.membership import resolve_board_access
 
 
 class IsBoardOwnerOrMember(BasePermission):
@@ -9,20 +10,11 @@ class IsBoardOwnerOrMember(BasePermission):
     def has_object_permission(self, request, view, obj):
         """Attributes needs to be checked to avoid unwanted error messages"""
         
-        if hasattr(obj, "owner") and hasattr(obj, "members"):
-            board = obj
-            
-        elif hasattr(obj, "board"):
-            board = obj.board
-            
-        elif hasattr(obj, "task") and hasattr(obj.task, "board"):
-            board = obj.task.board
-        else:
+        access = resolve_board_access(request.user, obj)
+        if access is None:
             raise AuthenticationFailed(self.message)
 
-        is_owner = board.owner_id == request.user.id
-        is_member = board.members.filter(id=request.user.id).exists()
-        if is_owner or is_member:
+        if access:
             return True
 
         raise AuthenticationFailed(self.message)
@@ -1,8 +1,9 @@
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from core.utils.validators import validate_email_format, validate_email_unique, validate_fullname, validate_password_strength
-from auth_app.models import RegistrationUserModel
+from auth_app.models import RegistrationUserModel, UserEmail, normalize_email
 
 
 class RegistrationUserSerializer(serializers.ModelSerializer):
@@ -42,7 +43,7 @@ class RegistrationUserSerializer(serializers.ModelSerializer):
         fullname = validated_data.pop("fullname").strip()
         validated_data.pop("repeated_password", None)
         first_name, last_name = fullname.split(" ", 1)
-        email = validated_data["email"].strip().lower()
+        email = normalize_email(validated_data["email"])
         user = User(
             username=email,
             email=email,
@@ -50,8 +51,13 @@ class RegistrationUserSerializer(serializers.ModelSerializer):
             last_name=last_name,
         )
         user.set_password(validated_data["password"])
-        user.save()
-        RegistrationUserModel.objects.create(user=user, fullname=fullname)
+        try:
+            with transaction.atomic():
+                user.save()
+                RegistrationUserModel.objects.create(user=user, fullname=fullname)
+        except IntegrityError:
+            """A concurrent registration took the address after validate_email"""
+            raise serializers.ValidationError({"email": "E-Mail-Adresse wird bereits verwendet."})
         return user
 
 
@@ -64,12 +70,11 @@ class MailLoginSerializer(serializers.Serializer):
         email = (data.get("email") or "").strip()
         password = data.get("password") or ""
         validate_email_format(email)
-        try:
-            account = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError({"email": "E-Mail-Adresse nicht gefunden."})
-        account = authenticate(username=account.username, password=password)
+        account = authenticate(self.context.get("request"), email=email, password=password)
         if not account:
+            """Second lookup only on failure, to tell an unknown address from a wrong password"""
+            if not UserEmail.objects.filter(email=normalize_email(email)).exists():
+                raise serializers.ValidationError({"email": "E-Mail-Adresse nicht gefunden."})
             raise serializers.ValidationError({"password": "Falsches Passwort."})
         data["user"] = account
         return data
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Sliding-window throttles keyed on IP, email and token, counters live in the shared Django cache
+
+A throttle only applies to views with a throttle_scope and a rate "<scope>.<kind>" in
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], e.g. "login.ip": "30/min".
+"""
+import hashlib
+import math
+import time
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from auth_app.models import normalize_email
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """"5/min" -> (5, 60), like DRF's SimpleRateThrottle"""
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Sliding window counter: the current fixed window plus the previous one weighted by its remaining overlap
+
+    Two cache keys per identity and window instead of a timestamp log, so a burst of thousands of attempts
+    costs two counters, not thousands of list entries.
+    """
+    kind = None
+    cache = cache
+    timer = time.time
+    cache_format = "throttle:{scope}:{kind}:{ident}:{window}"
+
+    def get_rate(self, view):
+        scope = getattr(view, "throttle_scope", None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}.{self.kind}") if scope else None
+        return (scope, *parse_rate(rate)) if rate else None
+
+    def get_identity(self, request, view):
+        """Value to count attempts for, None to not throttle this request"""
+        raise NotImplementedError
+
+    def _key(self, scope, ident, window):
+        return self.cache_format.format(scope=scope, kind=self.kind, ident=ident, window=window)
+
+    def allow_request(self, request, view):
+        rate = self.get_rate(view)
+        ident = self.get_identity(request, view) if rate else None
+        if ident is None:
+            return True
+        scope, self.num_requests, self.duration = rate
+        now = self.timer()
+        window = int(now // self.duration)
+        current_key, previous_key = self._key(scope, ident, window), self._key(scope, ident, window - 1)
+        counts = self.cache.get_many([current_key, previous_key])
+        self.current, self.previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+        self.elapsed = now - window * self.duration
+        if self.previous * (1 - self.elapsed / self.duration) + self.current >= self.num_requests:
+            return False
+
+        """add + incr is atomic on Redis/Memcached; the key lives through the next window as its 'previous'"""
+        self.cache.add(current_key, 0, timeout=2 * self.duration)
+        try:
+            self.cache.incr(current_key)
+        except ValueError:
+            self.cache.set(current_key, 1, timeout=2 * self.duration)
+        return True
+
+    def wait(self):
+        """Seconds until the weighted count drops below the limit again"""
+        remaining = self.duration - self.elapsed
+        if self.current >= self.num_requests:
+            """Only once the current window has become the previous one and decayed far enough"""
+            seconds = remaining + self.duration * (1 - self.num_requests / self.current)
+        else:
+            seconds = self.duration * (1 - (self.num_requests - self.current) / self.previous) - self.elapsed
+        return max(1, math.ceil(seconds))
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """Per client address, honouring NUM_PROXIES like DRF's throttles"""
+    kind = "ip"
+
+    def get_identity(self, request, view):
+        return self.get_ident(request)
+
+
+class EmailThrottle(SlidingWindowThrottle):
+    """Per target email address (body or query string), so one account cannot be guessed at from many IPs"""
+    kind = "email"
+
+    def get_identity(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not email:
+            email = request.query_params.get("email")
+        if not isinstance(email, str):
+            """Malformed payloads are left to the serializer's validation, throttled by IP only"""
+            return None
+        email = normalize_email(email)
+        return hashlib.sha256(email.encode()).hexdigest() if email else None
+
+
+class TokenThrottle(SlidingWindowThrottle):
+    """Per authenticated user, i.e. per token"""
+    kind = "token"
+
+    def get_identity(self, request, view):
+        return request.user.pk if request.user and request.user.is_authenticated else None
@@ -1,10 +1,10 @@
-from django.contrib.auth.models import User
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from auth_app.api.authentication import token_cache
 from auth_app.api.serializers import RegistrationUserSerializer, MailLoginSerializer
-from kanban_app.api.serializers import UserShortSerializer
+from auth_app.lookup import email_lookup
 from core.utils.validators import validate_email_format
 from core.utils.exceptions import exception_handler_status500
 
@@ -13,6 +13,9 @@ class RegistrationUserView(generics.CreateAPIView):
     """Creates, saves and validates new user"""
     serializer_class = RegistrationUserSerializer
     permission_classes = [permissions.AllowAny]
+    """No token lookup, so throttled requests are rejected without touching the database"""
+    authentication_classes = []
+    throttle_scope = "registration"
 
     def create(self, request, *args, **kwargs):
         try:
@@ -39,10 +42,12 @@ class RegistrationUserView(generics.CreateAPIView):
 class MailLoginView(APIView):
     """Logs in a user with valid credentials"""
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    throttle_scope = "login"
 
     def post(self, request, *args, **kwargs):
         try:
-            serializer = MailLoginSerializer(data=request.data)
+            serializer = MailLoginSerializer(data=request.data, context={"request": request})
             if not serializer.is_valid():
                 return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
             account = serializer.validated_data["user"]
@@ -64,8 +69,9 @@ class MailLoginView(APIView):
             
             
 class MailCheckView(APIView):
-    """Checks if email is already in use."""
+    """Checks if email is already in use, answered from the email lookup cache where possible"""
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "email_check"
 
     def get(self, request, *args, **kwargs):
         try:
@@ -76,11 +82,18 @@ class MailCheckView(APIView):
                 validate_email_format(email)
             except:
                 return Response({"error": "Ungültige E-Mail-Adresse."}, status=status.HTTP_400_BAD_REQUEST)
-            try:
-                user = User.objects.get(email=email)
-                serializer = UserShortSerializer(user)
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            except User.DoesNotExist:
+            user = email_lookup.get(email)
+            if user is None:
                 return Response({"error": "E-Mail nicht gefunden."}, status=status.HTTP_404_NOT_FOUND)
+            """Same fields as UserShortSerializer"""
+            return Response(user, status=status.HTTP_200_OK)
         except Exception as e:
             return exception_handler_status500(e, self.get_exception_handler_context())
+
+
+class TokenCacheStatsView(APIView):
+    """Shows hit/miss counters of the token authentication cache of this worker"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(token_cache.stats(), status=status.HTTP_200_OK)
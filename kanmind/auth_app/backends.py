@@ -0,0 +1,19 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from auth_app.models import normalize_email
+
+
+class EmailBackend(ModelBackend):
+    """Authenticates with email and password in one lookup through the unique UserEmail index"""
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        user = User.objects.filter(email_index__email=normalize_email(email)).first()
+        if user is None:
+            """Hashes anyway, so unknown addresses take as long as wrong passwords"""
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,145 @@
+"""Email lookups for the email check and registration: Bloom filter, then cached answer, then the UserEmail index
+
+Found users are cached with their short representation, unknown addresses with an empty entry, both in the
+shared Django cache. The optional Bloom filter lives in the process: it is built from UserEmail on the first
+lookup, updated by the signals of this process and rebuilt every EMAIL_LOOKUP_BLOOM["REFRESH"] seconds. Every
+change also replaces a generation token in the shared cache; an address the filter has never seen is answered
+without the database only while the token is still the one the filter was built under, otherwise another
+process may have registered it and the lookup goes on to the cache and UserEmail.
+"""
+import hashlib
+import math
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from auth_app.models import UserEmail, normalize_email
+from core.db_routing import use_primary
+
+CACHE_KEY = "kanmind:email-lookup:{digest}"
+GENERATION_KEY = "kanmind:email-lookup:generation"
+
+
+def _cache_key(email):
+    return CACHE_KEY.format(digest=hashlib.sha256(email.encode()).hexdigest())
+
+
+def _generation():
+    """A random token rather than a counter: after an eviction it cannot come back to a value a filter has seen"""
+    return cache.get_or_set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def _bump_generation():
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+class BloomFilter:
+    """Fixed-size bit array with k positions per value derived from one blake2b digest (double hashing)"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, step = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class EmailLookup:
+    """Answers "which user has this address" with as little database work as possible"""
+
+    def __init__(self):
+        self._bloom = None
+        self._generation = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _get_bloom(self):
+        options = settings.EMAIL_LOOKUP_BLOOM
+        if not options["ENABLED"]:
+            return None
+        bloom = self._bloom
+        if bloom is None or bloom.count > bloom.capacity or time.monotonic() - self._built_at > options["REFRESH"]:
+            with self._lock:
+                if self._bloom is bloom:
+                    """Read before the addresses, so a change committed during the build invalidates the filter"""
+                    generation = _generation()
+                    self._bloom, self._built_at = self._build_bloom(options), time.monotonic()
+                    self._generation = generation
+                bloom = self._bloom
+        return bloom
+
+    def _build_bloom(self, options):
+        """Sized for twice the current addresses, so registrations fit until the next rebuild"""
+        with use_primary():
+            emails = UserEmail.objects.values_list("email", flat=True)
+            bloom = BloomFilter(max(options["CAPACITY"], 2 * emails.count()), options["ERROR_RATE"])
+            for email in emails.iterator(chunk_size=10000):
+                bloom.add(email)
+        return bloom
+
+    def get(self, email):
+        """Short representation {id, email, fullname} of the user with this address, None if there is none"""
+        email = normalize_email(email)
+        if not email:
+            return None
+        bloom = self._get_bloom()
+        if bloom is not None and email not in bloom and _generation() == self._generation:
+            return None
+        key = _cache_key(email)
+        entry = cache.get(key)
+        if entry is None:
+            with use_primary():
+                user = User.objects.filter(email_index__email=email).values("id", "email", "first_name", "last_name").first()
+            """An empty dict marks an unknown address, None is a cache miss"""
+            entry = {
+                "id": user["id"], "email": user["email"], "fullname": f"{user['first_name']} {user['last_name']}".strip(),
+            } if user else {}
+            cache.set(key, entry, settings.EMAIL_LOOKUP_TTL if user else settings.EMAIL_LOOKUP_NEGATIVE_TTL)
+        return entry or None
+
+    def exists(self, email):
+        return self.get(email) is not None
+
+    def changed(self, emails):
+        """Called for added, renamed and removed addresses; cache entries and generation are replaced again after
+        commit, so a lookup or filter build racing the transaction cannot leave a stale 'unknown' behind"""
+        emails = [normalize_email(email) for email in emails if email]
+        if not emails:
+            return
+        bloom = self._bloom
+        if bloom is not None:
+            for email in emails:
+                bloom.add(email)
+        keys = [_cache_key(email) for email in emails]
+        cache.delete_many(keys)
+        _bump_generation()
+
+        def after_commit():
+            cache.delete_many(keys)
+            _bump_generation()
+
+        transaction.on_commit(after_commit)
+
+    def reset(self):
+        """Forgets the Bloom filter, the next lookup rebuilds it"""
+        with self._lock:
+            self._bloom = None
+
+
+email_lookup = EmailLookup()
@@ -0,0 +1,164 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from auth_app.lookup import email_lookup
+from auth_app.models import RegistrationUserModel, UserEmail, normalize_email
+from core.utils.validators import validate_email_format, validate_fullname, validate_password_strength
+
+
+def _init_worker(settings_module):
+    """Worker processes started with spawn/forkserver need their own Django setup for the hashers"""
+    import django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def read_rows(path, fmt):
+    """Yields (line, row) from a CSV file, JSON Lines or a JSON array (the only format read at once)"""
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        if fmt == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        elif fmt == "jsonl":
+            for line, raw in enumerate(handle, 1):
+                if raw.strip():
+                    yield line, json.loads(raw)
+        else:
+            for index, row in enumerate(json.load(handle), 1):
+                yield index, row
+
+
+class Command(BaseCommand):
+    """Imports users from a file: validated, passwords hashed in parallel, written with bulk_create in batches"""
+    help = (
+        "Imports users (email, fullname, password) from CSV, JSON Lines or JSON. Each batch is committed on its own, "
+        "addresses that already exist are skipped, so a rerun after a failure continues where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV with header email,fullname,password or .jsonl/.json with the same keys.")
+        parser.add_argument("--format", choices=["csv", "jsonl", "json"], help="Default: from the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes hashing passwords.")
+        parser.add_argument("--rejects", help="Writes invalid rows with their errors to this JSON Lines file.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"Datei nicht gefunden: {path}")
+        fmt = options["format"] or {".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "json"}.get(path.suffix.lower(), "csv")
+        self.counts = {"imported": 0, "skipped": 0, "rejected": 0}
+        self.seen = set()
+        self.hash_seconds = 0.0
+        self.workers = max(1, options["workers"])
+        rejects = open(options["rejects"], "w", encoding="utf-8") if options["rejects"] else None
+        started = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+            ) as pool:
+                rows = self.valid_rows(read_rows(path, fmt), rejects)
+                while batch := list(islice(rows, options["batch_size"])):
+                    self.import_batch(batch, pool)
+                    if options["verbosity"] > 1:
+                        self.report(started)
+        except DatabaseError as exc:
+            raise CommandError(
+                f"Import nach {self.counts['imported']} Benutzern abgebrochen: {exc}. "
+                "Ein erneuter Aufruf setzt nach dem letzten gespeicherten Batch fort."
+            ) from exc
+        except (ValueError, KeyError, TypeError) as exc:
+            raise CommandError(f"Datei nicht lesbar: {exc}. Bereits importierte Batches bleiben erhalten.") from exc
+        finally:
+            if rejects:
+                rejects.close()
+        self.report(started, final=True)
+
+    def valid_rows(self, rows, rejects):
+        """Validates with core.utils.validators, drops duplicates within the file"""
+        for line, row in rows:
+            row = {key: str(value or "").strip() for key, value in row.items() if key}
+            row["email"] = normalize_email(row.get("email"))
+            row["fullname"] = " ".join(row.get("fullname", "").split())
+            try:
+                validate_email_format(row["email"])
+                validate_fullname(row["fullname"])
+                validate_password_strength(row.get("password", ""))
+                if row["email"] in self.seen:
+                    raise ValidationError({"email": "E-Mail-Adresse mehrfach in der Datei."})
+            except ValidationError as exc:
+                self.counts["rejected"] += 1
+                if rejects:
+                    rejects.write(json.dumps({"line": line, "email": row["email"], "errors": exc.detail}, ensure_ascii=False) + "\n")
+                continue
+            self.seen.add(row["email"])
+            yield row
+
+    def taken(self, batch):
+        """Addresses of the batch already in use, as indexed email or as username (users are created with username = email)"""
+        emails = [row["email"] for row in batch]
+        return (
+            set(UserEmail.objects.filter(email__in=emails).values_list("email", flat=True))
+            | set(User.objects.filter(username__in=emails).values_list("username", flat=True))
+        )
+
+    def import_batch(self, batch, pool):
+        existing = self.taken(batch)
+        batch = [row for row in batch if row["email"] not in existing]
+        self.counts["skipped"] += len(existing)
+        if not batch:
+            return
+        hash_started = time.perf_counter()
+        chunksize = max(1, len(batch) // (self.workers * 4))
+        hashes = list(pool.map(make_password, [row["password"] for row in batch], chunksize=chunksize))
+        self.hash_seconds += time.perf_counter() - hash_started
+        try:
+            self.write_batch(batch, hashes)
+        except IntegrityError:
+            """Someone registered one of the addresses meanwhile: write the rest"""
+            taken = self.taken(batch)
+            pairs = [(row, password) for row, password in zip(batch, hashes) if row["email"] not in taken]
+            self.counts["skipped"] += len(batch) - len(pairs)
+            batch, hashes = [row for row, _ in pairs], [password for _, password in pairs]
+            self.write_batch(batch, hashes)
+        self.counts["imported"] += len(batch)
+
+    def write_batch(self, batch, hashes):
+        """One transaction per batch; bulk_create sends no signals, so UserEmail and the lookup cache are handled here"""
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=row["email"], email=row["email"], password=password,
+                    first_name=first_name, last_name=last_name,
+                )
+                for row, password in zip(batch, hashes)
+                for first_name, last_name in [row["fullname"].split(" ", 1)]
+            ])
+            UserEmail.objects.bulk_create([UserEmail(user=user, email=user.email) for user in users])
+            RegistrationUserModel.objects.bulk_create(
+                [RegistrationUserModel(user=user, fullname=row["fullname"]) for user, row in zip(users, batch)]
+            )
+            Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+            email_lookup.changed([user.email for user in users])
+
+    def report(self, started, final=False):
+        elapsed = time.perf_counter() - started
+        counts = self.counts
+        rate = counts["imported"] / elapsed if elapsed else 0
+        hash_rate = counts["imported"] / self.hash_seconds if self.hash_seconds else 0
+        message = (
+            f"{counts['imported']} importiert, {counts['skipped']} bereits vorhanden, {counts['rejected']} ungültig "
+            f"in {elapsed:.1f} s ({rate:.0f} Benutzer/s, Hashing {hash_rate:.0f}/s)"
+        )
+        self.stdout.write(self.style.SUCCESS(message) if final else message)
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:11
+
+import logging
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def populate_user_emails(apps, schema_editor):
+    """Indexes existing users; of several accounts sharing an address (ignoring case) only the oldest keeps it"""
+    User = apps.get_model("auth", "User")
+    UserEmail = apps.get_model("auth_app", "UserEmail")
+    seen, rows, duplicates = {}, [], []
+    for user_id, email in User.objects.order_by("id").values_list("id", "email").iterator():
+        email = (email or "").strip().lower()
+        if not email:
+            continue
+        if email in seen:
+            duplicates.append((user_id, email, seen[email]))
+            continue
+        seen[email] = user_id
+        rows.append(UserEmail(user_id=user_id, email=email))
+    UserEmail.objects.bulk_create(rows, batch_size=1000)
+    """The newer accounts keep working (auth_app.signals skips them) but cannot log in by email until resolved"""
+    for user_id, email, owner_id in duplicates:
+        logger.warning("User %s not indexed: email %s belongs to user %s", user_id, email, owner_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('auth_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserEmail',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='email_index', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('email', models.CharField(max_length=254, unique=True)),
+            ],
+        ),
+        migrations.RunPython(populate_user_emails, migrations.RunPython.noop),
+    ]
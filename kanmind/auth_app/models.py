@@ -2,10 +2,27 @@ from django.contrib.auth.models import User
 from django.db import models
 
 
+def normalize_email(email):
+    """Case-insensitive form of an email address as stored in UserEmail"""
+    return (email or "").strip().lower()
+
+
 class RegistrationUserModel(models.Model):
     """Model for user registration"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     fullname = models.CharField(max_length=100)
 
     def __str__(self):
-        return self.fullname
\ No newline at end of file
+        return self.fullname
+
+
+class UserEmail(models.Model):
+    """Normalized email of every user with an address, unique and indexed (auth_user.email is neither)
+
+    Kept in sync by auth_app.signals; users created with bulk_create have no row until their next save.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="email_index")
+    email = models.CharField(max_length=254, unique=True)
+
+    def __str__(self):
+        return self.email
@@ -1,3 +1,421 @@
-from django.test import TestCase
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.contrib.auth import authenticate
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from auth_app.api.authentication import token_cache
+from auth_app.api.throttling import IPThrottle, SlidingWindowThrottle
+from auth_app.backends import EmailBackend
+from auth_app.lookup import BloomFilter, EmailLookup, email_lookup
+from auth_app.management.commands.import_users import Command as ImportUsersCommand
+from auth_app.models import RegistrationUserModel, UserEmail
+from kanban_app.api.serializers import UserShortSerializer
 
-# Create your tests here.
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Token lookups are cached and invalidated on token/user changes"""
+
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+        self.user = User.objects.create_user(username="user@example.com", email="user@example.com", password="x")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = reverse("board-list-create")
+
+    def test_second_request_skips_token_query(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertFalse(any("authtoken_token" in query["sql"] for query in ctx.captured_queries))
+        self.assertEqual((token_cache.stats()["hits"], token_cache.stats()["misses"]), (1, 1))
+
+    def test_token_delete_invalidates(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivation_invalidates(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_changes_in_another_process_invalidate(self):
+        """This process's own invalidation is switched off, only the shared revocation marker remains"""
+
+        def regenerate(user, token):
+            token.delete()
+            Token.objects.create(user=user)
+
+        def deactivate(user, token):
+            user.is_active = False
+            user.save()
+
+        changes = {"logout": lambda user, token: token.delete(), "regenerate": regenerate, "deactivate": deactivate}
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                user = User.objects.create_user(username=f"{name}@example.com", email=f"{name}@example.com", password="x")
+                token = Token.objects.create(user=user)
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+                self.assertEqual(client.get(self.url).status_code, 200)
+                with mock.patch.object(token_cache, "invalidate_key"), mock.patch.object(token_cache, "invalidate_user"):
+                    change(user, token)
+                self.assertEqual(client.get(self.url).status_code, 401)
+
+    def test_lru_is_bounded(self):
+        cache = type(token_cache)(maxsize=2, ttl=60)
+        for key in ("a", "b", "c"):
+            cache.set(key, self.user, None)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.stats()["size"], 2)
+
+
+class EmailAuthenticationTests(TestCase):
+    """Login, registration and the email check use the unique, case-insensitive UserEmail index"""
+
+    def setUp(self):
+        cache.clear()
+        email_lookup.reset()
+        self.password = "Geheim123!"
+        self.user = User.objects.create_user(
+            username="anna@example.com", email="Anna@Example.com", password=self.password, first_name="Anna", last_name="Muster",
+        )
+        self.client = APIClient()
+
+    def _user_queries(self, ctx):
+        return [query["sql"] for query in ctx.captured_queries if '"auth_user"' in query["sql"]]
+
+    def test_login_is_one_indexed_lookup(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("login-user"), {"email": " ANNA@example.com", "password": self.password}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["user_id"], self.user.id)
+        user_queries = self._user_queries(ctx)
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn("auth_app_useremail", user_queries[0])
+
+    def test_login_errors(self):
+        response = self.client.post(reverse("login-user"), {"email": "anna@example.com", "password": "falsch"}, format="json")
+        self.assertEqual((response.status_code, list(response.data["errors"])), (400, ["password"]))
+        response = self.client.post(reverse("login-user"), {"email": "bert@example.com", "password": self.password}, format="json")
+        self.assertEqual((response.status_code, list(response.data["errors"])), (400, ["email"]))
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(authenticate(email="anna@example.com", password=self.password))
+
+    def test_registration_rejects_address_in_other_case(self):
+        payload = {"fullname": "Anna Zwei", "email": "ANNA@example.com", "password": self.password, "repeated_password": self.password}
+        response = self.client.post(reverse("register-user"), payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bereits verwendet", str(response.data["email"]))
+
+        response = self.client.post(reverse("register-user"), {**payload, "email": "Bert@Example.com"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(UserEmail.objects.get(user_id=response.data["user_id"]).email, "bert@example.com")
+
+    def test_index_follows_user_changes(self):
+        self.user.email = "anna.neu@example.com"
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("email-check"), {"email": "Anna.Neu@example.com"})
+        self.assertEqual((response.status_code, response.data["id"]), (200, self.user.id))
+        self.assertEqual(self.client.get(reverse("email-check"), {"email": "anna@example.com"}).status_code, 404)
+
+        self.user.email = ""
+        self.user.save()
+        self.assertFalse(UserEmail.objects.filter(user=self.user).exists())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username="other", email="BERT@example.com")
+            User.objects.create_user(username="third", email="bert@example.com")
+
+    def test_legacy_duplicate_keeps_saving(self):
+        """An older account with the same address, left unindexed by migration 0002"""
+        legacy = User.objects.create_user(username="legacy", email="legacy@example.com", password=self.password)
+        UserEmail.objects.filter(user=legacy).delete()
+        User.objects.filter(pk=legacy.pk).update(email="ANNA@example.com")
+        legacy.refresh_from_db()
+
+        legacy.first_name = "Alt"
+        legacy.set_password("Neu12345!")
+        with self.assertLogs("auth_app.signals", "WARNING"):
+            legacy.save()
+        self.assertFalse(UserEmail.objects.filter(user=legacy).exists())
+        self.assertEqual(UserEmail.objects.get(email="anna@example.com").user_id, self.user.id)
+        self.assertEqual(self.client.post(reverse("login-user"), {"email": "anna@example.com", "password": self.password},
+                                          format="json").data["user_id"], self.user.id)
+
+        """New accounts and address changes still may not take an owned address"""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username="neu", email="anna@example.com")
+
+
+@override_settings(EMAIL_LOOKUP_BLOOM={**settings.EMAIL_LOOKUP_BLOOM, "ENABLED": True})
+class EmailLookupTests(TestCase):
+    """Email check and registration answer from the Bloom filter and the lookup cache, kept in sync by the signals"""
+
+    def setUp(self):
+        cache.clear()
+        email_lookup.reset()
+        self.user = User.objects.create_user(
+            username="anna@example.com", email="anna@example.com", password="Geheim123!", first_name="Anna", last_name="Muster",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _check(self, email):
+        return self.client.get(reverse("email-check"), {"email": email})
+
+    def test_unknown_addresses_skip_the_database(self):
+        self.assertEqual(self._check("anna@example.co").status_code, 404)
+        with self.assertNumQueries(0):
+            statuses = {self._check(f"anna{i}@example.com").status_code for i in range(50)}
+            self.assertFalse(any(email_lookup.exists(f"user{i}@example.com") for i in range(1000)))
+        self.assertEqual(statuses, {404})
+
+    def test_known_address_is_cached(self):
+        with self.assertNumQueries(3):
+            """Bloom filter build (count, addresses), then the user"""
+            response = self._check("Anna@Example.com")
+        self.assertEqual(response.data, UserShortSerializer(self.user).data)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._check("anna@example.com").data["fullname"], "Anna Muster")
+
+        self.user.last_name = "Neu"
+        self.user.save()
+        self.assertEqual(self._check("anna@example.com").data["fullname"], "Anna Neu")
+        self.user.email = "anna.neu@example.com"
+        self.user.save()
+        self.assertEqual(self._check("anna@example.com").status_code, 404)
+        self.assertEqual(self._check("anna.neu@example.com").data["id"], self.user.id)
+
+    def test_registration_in_another_process(self):
+        """The filter of this process never sees the address, the changed generation sends the lookup on"""
+        worker = EmailLookup()
+        self.assertFalse(worker.exists("bert@example.com"))
+        User.objects.create_user(username="bert@example.com", email="bert@example.com", password="Geheim123!")
+        self.assertNotIn("bert@example.com", worker._bloom)
+        self.assertTrue(worker.exists("bert@example.com"))
+        with self.assertNumQueries(1):
+            self.assertFalse(worker.exists("carla@example.com"))
+        """A rebuilt filter is trusted again"""
+        worker.reset()
+        self.assertTrue(worker.exists("bert@example.com"))
+        with self.assertNumQueries(0):
+            self.assertFalse(worker.exists("dora@example.com"))
+
+    @override_settings(EMAIL_LOOKUP_BLOOM={"ENABLED": False})
+    def test_negative_cache_without_bloom_filter(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self._check("bert@example.com").status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._check("bert@example.com").status_code, 404)
+
+    def test_registration_updates_lookups(self):
+        for bloom in [True, False]:
+            with self.subTest(bloom=bloom), override_settings(EMAIL_LOOKUP_BLOOM={**settings.EMAIL_LOOKUP_BLOOM, "ENABLED": bloom}):
+                email = f"bert{bloom}@example.com"
+                self.assertEqual(self._check(email).status_code, 404)
+                payload = {"fullname": "Bert Muster", "email": email, "password": "Geheim123!", "repeated_password": "Geheim123!"}
+                self.assertEqual(APIClient().post(reverse("register-user"), payload, format="json").status_code, 201)
+                self.assertEqual(self._check(email).data["fullname"], "Bert Muster")
+                response = APIClient().post(reverse("register-user"), {**payload, "email": email.upper()}, format="json")
+                self.assertEqual(response.status_code, 400)
+
+    def test_bloom_filter_error_rate(self):
+        bloom = BloomFilter(10000, 0.01)
+        for i in range(10000):
+            bloom.add(f"user{i}@example.com")
+        self.assertTrue(all(f"user{i}@example.com" in bloom for i in range(10000)))
+        false_positives = sum(f"other{i}@example.com" in bloom for i in range(10000))
+        self.assertLess(false_positives, 200)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ThrottlingTests(TestCase):
+    """Login, registration and email check are throttled before any hashing or database work"""
+
+    def setUp(self):
+        cache.clear()
+        """Bursts must not straddle a window boundary of the real clock"""
+        patcher = mock.patch.object(SlidingWindowThrottle, "timer", mock.Mock(return_value=1_000_020.0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username="anna@example.com", email="anna@example.com", password="Geheim123!")
+        self.client = APIClient()
+
+    def _login(self, email, ip="10.0.0.1"):
+        return self.client.post(reverse("login-user"), {"email": email, "password": "falsch"}, format="json", REMOTE_ADDR=ip)
+
+    def test_credential_stuffing_burst_from_one_ip(self):
+        with mock.patch.object(EmailBackend, "authenticate", autospec=True, side_effect=EmailBackend.authenticate) as auth, \
+                CaptureQueriesContext(connection) as ctx:
+            statuses = [self._login(f"user{i}@example.com").status_code for i in range(2000)]
+        self.assertEqual(statuses[:30], [400] * 30)
+        self.assertEqual(set(statuses[30:]), {429})
+        self.assertEqual(auth.call_count, 30)
+        """Two lookups per failed login (user, then unknown address check), none for throttled attempts"""
+        self.assertEqual(len(ctx.captured_queries), 60)
+
+        response = self._login("anna@example.com")
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(1 <= int(response["Retry-After"]) <= 60)
+        self.assertEqual(self._login("anna@example.com", ip="10.0.0.2").status_code, 400)
+
+    def test_one_address_from_many_ips(self):
+        statuses = [self._login("Anna@example.com", ip=f"10.1.{i // 250}.{i % 250}").status_code for i in range(1000)]
+        self.assertEqual(statuses[:10], [400] * 10)
+        self.assertEqual(set(statuses[10:]), {429})
+
+    def test_non_string_email_is_a_validation_error(self):
+        for email in [123, ["anna@example.com"], {"a": 1}]:
+            with self.subTest(email=email):
+                response = self.client.post(reverse("login-user"), {"email": email, "password": "falsch"}, format="json")
+                self.assertEqual(response.status_code, 400)
+                payload = {"fullname": "Bert Muster", "email": email, "password": "Geheim123!", "repeated_password": "Geheim123!"}
+                response = self.client.post(reverse("register-user"), payload, format="json")
+                self.assertEqual(response.status_code, 400)
+
+    def test_registration_and_email_check(self):
+        payload = {"fullname": "Bert Muster", "password": "Geheim123!", "repeated_password": "Geheim123!"}
+        statuses = [
+            self.client.post(reverse("register-user"), {**payload, "email": f"bert{i}@example.com"}, format="json").status_code
+            for i in range(500)
+        ]
+        self.assertEqual(statuses[:10], [201] * 10)
+        self.assertEqual(set(statuses[10:]), {429})
+
+        self.client.force_authenticate(self.user)
+        statuses = [self.client.get(reverse("email-check"), {"email": "anna@example.com"}, REMOTE_ADDR=f"10.2.0.{i % 200}").status_code
+                    for i in range(1000)]
+        self.assertEqual(statuses[:60], [200] * 60)
+        self.assertEqual(set(statuses[60:]), {429})
+
+    def test_sliding_window_over_simulated_time(self):
+        """5000 attempts spread over ten simulated minutes stay within the rate of 30/min"""
+        view = type("View", (), {"throttle_scope": "login"})()
+        request = mock.Mock(META={"REMOTE_ADDR": "10.3.0.1"})
+        now = [1_000_020.0]
+        throttle = IPThrottle()
+        throttle.timer = lambda: now[0]
+        allowed = []
+        for i in range(5000):
+            if throttle.allow_request(request, view):
+                allowed.append(now[0])
+            else:
+                self.assertGreaterEqual(throttle.wait(), 1)
+            now[0] += 0.12
+        self.assertLessEqual(len(allowed), 30 * 11)
+        self.assertGreaterEqual(len(allowed), 30 * 9)
+        for start in range(0, 540, 30):
+            in_any_minute = sum(1 for t in allowed if 1_000_020 + start <= t < 1_000_080 + start)
+            self.assertLessEqual(in_any_minute, 60)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ImportUsersTests(TestCase):
+    """import_users validates, skips existing addresses and resumes after a failed batch"""
+
+    def setUp(self):
+        cache.clear()
+        email_lookup.reset()
+        User.objects.create_user(username="anna@example.com", email="anna@example.com", password="Geheim123!")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _file(self, name, content):
+        path = Path(self.directory.name) / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def _import(self, path, **options):
+        out = StringIO()
+        call_command("import_users", path, workers=2, batch_size=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_csv_import(self):
+        self.assertFalse(email_lookup.exists("carla@example.com"))
+        path = self._file("users.csv", "email,fullname,password\n"
+                          "Bert@Example.com,Bert  Muster,Geheim123!\n"
+                          "carla@example.com,Carla von Berg,Geheim123!\n"
+                          "ANNA@example.com,Anna Alt,Geheim123!\n"
+                          "kaputt,Dora Fehler,Geheim123!\n"
+                          "emil@example.com,Emil,Geheim123!\n"
+                          "bert@example.com,Bert Doppelt,Geheim123!\n"
+                          "fritz@example.com,Fritz Schwach,kurz\n")
+        rejects = str(Path(self.directory.name) / "rejects.jsonl")
+        output = self._import(path, rejects=rejects)
+        self.assertIn("2 importiert, 1 bereits vorhanden, 4 ungültig", output)
+        self.assertEqual([json.loads(line)["line"] for line in open(rejects, encoding="utf-8")], [5, 6, 7, 8])
+
+        carla = User.objects.get(email="carla@example.com")
+        self.assertEqual((carla.username, carla.first_name, carla.last_name), ("carla@example.com", "Carla", "von Berg"))
+        self.assertEqual(RegistrationUserModel.objects.get(user=carla).fullname, "Carla von Berg")
+        self.assertEqual(UserEmail.objects.get(user=carla).email, "carla@example.com")
+        self.assertTrue(Token.objects.filter(user=carla).exists())
+        self.assertEqual(User.objects.get(email="bert@example.com").last_name, "Muster")
+        self.assertTrue(email_lookup.exists("carla@example.com"))
+        response = APIClient().post(reverse("login-user"), {"email": "BERT@example.com", "password": "Geheim123!"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_rerun_resumes_after_failed_batch(self):
+        rows = [{"email": f"user{i}@example.com", "fullname": f"User Nummer{i}", "password": "Geheim123!"} for i in range(5)]
+        path = self._file("users.jsonl", "\n".join(json.dumps(row) for row in rows))
+        bulk_create = Token.objects.bulk_create
+        calls = []
+
+        def failing_bulk_create(objs, *args, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 2:
+                raise OperationalError("database is locked")
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(Token.objects, "bulk_create", side_effect=failing_bulk_create), \
+                self.assertRaisesMessage(CommandError, "nach 2 Benutzern abgebrochen"):
+            self._import(path)
+        """The first batch is committed, the failed one rolled back completely"""
+        self.assertEqual(User.objects.filter(username__startswith="user").count(), 2)
+        self.assertEqual(UserEmail.objects.filter(email__startswith="user").count(), 2)
+
+        output = self._import(path)
+        self.assertIn("3 importiert, 2 bereits vorhanden, 0 ungültig", output)
+        self.assertEqual(User.objects.filter(username__startswith="user").count(), 5)
+        self.assertEqual(Token.objects.count(), 5)
+        self.assertEqual(RegistrationUserModel.objects.count(), 5)
+
+    def test_taken_usernames_are_skipped(self):
+        """Older accounts may use an address as username only; one taken during the batch is dropped on the retry"""
+        User.objects.create_user(username="bert@example.com", email="bert.alt@example.com", password="Geheim123!")
+        rows = [{"email": f"{name}@example.com", "fullname": f"{name.title()} Muster", "password": "Geheim123!"}
+                for name in ["bert", "carla", "dora"]]
+        path = self._file("users.jsonl", "\n".join(json.dumps(row) for row in rows))
+        write_batch = ImportUsersCommand.write_batch
+
+        def racing_write_batch(command, batch, hashes):
+            if not User.objects.filter(username="carla@example.com").exists():
+                User.objects.create_user(username="carla@example.com", email="carla.alt@example.com", password="x")
+            return write_batch(command, batch, hashes)
+
+        with mock.patch.object(ImportUsersCommand, "write_batch", racing_write_batch):
+            output = self._import(path)
+        self.assertIn("1 importiert, 2 bereits vorhanden, 0 ungültig", output)
+        self.assertEqual(User.objects.get(email="dora@example.com").username, "dora@example.com")
+        self.assertFalse(User.objects.filter(email__in=["bert@example.com", "carla@example.com"]).exists())
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            self._import(str(Path(self.directory.name) / "fehlt.csv"))
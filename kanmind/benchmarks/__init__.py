@@ -0,0 +1 @@
+"""Standalone benchmark scripts, run from the kanmind folder: python -m benchmarks.<name>"""
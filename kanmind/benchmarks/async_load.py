@@ -0,0 +1,134 @@
+"""Load test of the read endpoints: sync views on WSGI worker threads vs async views on one ASGI event loop
+
+Both paths go through the full middleware stack in-process (django.test.Client / AsyncClient),
+so the numbers compare request handling, not network or server implementations.
+
+Usage: python -m benchmarks.async_load [--workers 4] [--concurrency 64] [--requests 2000]
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import seed, setup_django
+
+ENDPOINTS = [
+    ("board-list-create", "async-board-list"),
+    ("board-detail", "async-board-detail"),
+    ("tasks-assigned", "async-tasks-assigned"),
+    ("tasks-reviewing", "async-tasks-reviewing"),
+    ("tasks-involved", "async-tasks-involved"),
+    ("comments-list-create", "async-comments-list"),
+]
+
+
+class InFlight:
+    """Tracks the highest number of requests being handled at the same time"""
+
+    def __init__(self):
+        self.current = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+
+def _urls(board_id, task_id, use_async):
+    from django.urls import reverse
+    urls = []
+    for sync_name, async_name in ENDPOINTS:
+        name = async_name if use_async else sync_name
+        kwargs = {"pk": board_id} if "detail" in name else {"task_id": task_id} if "comments" in name else {}
+        urls.append(reverse(name, kwargs=kwargs))
+    return urls
+
+
+def _report(label, latencies, seconds, peak, statuses):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<38} {len(latencies) / seconds:8.1f} req/s   p50 {statistics.median(latencies):7.1f} ms   "
+          f"p95 {p95:7.1f} ms   in flight {peak:4d}   statuses {sorted(statuses)}")
+
+
+def run_wsgi(urls, headers, workers, total):
+    """Fixed pool of WSGI worker threads, each handling one request at a time"""
+    from django.test import Client
+
+    in_flight, latencies, statuses = InFlight(), [], set()
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "client"):
+            local.client = Client(headers=headers)
+        start = time.perf_counter()
+        with in_flight:
+            response = local.client.get(urls[i % len(urls)])
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses.add(response.status_code)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, range(total)))
+    return latencies, time.perf_counter() - start, in_flight.peak, statuses
+
+
+async def run_asgi(urls, headers, concurrency, total):
+    """One event loop (one ASGI worker) with up to `concurrency` requests in flight"""
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    in_flight, latencies, statuses = InFlight(), [], set()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            with in_flight:
+                response = await client.get(urls[i % len(urls)], headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.add(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, time.perf_counter() - start, in_flight.peak, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="WSGI worker threads")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent requests on the ASGI event loop")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    args = parser.parse_args()
+
+    setup_django("kanmind_async_load.sqlite3")
+    from django.contrib.auth.models import User
+    from django.db.models import Count
+    from rest_framework.authtoken.models import Token
+    from kanban_app.models import Board, Task
+
+    print(f"Seeding {args.tasks} tasks …")
+    seed(tasks=args.tasks, comments=args.tasks)
+    user = User.objects.annotate(total=Count("assigned_tasks")).order_by("-total").first()
+    board = Board.objects.filter(members=user).first()
+    task = Task.objects.filter(board=board).first()
+    headers = {"Authorization": f"Token {Token.objects.create(user=user).key}"}
+
+    print(f"\n{args.requests} requests round-robin over {len(ENDPOINTS)} endpoints\n")
+    _report(f"WSGI sync views, {args.workers} threads", *run_wsgi(_urls(board.id, task.id, False), headers, args.workers, args.requests))
+    _report(f"ASGI sync views, concurrency {args.concurrency}",
+            *asyncio.run(run_asgi(_urls(board.id, task.id, False), headers, args.concurrency, args.requests)))
+    _report(f"ASGI async views, concurrency {args.concurrency}",
+            *asyncio.run(run_asgi(_urls(board.id, task.id, True), headers, args.concurrency, args.requests)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import random
+import sys
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_name="benchmark.sqlite3", fresh=True):
+    """Points Django at a separate SQLite file and migrates it, so the real database stays untouched"""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    db_path = Path(tempfile.gettempdir()) / db_name
+    if fresh and db_path.exists():
+        db_path.unlink()
+
+    import django
+    from django.conf import settings
+    settings.DATABASES["default"]["NAME"] = db_path
+    settings.ALLOWED_HOSTS = ["*"]
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+    return db_path
+
+
+def seed(users=200, boards=500, tasks=100_000, comments=100_000, members_per_board=8, seed_value=42, words=None, word_weights=None):
+    """Seeds a large dataset with bulk_create, returns the created users
+
+    With words, titles, descriptions and comments are random word sequences (e.g. for search benchmarks).
+    """
+    from django.contrib.auth.models import User
+    from kanban_app.models import Board, BoardStats, Comment, Task
+
+    rnd = random.Random(seed_value)
+    cum_weights = list(accumulate(word_weights)) if word_weights else None
+
+    def text(default, count):
+        return default if words is None else " ".join(rnd.choices(words, cum_weights=cum_weights, k=count))
+
+    user_objs = User.objects.bulk_create(
+        [User(username=f"user{i}@example.com", email=f"user{i}@example.com", first_name="Bench", last_name=f"User{i}") for i in range(users)],
+        batch_size=1000,
+    )
+    board_objs = Board.objects.bulk_create(
+        [Board(title=f"Board {i}", owner=rnd.choice(user_objs)) for i in range(boards)], batch_size=1000,
+    )
+    memberships = {}
+    for board in board_objs:
+        for user in rnd.sample(user_objs, members_per_board):
+            memberships[(board.id, user.id)] = Board.members.through(board_id=board.id, user_id=user.id)
+    Board.members.through.objects.bulk_create(memberships.values(), batch_size=5000)
+    board_members = {}
+    for board_id, user_id in memberships:
+        board_members.setdefault(board_id, []).append(user_id)
+
+    statuses = [value for value, _ in Task.STATUS_CHOICES]
+    priorities = [value for value, _ in Task.PRIORITY_CHOICES]
+    task_objs = []
+    for i in range(tasks):
+        board = rnd.choice(board_objs)
+        users_on_board = board_members[board.id]
+        task_objs.append(Task(
+            board=board,
+            title=text(f"Task {i}", 4),
+            description=text("Lorem ipsum dolor sit amet " * 4, 20),
+            status=rnd.choice(statuses),
+            priority=rnd.choice(priorities),
+            assignee_id=rnd.choice(users_on_board),
+            reviewer_id=rnd.choice(users_on_board),
+            due_date=None if rnd.random() < 0.1 else f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+        ))
+    task_objs = Task.objects.bulk_create(task_objs, batch_size=5000)
+    Comment.objects.bulk_create(
+        [Comment(task=rnd.choice(task_objs), author=rnd.choice(user_objs), content=text(f"Comment {i}", 12)) for i in range(comments)],
+        batch_size=5000,
+    )
+    BoardStats.rebuild()
+    Task.reconcile_comments_count()
+    return user_objs
+
+
+class Timer:
+    """Context manager measuring wall time in milliseconds"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
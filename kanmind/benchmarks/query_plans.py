@@ -0,0 +1,119 @@
+"""Shows EXPLAIN QUERY PLAN and timings of the hot endpoints without and with the Task/Comment indexes
+
+Usage: python -m benchmarks.query_plans [--tasks 100000] [--comments 100000] [--repeat 5]
+"""
+import argparse
+import re
+import statistics
+
+from benchmarks.common import Timer, seed, setup_django
+
+NUMBER = re.compile(r"\b\d+\b")
+
+
+"""Indexes of migration 0005; its comment index has been replaced by comment_task_created_id_idx (0007).
+Indexes added for later features stay in place, so both runs differ only in these"""
+INDEX_NAMES = {
+    "Task": ["task_board_status_idx", "task_board_priority_idx", "task_assignee_board_idx", "task_reviewer_board_idx"],
+    "Comment": ["comment_task_created_id_idx"],
+}
+
+
+def _new_indexes():
+    from kanban_app.models import Comment, Task
+    return [
+        (model, index) for model in (Task, Comment)
+        for index in model._meta.indexes if index.name in INDEX_NAMES[model.__name__]
+    ]
+
+
+def _set_indexes(enabled):
+    from django.db import connection
+    with connection.schema_editor() as editor:
+        for model, index in _new_indexes():
+            if enabled:
+                editor.add_index(model, index)
+            else:
+                editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def _endpoints():
+    """Picks the heaviest user, board and task of the seeded data"""
+    from django.contrib.auth.models import User
+    from django.db.models import Count
+    from django.urls import reverse
+    from kanban_app.models import Board, Task
+
+    user = User.objects.annotate(total=Count("assigned_tasks")).order_by("-total").first()
+    board = Board.objects.filter(members=user).annotate(total=Count("tasks")).order_by("-total").first()
+    task = Task.objects.filter(board__members=user).annotate(total=Count("comments")).order_by("-total").first()
+    return user, [
+        ("BoardDetailView", reverse("board-detail", kwargs={"pk": board.id})),
+        ("TasksAssignedToMeView", reverse("tasks-assigned")),
+        ("TasksReviewedByMeView", reverse("tasks-reviewing")),
+        ("TasksInvolvedView", reverse("tasks-involved")),
+        ("CommentsListCreateView", reverse("comments-list-create", kwargs={"task_id": task.id})),
+    ]
+
+
+def _explain(sql):
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def _run(label, client, endpoints, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    print(f"\n=== {label} ===")
+    for name, url in endpoints:
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(url)
+        timings = []
+        for _ in range(repeat):
+            with Timer() as timer:
+                response = client.get(url)
+            timings.append(timer.ms)
+        print(f"\n{name} {url} -> {response.status_code}, {len(ctx.captured_queries)} queries, "
+              f"median {statistics.median(timings):.1f} ms, min {min(timings):.1f} ms")
+        shapes = {}
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if sql.lstrip().upper().startswith("SELECT"):
+                shapes.setdefault(NUMBER.sub("?", sql), []).append(sql)
+        for shape, queries in shapes.items():
+            repeated = f" (x{len(queries)})" if len(queries) > 1 else ""
+            print(f"  {shape[:140]}{'…' if len(shape) > 140 else ''}{repeated}")
+            for step in _explain(queries[0]):
+                print(f"    -> {step}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django("kanmind_query_plans.sqlite3")
+    from rest_framework.test import APIClient
+
+    print(f"Seeding {args.tasks} tasks and {args.comments} comments …")
+    seed(tasks=args.tasks, comments=args.comments)
+    user, endpoints = _endpoints()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    _set_indexes(False)
+    _run("before: FK indexes only", client, endpoints, args.repeat)
+    _set_indexes(True)
+    _run("after: composite indexes", client, endpoints, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Mixed read/write load with and without the read replica (core.db_routing)
+
+Reader threads (one user each) poll board list, task feed and comments while writer threads patch tasks and
+add comments. First everything runs against the primary, then the readers' requests go to a second SQLite file
+that a background thread refreshes with sync_replica's copy every --sync-interval seconds.
+All threads share one process, so on few cores the GIL caps total throughput: the replica mainly takes the
+readers' shared locks off the writers, while each copy costs the readers CPU time.
+
+Usage: python -m benchmarks.replica [--readers 6] [--writers 2] [--seconds 10] [--sync-interval 1]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.common import seed, setup_django
+
+
+def _load(readers, write_targets, seconds, urls):
+    """Runs the threads for `seconds`, returns read latencies, write count and error statuses"""
+    from django.test import Client
+
+    stop = time.perf_counter() + seconds
+    read_ms, writes, errors = [], [0], []
+
+    def reader(headers):
+        client, rnd = Client(headers=headers), random.Random()
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            response = client.get(rnd.choice(urls))
+            read_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    def writer(headers, task_id, comments_url):
+        client, rnd = Client(headers=headers), random.Random()
+        while time.perf_counter() < stop:
+            if rnd.random() < 0.5:
+                response = client.patch(f"/api/tasks/{task_id}/", {"priority": rnd.choice(["low", "medium", "high"])},
+                                        content_type="application/json")
+            else:
+                response = client.post(comments_url, {"content": "Benchmark"}, content_type="application/json")
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            writes[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(headers,)) for headers in readers]
+    threads += [threading.Thread(target=writer, args=target) for target in write_targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return read_ms, writes[0], errors
+
+
+def _report(label, read_ms, writes, errors, seconds):
+    read_ms.sort()
+    p95 = read_ms[int(len(read_ms) * 0.95) - 1]
+    print(f"{label:<26} reads {len(read_ms) / seconds:7.1f}/s   p50 {statistics.median(read_ms):6.1f} ms   "
+          f"p95 {p95:7.1f} ms   writes {writes / seconds:6.1f}/s   errors {len(errors)} {sorted(set(errors))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--sync-interval", type=float, default=1.0)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    args = parser.parse_args()
+
+    replica_path = Path(tempfile.gettempdir()) / "kanmind_replica_copy.sqlite3"
+    os.environ["KANMIND_REPLICA_DB"] = str(replica_path)
+    db_path = setup_django("kanmind_replica.sqlite3")
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+    from core.db_routing import copy_sqlite_database
+    from kanban_app.models import Board, Task
+
+    print(f"Seeding {args.tasks} tasks …")
+    seed(users=50, boards=100, tasks=args.tasks, comments=args.tasks)
+    board = Board.objects.order_by("id").first()
+    users = list(User.objects.order_by("id")[: args.readers + args.writers])
+    board.members.add(*users)
+    headers = [{"Authorization": f"Token {Token.objects.get_or_create(user=user)[0].key}"} for user in users]
+    task = Task.objects.filter(board=board).first()
+    comments_url = reverse("comments-list-create", kwargs={"task_id": task.id})
+    urls = [reverse("board-list-create"), reverse("tasks-assigned"), reverse("tasks-involved"), comments_url]
+    reader_headers = headers[: args.readers]
+    write_targets = [(writer_headers, task.id, comments_url) for writer_headers in headers[args.readers:]]
+    settings.ALLOWED_HOSTS = ["*"]
+
+    print(f"\n{args.readers} readers, {args.writers} writers, {args.seconds:.0f} s each\n")
+    settings.REPLICA_DATABASE = None
+    _report("primary only", *_load(reader_headers, write_targets, args.seconds, urls), args.seconds)
+
+    settings.REPLICA_DATABASE = "replica"
+    copy_sqlite_database(db_path, replica_path)
+    copies, stop = [], threading.Event()
+
+    def replicate():
+        while not stop.wait(args.sync_interval):
+            start = time.perf_counter()
+            copy_sqlite_database(db_path, replica_path)
+            copies.append((time.perf_counter() - start) * 1000)
+
+    replicator = threading.Thread(target=replicate)
+    replicator.start()
+    try:
+        result = _load(reader_headers, write_targets, args.seconds, urls)
+    finally:
+        stop.set()
+        replicator.join()
+    _report("primary + replica", *result, args.seconds)
+    if copies:
+        print(f"\nreplica refreshed {len(copies)}x, median copy {statistics.median(copies):.0f} ms "
+              f"(lag up to {args.sync_interval:.1f} s + copy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Full-text search on a million rows: FTS5 index vs the icontains scan it replaces, plus the cost of keeping it in sync
+
+Tasks and comments get random text from a Zipf-distributed vocabulary, so there are common and rare words.
+The searching user sees the boards of an average member (a few percent of all rows). The scan is unranked and
+stops after `limit` matches, so it is cheapest for very common words, where FTS5 has to rank every match.
+
+Usage: python -m benchmarks.search [--tasks 500000] [--comments 500000] [--repeat 5]
+"""
+import argparse
+import random
+import statistics
+
+from benchmarks.common import Timer, seed, setup_django
+
+SYLLABLES = ["ka", "to", "ri", "mel", "san", "du", "ber", "lo", "fin", "gra", "nu", "pex", "ta", "vor", "shi", "an"]
+
+
+def _vocabulary(size, seed_value=7):
+    """size distinct pseudo words, ordered from most to least frequent"""
+    rnd = random.Random(seed_value)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+    return sorted(words, key=lambda word: (len(word), word))
+
+
+def _median(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            result = func()
+        timings.append(timer.ms)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=500_000)
+    parser.add_argument("--comments", type=int, default=500_000)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django("kanmind_search.sqlite3")
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from kanban_app.membership import get_accessible_board_ids
+    from kanban_app.models import Comment, Task
+    from kanban_app.search import FTS5SearchBackend, ScanSearchBackend
+
+    words = _vocabulary(args.vocabulary)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    print(f"Seeding {args.tasks} tasks and {args.comments} comments …")
+    seed(tasks=args.tasks, comments=args.comments, words=words, word_weights=weights)
+    fts, scan = FTS5SearchBackend(), ScanSearchBackend()
+
+    with Timer() as timer, transaction.atomic():
+        indexed = fts.rebuild()
+    print(f"rebuild_search_index: {indexed} rows in {timer.ms / 1000:.1f} s")
+
+    user = User.objects.order_by("id")[User.objects.count() // 2]
+    board_ids = get_accessible_board_ids(user)
+    queries = {
+        "common word": words[0],
+        "rare word": words[-1],
+        "two words": f"{words[10]} {words[200]}",
+        "prefix (typing)": words[50][:3],
+    }
+    print(f"\nSearching as a member of {len(board_ids)} boards, limit 20, median of {args.repeat}\n")
+    for label, query in queries.items():
+        fts_ms, fts_hits = _median(lambda: fts.search(query, board_ids, 20), args.repeat)
+        scan_ms, scan_hits = _median(lambda: scan.search(query, board_ids, 20), max(1, args.repeat // 2))
+        print(f"{label:<18} {query!r:<22} FTS5 {fts_ms:8.1f} ms ({len(fts_hits):2d} hits)   "
+              f"icontains scan {scan_ms:8.1f} ms ({len(scan_hits):2d} hits)   x{scan_ms / max(fts_ms, 0.001):.0f}")
+
+    task = Task.objects.order_by("id").first()
+    comment = Comment.objects.order_by("id").first()
+
+    def update_task():
+        with transaction.atomic():
+            task.description = " ".join(random.choices(words, k=20))
+            task.save()
+
+    def add_and_delete_comment():
+        with transaction.atomic():
+            Comment.objects.create(task=task, author=comment.author, content=" ".join(random.choices(words, k=12))).delete()
+
+    print("\nWrite path incl. signals (stats, versions, events, search index)\n")
+    print(f"task text update        {_median(update_task, args.repeat * 4)[0]:8.2f} ms")
+    print(f"comment create + delete {_median(add_and_delete_comment, args.repeat * 4)[0]:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
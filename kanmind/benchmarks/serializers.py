@@ -0,0 +1,76 @@
+"""Rows/sec of the DRF serializers vs the fast read path (.values() rows + FastJSONRenderer)
+
+Each variant covers querying, serializing and rendering to bytes, i.e. everything the view does
+after the permission check.
+
+Usage: python -m benchmarks.serializers [--tasks 2000] [--page 200] [--repeat 10]
+"""
+import argparse
+import statistics
+from unittest import mock
+
+from benchmarks.common import Timer, seed, setup_django
+
+
+def _measure(label, func, rows, repeat, reference):
+    output = func()
+    timings = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            func()
+        timings.append(timer.ms)
+    median = statistics.median(timings)
+    same = "reference" if reference is None else "identical" if output == reference else "DIFFERENT"
+    print(f"{label:<44} {median:8.1f} ms   {rows / median * 1000:10.0f} rows/s   {len(output):9d} bytes  {same}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000, help="tasks on the benchmarked board")
+    parser.add_argument("--page", type=int, default=200, help="feed page size")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django("kanmind_serializers.sqlite3")
+    from django.db.models import F
+    from rest_framework.renderers import JSONRenderer
+    from core.utils.renderers import FastJSONRenderer
+    from kanban_app.api.fast_serializers import TASK_VALUES, board_detail_data, load_users, task_data, task_user_ids
+    from kanban_app.api.serializers import BoardDetailSerializer, TaskSerializer
+    from kanban_app.api.views import BoardDetailView
+    from kanban_app.models import Board, Task
+
+    print(f"Seeding one board with {args.tasks} tasks …")
+    seed(users=50, boards=1, tasks=args.tasks, comments=args.tasks, members_per_board=20)
+    board_id = Board.objects.get().id
+    feed = Task.objects.order_by(F("due_date").asc(nulls_last=True), "id")
+
+    def drf_board():
+        return JSONRenderer().render(BoardDetailSerializer(BoardDetailView().get_queryset().get(pk=board_id)).data)
+
+    def fast_board():
+        return FastJSONRenderer().render(board_detail_data(board_id))
+
+    def drf_feed():
+        return JSONRenderer().render(TaskSerializer(feed.select_related("assignee", "reviewer")[: args.page], many=True).data)
+
+    def fast_feed():
+        rows = list(feed.values(*TASK_VALUES)[: args.page])
+        return FastJSONRenderer().render(task_data(rows, load_users(task_user_ids(rows))))
+
+    print(f"\nBoard detail, {args.tasks} tasks")
+    reference = _measure("BoardDetailSerializer + JSONRenderer", drf_board, args.tasks, args.repeat, None)
+    _measure("board_detail_data + orjson", fast_board, args.tasks, args.repeat, reference)
+    with mock.patch("core.utils.renderers.orjson", None):
+        _measure("board_detail_data + stdlib json", fast_board, args.tasks, args.repeat, reference)
+
+    print(f"\nTask feed page, {args.page} tasks")
+    reference = _measure("TaskSerializer + JSONRenderer", drf_feed, args.page, args.repeat, None)
+    _measure("task_data + orjson", fast_feed, args.page, args.repeat, reference)
+    with mock.patch("core.utils.renderers.orjson", None):
+        _measure("task_data + stdlib json", fast_feed, args.page, args.repeat, reference)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Sustained concurrent writes through the API: SQLite as shipped vs the production profile (WAL + write lock)
+
+Writer threads patch tasks (TaskDetailView.patch) and add comments while reader threads page the task feed.
+Each profile runs in its own process, since the profile is read when Django starts.
+
+Usage: python -m benchmarks.sqlite_writes [--writers 8] [--readers 2] [--seconds 10] [--profile production]
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.common import seed, setup_django
+
+PROFILES = ["default", "production"]
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[int(len(values) * 0.95) - 1] if values else 0.0
+
+
+def run(args):
+    os.environ["KANMIND_SQLITE_PROFILE"] = args.profile
+    setup_django(f"kanmind_writes_{args.profile}.sqlite3")
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+    from kanban_app.models import Board, Task
+
+    seed(users=40, boards=20, tasks=5000, comments=5000)
+    board = Board.objects.order_by("id").first()
+    users = list(User.objects.order_by("id")[: args.writers + args.readers])
+    board.members.add(*users)
+    headers = [{"Authorization": f"Token {Token.objects.get_or_create(user=user)[0].key}"} for user in users]
+    task_ids = list(Task.objects.filter(board=board).values_list("id", flat=True))
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+
+    stop = time.perf_counter() + args.seconds
+    write_ms, read_ms, failures = [], [], []
+
+    def writer(client_headers):
+        client, rnd = Client(headers=client_headers, raise_request_exception=False), random.Random()
+        while time.perf_counter() < stop:
+            task_id = rnd.choice(task_ids)
+            start = time.perf_counter()
+            if rnd.random() < 0.5:
+                response = client.patch(reverse("task-detail", kwargs={"pk": task_id}),
+                                        {"priority": rnd.choice(["low", "medium", "high"])}, content_type="application/json")
+            else:
+                response = client.post(reverse("comments-list-create", kwargs={"task_id": task_id}),
+                                       {"content": "Stresstest"}, content_type="application/json")
+            write_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                failures.append(response.status_code)
+
+    def reader(client_headers):
+        client = Client(headers=client_headers, raise_request_exception=False)
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            response = client.get(reverse("tasks-involved"))
+            read_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                failures.append(response.status_code)
+
+    threads = [threading.Thread(target=writer, args=(h,)) for h in headers[: args.writers]]
+    threads += [threading.Thread(target=reader, args=(h,)) for h in headers[args.writers:]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"{args.profile:<11} {journal_mode:<7} writes {len(write_ms) / args.seconds:7.1f}/s   "
+          f"p50 {statistics.median(write_ms):6.1f} ms   p95 {_p95(write_ms):7.1f} ms   "
+          f"reads {len(read_ms) / args.seconds:6.1f}/s   p95 {_p95(read_ms):7.1f} ms   "
+          f"failed {len(failures)} {sorted(set(failures))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--profile", choices=PROFILES, help="run a single profile in this process")
+    args = parser.parse_args()
+
+    if args.profile:
+        run(args)
+        return
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f} s per profile\n")
+    for profile in PROFILES:
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_writes", "--profile", profile, "--writers", str(args.writers),
+             "--readers", str(args.readers), "--seconds", str(args.seconds)],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
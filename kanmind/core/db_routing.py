@@ -0,0 +1,138 @@
+"""Read replica routing: safe API requests read from settings.REPLICA_DATABASE, everything else uses the primary
+
+ReplicaRoutingMiddleware marks a request as replica-eligible; the first write in it pins the rest of the
+request to the primary, and for REPLICA_PIN_SECONDS also the following requests of the same client (token or
+session), so a client reads its own writes even though the replica lags behind.
+
+Views whose answer must match the primary (ETags, sync tokens, event streams) set read_from_primary = True,
+and values that outlive the request (shared caches) are loaded inside use_primary().
+"""
+import contextvars
+import hashlib
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_CACHE_KEY = "kanmind:replica-pin:{client}"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class RoutingState:
+    """Mutable per-request state, shared with sync_to_async threads of the same request"""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+_state = contextvars.ContextVar("kanmind_db_routing", default=None)
+
+
+@contextmanager
+def use_primary():
+    """Reads inside the block go to the primary, e.g. to validate against just written rows"""
+    token = _state.set(RoutingState(use_replica=False))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Routes reads of replica-eligible requests to the replica alias, all writes and migrations to the primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        alias = settings.REPLICA_DATABASE
+        if alias is None or state is None or not state.use_replica or state.wrote:
+            return DEFAULT_DB_ALIAS
+        # A transaction on the primary must see its own rows
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Both aliases hold the same data"""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != settings.REPLICA_DATABASE
+
+
+def _client_key(request):
+    """Token or session cookie of the request, hashed; None for anonymous clients"""
+    credential = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return PIN_CACHE_KEY.format(client=hashlib.sha256(credential.encode()).hexdigest()) if credential else None
+
+
+class ReplicaRoutingMiddleware:
+    """Lets safe requests below REPLICA_PATHS read from the replica unless the client wrote moments ago"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        client = _client_key(request)
+        use_replica = (
+            request.method in SAFE_METHODS
+            and request.path_info.startswith(tuple(settings.REPLICA_PATHS))
+            and not (client and cache.get(client))
+        )
+        state = RoutingState(use_replica)
+        return state, _state.set(state), client
+
+    def _finish(self, state, token, client):
+        _state.reset(token)
+        if state.wrote and client:
+            cache.set(client, True, settings.REPLICA_PIN_SECONDS)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if settings.REPLICA_DATABASE is None:
+            return self.get_response(request)
+        state, token, client = self._start(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(state, token, client)
+
+    async def __acall__(self, request):
+        if settings.REPLICA_DATABASE is None:
+            return await self.get_response(request)
+        state, token, client = self._start(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self._finish(state, token, client)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+        state = _state.get()
+        if state is not None and getattr(view_class, "read_from_primary", False):
+            state.use_replica = False
+        return None
+
+
+def copy_sqlite_database(source, target):
+    """Consistent snapshot of source via the SQLite backup API, swapped in atomically so open readers keep
+    the previous copy; the copy uses a rollback journal, so no stale -wal file can apply to it"""
+    temporary = f"{target}.tmp"
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(temporary)) as dst:
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode=DELETE")
+    os.replace(temporary, target)
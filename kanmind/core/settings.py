@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from datetime import timedelta
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,13 +36,31 @@ INSTALLED_APPS = [
 ]
 
 
+"""Throttle rates are keyed "<throttle_scope of the view>.<ip|email|token>", views without a matching rate are not throttled"""
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'auth_app.api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.utils.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'auth_app.api.throttling.IPThrottle',
+        'auth_app.api.throttling.EmailThrottle',
+        'auth_app.api.throttling.TokenThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'login.ip': '30/min',
+        'login.email': '10/min',
+        'registration.ip': '10/hour',
+        'registration.email': '5/hour',
+        'email_check.ip': '120/min',
+        'email_check.token': '60/min',
+    },
 }
 
 MIDDLEWARE = [
@@ -52,6 +72,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_routing.ReplicaRoutingMiddleware',
 ]
 
 CORS_ALLOWED_ORIGINS = [
@@ -78,13 +99,97 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+"""SQLite profiles, picked with KANMIND_SQLITE_PROFILE. 'production': WAL so readers never wait for the writer,
+synchronous=NORMAL (durable at checkpoints, never corrupt), 256 MB mmap, BEGIN IMMEDIATE and the in-process write
+lock of core.sqlite, so concurrent writers queue instead of failing with "database is locked".
+'default': SQLite as Django ships it, used unless a deployment opts into 'production'"""
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'init_command': (
+            'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA mmap_size=268435456; '
+            'PRAGMA cache_size=-20000; PRAGMA temp_store=MEMORY'
+        ),
+        'timeout': 20,
+        'transaction_mode': 'IMMEDIATE',
+        'serialize_writes': True,
+    },
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_PROFILES[os.environ.get('KANMIND_SQLITE_PROFILE', 'default')],
     }
 }
 
+"""Optional read replica for safe requests below REPLICA_PATHS (core.db_routing). Locally a second SQLite file,
+e.g. KANMIND_REPLICA_DB=replica.sqlite3 kept current by `manage.py sync_replica --interval 1`. A client that
+wrote reads from the primary for REPLICA_PIN_SECONDS, which should exceed the replication lag"""
+REPLICA_DATABASE = None
+if os.environ.get('KANMIND_REPLICA_DB'):
+    REPLICA_DATABASE = 'replica'
+    DATABASES[REPLICA_DATABASE] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['KANMIND_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.db_routing.PrimaryReplicaRouter']
+REPLICA_PATHS = ['/api/']
+REPLICA_PIN_SECONDS = 5
+
+"""Use a shared cache (e.g. Redis/Memcached) when running several worker processes"""
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'kanmind',
+    }
+}
+
+"""In-process token -> user cache of CachedTokenAuthentication (entries, seconds). Each hit checks the token's
+revocation marker in the shared cache, so logout, regenerated tokens and deactivation reach every worker at once"""
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_TTL = 60
+
+"""Email check and registration lookups: seconds a found / unknown address stays cached, and the optional
+in-process Bloom filter of all addresses that answers most unknown addresses without the database. After a
+change in any process its "unknown" answers go through cache and database again until its next rebuild
+(REFRESH seconds), keep that short with several workers"""
+EMAIL_LOOKUP_TTL = 300
+EMAIL_LOOKUP_NEGATIVE_TTL = 30
+EMAIL_LOOKUP_BLOOM = {
+    'ENABLED': False,
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.01,
+    'REFRESH': 300,
+}
+
+"""Seconds a user's accessible board ids stay cached (invalidated on membership/owner changes)"""
+BOARD_ACCESS_CACHE_TTL = 300
+
+"""Seconds a board version (ETag of the board detail) stays cached, invalidated on every board change"""
+BOARD_VERSION_CACHE_TTL = 300
+
+"""Delta sync (/api/boards/<id>/changes/): tokens lie OVERLAP before the read to cover concurrent commits,
+tombstones and tokens older than RETENTION are gone (prune_tombstones), such clients reload the full board"""
+BOARD_SYNC_OVERLAP = timedelta(seconds=2)
+BOARD_SYNC_RETENTION = timedelta(days=30)
+
+"""Broker of the SSE board events: InProcessBroker for a single worker process,
+SQLiteBroker (OPTIONS: {"path": BASE_DIR / "events.sqlite3"}) when several workers share one node"""
+KANMIND_EVENTS = {
+    'BROKER': 'kanban_app.events.InProcessBroker',
+    'OPTIONS': {},
+    'HEARTBEAT': 15,
+}
+
+"""Email login (MailLoginView) through the UserEmail index, username login (admin) through ModelBackend"""
+AUTHENTICATION_BACKENDS = [
+    'auth_app.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -0,0 +1,106 @@
+"""SQLite backend whose writers queue on an in-process lock instead of SQLite's polling busy handler
+
+With OPTIONS["serialize_writes"], a transaction (atomic block) holds the lock of its database file from BEGIN to
+COMMIT/ROLLBACK, single writing statements outside transactions hold it for the statement. Reads never take it,
+so with journal_mode=WAL they run next to the writer. Writers of other processes still meet SQLite's own lock
+and wait up to OPTIONS["timeout"] in its busy handler.
+"""
+import threading
+from contextlib import nullcontext
+from django.db.backends.sqlite3 import base
+from django.db.utils import OperationalError
+
+READ_PREFIXES = ("SELECT", "PRAGMA", "EXPLAIN")
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def get_write_lock(name):
+    """One lock per database file, shared by all connections of the process"""
+    with _locks_guard:
+        return _locks.setdefault(str(name), threading.Lock())
+
+
+class SerializedCursorWrapper(base.SQLiteCursorWrapper):
+    db = None
+
+    def execute(self, query, params=None):
+        with self.db.statement_write_lock(query):
+            return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        with self.db.statement_write_lock(query):
+            return super().executemany(query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    write_lock = None
+    holds_write_lock = False
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        serialize = kwargs.pop("serialize_writes", False)
+        self.write_lock = get_write_lock(self.settings_dict["NAME"]) if serialize else None
+        self.write_lock_timeout = kwargs.get("timeout", 5)
+        return kwargs
+
+    def acquire_write_lock(self):
+        if self.write_lock is None or self.holds_write_lock:
+            return
+        if not self.write_lock.acquire(timeout=self.write_lock_timeout):
+            raise OperationalError("database is locked (waited %s s for the write lock)" % self.write_lock_timeout)
+        self.holds_write_lock = True
+
+    def release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            self.write_lock.release()
+
+    def statement_write_lock(self, query):
+        """Lock for one statement in autocommit mode; transactions already hold it from BEGIN"""
+        if self.write_lock is None or self.holds_write_lock or query.lstrip()[:7].upper().startswith(READ_PREFIXES):
+            return nullcontext()
+        return _StatementLock(self)
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SerializedCursorWrapper)
+        cursor.db = self
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.acquire_write_lock()
+        try:
+            super()._start_transaction_under_autocommit()
+        except Exception:
+            self.release_write_lock()
+            raise
+
+    def _commit(self):
+        try:
+            super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self.release_write_lock()
+
+
+class _StatementLock:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.acquire_write_lock()
+
+    def __exit__(self, *exc):
+        self.db.release_write_lock()
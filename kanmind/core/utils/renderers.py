@@ -0,0 +1,21 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer producing the same bytes, via orjson when installed and no indentation is requested"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            """Dates, lazy strings, Decimals, non-str keys: DRF's encoder formats them differently, so it renders them"""
+            return super().render(data, accepted_media_type, renderer_context)
+        """Same escaping of U+2028/U+2029 as JSONRenderer, safe for embedding in <script>"""
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
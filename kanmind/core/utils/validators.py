@@ -1,6 +1,6 @@
 import re
-from django.contrib.auth.models import User
 from rest_framework.exceptions import ValidationError
+from auth_app.lookup import email_lookup
 
 EMAIL_REGEX = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
 SPECIAL_CHARACTER_REGEX = r"[!@#$%^&*(),.?\":{}|<>]"
@@ -13,8 +13,8 @@ def validate_email_format(email: str):
 
 
 def validate_email_unique(email: str):
-    """Checks if email already exists"""
-    if User.objects.filter(email=email).exists():
+    """Checks if email already exists, case-insensitive via the cached email lookup (the unique index has the last word)"""
+    if email_lookup.exists(email):
         raise ValidationError(
             {"E-Mail": "E-Mail-Adresse wird bereits verwendet."})
 
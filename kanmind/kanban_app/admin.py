@@ -160,20 +160,28 @@ class BoardAdmin(admin.ModelAdmin):
     filter_horizontal = ("members",)
     inlines = [TaskInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("owner", "stats")
+
+    def _stat(self, obj, field):
+        """Reads from materialized BoardStats, run rebuild_board_stats if missing"""
+        stats = getattr(obj, "stats", None)
+        return getattr(stats, field) if stats else None
+
     def member_count(self, obj):
-        return obj.members.count()
+        return self._stat(obj, "member_count")
     member_count.short_description = "Mitglieder"
 
     def ticket_count(self, obj):
-        return obj.tasks.count()
+        return self._stat(obj, "ticket_count")
     ticket_count.short_description = "Tasks gesamt"
 
     def tasks_to_do_count(self, obj):
-        return obj.tasks.filter(status="to-do").count()
+        return self._stat(obj, "tasks_to_do_count")
     tasks_to_do_count.short_description = "To Do"
 
     def tasks_high_prio_count(self, obj):
-        return obj.tasks.filter(priority="high").count()
+        return self._stat(obj, "tasks_high_prio_count")
     tasks_high_prio_count.short_description = "High Prio"
 
 
@@ -206,7 +214,7 @@ class TaskAdmin(admin.ModelAdmin):
     inlines = [CommentInline]
 
     def comments_count(self, obj):
-        return obj.comments.count()
+        return obj.comments_count
     comments_count.short_description = "Kommentare"
 
 
@@ -0,0 +1,178 @@
+"""Async versions of the read-heavy endpoints, served natively when running on core.asgi"""
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, PermissionDenied
+from rest_framework.request import Request
+from auth_app.api.authentication import CachedTokenAuthentication
+from kanban_app.api.fast_serializers import aload_users, task_data, task_user_ids
+from kanban_app.api.mixins import TaskFeedQuerysetMixin, UserBoardsQuerysetMixin
+from kanban_app.api.pagination import CommentPagination, TaskFeedPagination
+from kanban_app.api.permissions import IsBoardOwnerOrMember
+from kanban_app.api.serializers import BoardDetailSerializer, BoardListSerializer, CommentSerializer
+from kanban_app.api.views import TasksAssignedToMeView, TasksInvolvedView, TasksReviewedByMeView
+from kanban_app.events import get_broker
+from kanban_app.membership import acan_access_board, aget_accessible_board_ids, with_board_access
+from kanban_app.models import Board, Task
+from kanban_app.versioning import aget_board_version, board_etag
+
+
+class AsyncAPIView(View):
+    """Minimal async counterpart of APIView: cached token auth, async object permissions, JSON responses"""
+    authentication_class = CachedTokenAuthentication
+    permission_classes = [IsBoardOwnerOrMember]
+
+    def json(self, data, status=status.HTTP_200_OK, headers=None):
+        return JsonResponse(data, status=status, headers=headers, safe=False, encoder=DjangoJSONEncoder)
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request)
+        self.request = request
+        try:
+            authenticator = self.authentication_class()
+            result = await authenticator.aauthenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+            request.user, request.auth = result
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            headers = {"WWW-Authenticate": authenticator.authenticate_header(request)} if exc.status_code == 401 else None
+            return self.json({"detail": exc.detail}, status=exc.status_code, headers=headers)
+        except Exception:
+            return self.json({"error": "Interner Serverfehler"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def check_object_permissions(self, request, obj):
+        for permission in self.permission_classes:
+            await permission().ahas_object_permission(request, self, obj)
+
+
+class AsyncBoardListView(UserBoardsQuerysetMixin, AsyncAPIView):
+    """Lists all boards of the current user"""
+
+    async def get(self, request, *args, **kwargs):
+        boards = [board async for board in self.get_queryset()]
+        return self.json(BoardListSerializer(boards, many=True).data)
+
+
+class AsyncBoardDetailView(AsyncAPIView):
+    """Reads a board, with the same ETag handling as BoardDetailView"""
+    read_from_primary = True
+
+    def get_queryset(self):
+        task_qs = Task.objects.select_related("assignee", "reviewer").order_by("id")
+        return (
+            Board.objects.select_related("owner")
+            .prefetch_related(Prefetch("members", queryset=User.objects.order_by("id")), Prefetch("tasks", queryset=task_qs))
+        )
+
+    async def get(self, request, pk, *args, **kwargs):
+        version = await aget_board_version(pk)
+        etag = board_etag(pk, version) if version is not None else None
+        if etag is not None:
+            if not await acan_access_board(request.user, pk):
+                raise PermissionDenied(IsBoardOwnerOrMember.message)
+            if etag in parse_etags(request.headers.get("If-None-Match", "")):
+                return HttpResponseNotModified(headers={"ETag": etag})
+
+        board = await self.get_queryset().filter(pk=pk).afirst()
+        if board is None:
+            raise NotFound()
+        await self.check_object_permissions(request, board)
+        return self.json(BoardDetailSerializer(board).data, headers={"ETag": etag} if etag else None)
+
+
+class AsyncTaskFeedView(TaskFeedQuerysetMixin, AsyncAPIView):
+    """Base for the async task feeds, keyset paginated like the sync feeds"""
+    pagination_class = TaskFeedPagination
+
+    async def get(self, request, *args, **kwargs):
+        paginator = self.pagination_class()
+        rows = await paginator.apaginate_queryset(self.get_queryset().values(*self.get_feed_values()), request, view=self)
+        users = await aload_users(task_user_ids(rows))
+        return self.json(paginator.get_paginated_data(task_data(rows, users, self.get_sparse_fields())))
+
+
+class AsyncTasksAssignedToMeView(AsyncTaskFeedView):
+    """Lists all tasks assigned to the current user"""
+    get_feed_filter = TasksAssignedToMeView.get_feed_filter
+
+
+class AsyncTasksReviewedByMeView(AsyncTaskFeedView):
+    """Lists all tasks reviewed by the current user"""
+    get_feed_filter = TasksReviewedByMeView.get_feed_filter
+
+
+class AsyncTasksInvolvedView(AsyncTaskFeedView):
+    """Lists all tasks the current user is involved in"""
+    get_feed_filter = TasksInvolvedView.get_feed_filter
+
+
+class AsyncCommentsListView(AsyncAPIView):
+    """Lists the comments of a task, keyset paginated like the sync list"""
+    pagination_class = CommentPagination
+
+    async def get(self, request, task_id, *args, **kwargs):
+        task = await with_board_access(Task.objects.all(), request.user).filter(pk=task_id).afirst()
+        if task is None:
+            raise NotFound()
+        await self.check_object_permissions(request, task)
+        paginator = self.pagination_class()
+        comments = await paginator.apaginate_queryset(task.comments.select_related("author"), request, view=self)
+        return self.json(paginator.get_paginated_data(CommentSerializer(comments, many=True).data))
+
+
+class EventStreamRequiresASGI(APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "Live-Events sind nur unter einem ASGI-Server verfügbar (z. B. uvicorn core.asgi:application)."
+    default_code = "asgi_required"
+
+
+class AsyncBoardEventsView(AsyncAPIView):
+    """Streams board changes as Server-Sent Events, resumable via Last-Event-ID
+
+    Only under core.asgi: WSGI (runserver included) would collect the endless stream into a list before sending
+    anything and hold the worker forever.
+    """
+    read_from_primary = True
+
+    def get_last_event_id(self, request):
+        try:
+            return int(request.headers.get("Last-Event-ID") or request.query_params.get("last_event_id"))
+        except (TypeError, ValueError):
+            return None
+
+    async def get(self, request, pk, *args, **kwargs):
+        if not isinstance(request._request, ASGIRequest):
+            raise EventStreamRequiresASGI()
+        if not await Board.objects.filter(pk=pk).aexists():
+            raise NotFound()
+        if not await acan_access_board(request.user, pk):
+            raise PermissionDenied(IsBoardOwnerOrMember.message)
+
+        response = StreamingHttpResponse(
+            self.stream(request.user, pk, self.get_last_event_id(request)), content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, user, board_id, last_event_id):
+        yield "retry: 3000\n\n"
+        heartbeat = settings.KANMIND_EVENTS.get("HEARTBEAT", 15)
+        async for event in get_broker().subscribe(board_id, last_event_id, heartbeat=heartbeat):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            if event.type == "members.changed" and user.id in event.data["users"]:
+                """The membership signal already dropped the cached board ids, so this re-reads them"""
+                if board_id not in await aget_accessible_board_ids(user):
+                    return
+            yield event.encode()
+            if event.type == "board.deleted":
+                return
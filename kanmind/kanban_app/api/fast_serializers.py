@@ -0,0 +1,84 @@
+"""Read-only fast path: the output of TaskSerializer and BoardDetailSerializer built from .values() rows"""
+from django.contrib.auth.models import User
+from kanban_app.models import Board, Task
+
+TASK_FIELDS = ("id", "board", "title", "description", "status", "priority", "assignee", "reviewer", "due_date", "comments_count")
+TASK_VALUES = ("id", "board_id", "title", "description", "status", "priority", "assignee_id", "reviewer_id", "due_date", "comments_count")
+USER_VALUES = ("id", "email", "first_name", "last_name")
+
+"""Output field -> (column read for it, value built from the row and the user map)"""
+TASK_FIELD_SOURCES = {
+    "id": ("id", lambda row, users: row["id"]),
+    "board": ("board_id", lambda row, users: row["board_id"]),
+    "title": ("title", lambda row, users: row["title"]),
+    "description": ("description", lambda row, users: row["description"]),
+    "status": ("status", lambda row, users: row["status"]),
+    "priority": ("priority", lambda row, users: row["priority"]),
+    "assignee": ("assignee_id", lambda row, users: users.get(row["assignee_id"])),
+    "reviewer": ("reviewer_id", lambda row, users: users.get(row["reviewer_id"])),
+    "due_date": ("due_date", lambda row, users: None if row["due_date"] is None else row["due_date"].isoformat()),
+    "comments_count": ("comments_count", lambda row, users: row["comments_count"]),
+}
+
+
+def task_values(fields=TASK_FIELDS, *required):
+    """Columns to read for the given output fields, plus required ones (e.g. the pagination key)"""
+    columns = dict.fromkeys(("id", *required))
+    columns.update(dict.fromkeys(TASK_FIELD_SOURCES[field][0] for field in fields))
+    return tuple(columns)
+
+
+def user_data(row):
+    """Same output as UserShortSerializer"""
+    return {"id": row["id"], "email": row["email"], "fullname": f"{row['first_name']} {row['last_name']}".strip()}
+
+
+def task_user_ids(rows):
+    return {row[key] for row in rows for key in ("assignee_id", "reviewer_id") if row.get(key) is not None}
+
+
+def load_users(user_ids, users=None):
+    """{user_id: user_data} for user_ids, querying only the ids not already in users"""
+    users = {} if users is None else users
+    missing = [user_id for user_id in user_ids if user_id not in users]
+    if missing:
+        users.update((row["id"], user_data(row)) for row in User.objects.filter(pk__in=missing).values(*USER_VALUES))
+    return users
+
+
+async def aload_users(user_ids):
+    """Async counterpart of load_users"""
+    return {row["id"]: user_data(row) async for row in User.objects.filter(pk__in=user_ids).values(*USER_VALUES)}
+
+
+def task_data(rows, users, fields=TASK_FIELDS):
+    """Same output as TaskSerializer(many=True) for rows read with task_values(fields), users from load_users"""
+    if fields != TASK_FIELDS:
+        sources = [(field, TASK_FIELD_SOURCES[field][1]) for field in fields]
+        return [{field: source(row, users) for field, source in sources} for row in rows]
+    return [
+        {
+            "id": row["id"],
+            "board": row["board_id"],
+            "title": row["title"],
+            "description": row["description"],
+            "status": row["status"],
+            "priority": row["priority"],
+            "assignee": users.get(row["assignee_id"]),
+            "reviewer": users.get(row["reviewer_id"]),
+            "due_date": None if row["due_date"] is None else row["due_date"].isoformat(),
+            "comments_count": row["comments_count"],
+        }
+        for row in rows
+    ]
+
+
+def board_detail_data(board_id, task_fields=TASK_FIELDS):
+    """Same output as BoardDetailSerializer, None if the board does not exist; members double as user map"""
+    board = Board.objects.filter(pk=board_id).values("id", "title", "owner_id").first()
+    if board is None:
+        return None
+    members = [user_data(row) for row in User.objects.filter(member_boards=board_id).order_by("id").values(*USER_VALUES)]
+    tasks = list(Task.objects.filter(board_id=board_id).order_by("id").values(*task_values(task_fields)))
+    users = load_users(task_user_ids(tasks), {member["id"]: member for member in members})
+    return {**board, "members": members, "tasks": task_data(tasks, users, task_fields)}
@@ -1,10 +1,131 @@
-from kanban_app.models import Board
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from kanban_app.api.serializers import TaskFeedFilterSerializer
+from kanban_app.api.fast_serializers import TASK_FIELDS, load_users, task_data, task_user_ids, task_values
+from kanban_app.membership import with_board_access
+from kanban_app.models import Board, Task
 
 
 class UserBoardsQuerysetMixin:
     """Mixin for checking if user is owner or member of a specific board"""
     def get_queryset(self):
         account = self.request.user
-        owned = Board.objects.filter(owner=account)
-        member = Board.objects.filter(members=account)
-        return (owned | member).distinct()
\ No newline at end of file
+        membership = Board.members.through.objects
+        member_board_ids = membership.filter(user=account).values("board_id")
+
+        """Member count as correlated subquery, so the task join is not multiplied by members"""
+        member_count = (
+            membership.filter(board=OuterRef("pk"))
+            .order_by()
+            .values("board")
+            .annotate(total=Count("*"))
+            .values("total")
+        )
+        return (
+            Board.objects
+            .filter(Q(owner=account) | Q(pk__in=member_board_ids))
+            .annotate(
+                member_count=Coalesce(Subquery(member_count, output_field=IntegerField()), 0),
+                ticket_count=Count("tasks"),
+                tasks_to_do_count=Count("tasks", filter=Q(tasks__status="to-do")),
+                tasks_high_prio_count=Count("tasks", filter=Q(tasks__priority="high")),
+            )
+            .order_by("id")
+        )
+
+
+
+class TaskAccessMixin:
+    """Resolves task, board and the caller's access flag in one query and reuses it for the request"""
+    task_url_kwarg = "task_id"
+
+    def get_task_queryset(self):
+        return with_board_access(Task.objects.select_related("board"), self.request.user)
+
+    def get_task(self):
+        if not hasattr(self, "_task"):
+            self._task = get_object_or_404(self.get_task_queryset(), pk=self.kwargs[self.task_url_kwarg])
+            self.check_object_permissions(self.request, self._task)
+        return self._task
+
+
+
+class SparseFieldsMixin:
+    """?fields=a,b and ?exclude=c select the keys of the returned items out of sparse_fields"""
+    sparse_fields = ()
+    fields_query_param = "fields"
+    exclude_query_param = "exclude"
+
+    def _requested_fields(self, param):
+        return {name.strip() for name in self.request.query_params.get(param, "").split(",") if name.strip()}
+
+    def get_sparse_fields(self):
+        """Requested fields in canonical order, all of sparse_fields if nothing was requested"""
+        if not hasattr(self, "_sparse_fields"):
+            fields = self._requested_fields(self.fields_query_param)
+            exclude = self._requested_fields(self.exclude_query_param)
+            unknown = (fields | exclude) - set(self.sparse_fields)
+            if unknown:
+                raise ValidationError({"fields": f"Unbekannte Felder: {', '.join(sorted(unknown))}"})
+            self._sparse_fields = tuple(
+                name for name in self.sparse_fields if (not fields or name in fields) and name not in exclude
+            )
+        return self._sparse_fields
+
+
+class TaskFeedQuerysetMixin(SparseFieldsMixin):
+    """Tasks on boards the user owns or is member of, narrowed by get_feed_filter and the validated query parameters"""
+    sparse_fields = TASK_FIELDS
+
+    def get_feed_filter(self, user):
+        """Q narrowing the feed to the caller's tasks, e.g. assignee=user; by default every task on the user's boards"""
+        return Q()
+
+    def get_feed_params(self):
+        """?status, ?priority, ?board, ?due_before, ?due_after, ?overdue and ?ordering, validated once per request"""
+        if not hasattr(self, "_feed_params"):
+            serializer = TaskFeedFilterSerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._feed_params = serializer.validated_data
+        return self._feed_params
+
+    def get_feed_ordering(self):
+        """(key field, descending) for TaskFeedPagination"""
+        ordering = self.get_feed_params()["ordering"]
+        return ordering.lstrip("-"), ordering.startswith("-")
+
+    def filter_feed(self, queryset, params):
+        if params.get("status"):
+            queryset = queryset.filter(status__in=params["status"])
+        if params.get("priority"):
+            queryset = queryset.filter(priority__in=params["priority"])
+        if "board" in params:
+            queryset = queryset.filter(board_id=params["board"])
+        if "due_before" in params:
+            queryset = queryset.filter(due_date__lte=params["due_before"])
+        if "due_after" in params:
+            queryset = queryset.filter(due_date__gte=params["due_after"])
+        if params.get("overdue") is not None:
+            overdue = Q(due_date__lt=timezone.localdate()) & ~Q(status="done")
+            queryset = queryset.filter(overdue if params["overdue"] else ~overdue)
+        return queryset
+
+    def get_queryset(self):
+        user = self.request.user
+        accessible_boards = Board.objects.filter(Q(owner=user) | Q(members=user)).distinct()
+        queryset = Task.objects.filter(board__in=accessible_boards).filter(self.get_feed_filter(user))
+        """Read with .values(), the users come from load_users"""
+        return self.filter_feed(queryset, self.get_feed_params())
+
+    def get_feed_values(self):
+        """Columns of the requested fields plus the pagination key"""
+        return task_values(self.get_sparse_fields(), self.get_feed_ordering()[0])
+
+    def list(self, request, *args, **kwargs):
+        """Pages of .values() rows rendered by the fast serializers, same output as TaskSerializer"""
+        fields = self.get_sparse_fields()
+        rows = self.paginate_queryset(self.get_queryset().values(*self.get_feed_values()))
+        return self.get_paginated_response(task_data(rows, load_users(task_user_ids(rows)), fields))
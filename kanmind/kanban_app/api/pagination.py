@@ -0,0 +1,203 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a stable (key_field, id) ordering, every page costs one indexed range scan"""
+    key_field = None
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Ungültiger Cursor."
+    """Optional direction switch, e.g. {"oldest": False, "newest": True} (value = descending)"""
+    ordering_query_param = None
+    ordering_choices = {}
+    default_descending = False
+    """Optional cursor returning only rows after it, oldest first, plus a 'newer' link for polling"""
+    since_query_param = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart for views using the async ORM"""
+        return self.get_page([row async for row in self.get_page_queryset(queryset, request, view)])
+
+    def get_ordering(self, request, view=None):
+        """(key field, descending) of this request"""
+        return self.key_field, self.get_descending(request)
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Orders, applies the cursors and limits to page_size + 1 rows (the extra row detects a next page)"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.key_field, descending = self.get_ordering(request, view)
+        self.key = queryset.model._meta.get_field(self.key_field)
+        self.since_position = self.decode_cursor(request, self.since_query_param)
+        self.descending = descending if self.since_position is None else False
+
+        if self.descending:
+            queryset = queryset.order_by(F(self.key_field).desc(nulls_first=True), "-id")
+        else:
+            queryset = queryset.order_by(F(self.key_field).asc(nulls_last=True), "id")
+        if self.since_position is not None:
+            queryset = queryset.filter(self.get_after_filter(*self.since_position))
+        position = self.decode_cursor(request, self.cursor_query_param)
+        if position is not None:
+            get_filter = self.get_before_filter if self.descending else self.get_after_filter
+            queryset = queryset.filter(get_filter(*position))
+        return queryset[: self.page_size + 1]
+
+    def get_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        if rows:
+            self.newest_position = self.get_position(rows[0] if self.descending else rows[-1])
+        else:
+            self.newest_position = self.since_position
+        return rows
+
+    def get_descending(self, request):
+        value = request.query_params.get(self.ordering_query_param) if self.ordering_query_param else None
+        return self.ordering_choices.get(value, self.default_descending)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_position(self, obj):
+        """obj is a model instance or a .values() row"""
+        if isinstance(obj, dict):
+            return obj[self.key.attname], obj["id"]
+        return getattr(obj, self.key.attname), obj.pk
+
+    def get_after_filter(self, value, pk):
+        """Rows after (value, pk) in 'value ASC NULLS LAST, id ASC' order"""
+        if value is None:
+            return Q(**{f"{self.key_field}__isnull": True, "id__gt": pk})
+        return (
+            Q(**{f"{self.key_field}__gt": value})
+            | Q(**{self.key_field: value, "id__gt": pk})
+            | Q(**{f"{self.key_field}__isnull": True})
+        )
+
+    def get_before_filter(self, value, pk):
+        """Rows before (value, pk) in 'value ASC NULLS LAST, id ASC' order, i.e. after it when descending"""
+        if value is None:
+            return Q(**{f"{self.key_field}__isnull": False}) | Q(**{f"{self.key_field}__isnull": True, "id__lt": pk})
+        return Q(**{f"{self.key_field}__lt": value}) | Q(**{self.key_field: value, "id__lt": pk})
+
+    def encode_cursor(self, position):
+        value, pk = position
+        raw = json.dumps([None if value is None else value.isoformat(), pk], separators=(",", ":"))
+        return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, param):
+        encoded = request.query_params.get(param) if param else None
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+            value = None if value is None else self.key.to_python(value)
+            return value, int(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_newer_link(self):
+        if self.newest_position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        if self.ordering_query_param:
+            url = remove_query_param(url, self.ordering_query_param)
+        return replace_query_param(url, self.since_query_param, self.encode_cursor(self.newest_position))
+
+    def get_paginated_data(self, data):
+        if self.since_query_param:
+            return {"next": self.get_next_link(), "newer": self.get_newer_link(), "results": data}
+        return {"next": self.get_next_link(), "results": data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                **({"newer": {"type": "string", "nullable": True, "format": "uri"}} if self.since_query_param else {}),
+                "results": schema,
+            },
+        }
+
+
+class TaskFeedPagination(KeysetPagination):
+    """Pagination for the personal task feeds, ordered by due date or the validated ?ordering= of the view"""
+    key_field = "due_date"
+
+    def get_ordering(self, request, view=None):
+        if view is None or not hasattr(view, "get_feed_ordering"):
+            return super().get_ordering(request, view)
+        return view.get_feed_ordering()
+
+
+class CommentPagination(KeysetPagination):
+    """Pagination for the comments of a task: newest first, ?order=oldest, ?since=<cursor> for new comments"""
+    key_field = "created_at"
+    ordering_query_param = "order"
+    ordering_choices = {"oldest": False, "newest": True}
+    default_descending = True
+    since_query_param = "since"
+
+
+class SearchPagination(BasePagination):
+    """Offset pagination for ranked search hits, which have no stable key to page on"""
+    default_limit = 20
+    max_limit = 50
+    limit_query_param = "limit"
+    offset_query_param = "offset"
+
+    def _get_int(self, request, param, default, maximum=None):
+        try:
+            value = int(request.query_params[param])
+        except (KeyError, ValueError):
+            return default
+        value = max(value, 0)
+        return min(value, maximum) if maximum is not None else value
+
+    def paginate_search(self, search, request):
+        """Calls search(limit, offset) with one extra hit to detect a next page"""
+        self.request = request
+        self.limit = self._get_int(request, self.limit_query_param, self.default_limit, self.max_limit) or self.default_limit
+        self.offset = self._get_int(request, self.offset_query_param, 0)
+        hits = search(self.limit + 1, self.offset)
+        self.has_next = len(hits) > self.limit
+        return hits[: self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_data(self, data):
+        return {"next": self.get_next_link(), "results": data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
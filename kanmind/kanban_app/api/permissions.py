@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from kanban_app.membership import aresolve_board_access, resolve_board_access
 
 class IsBoardOwnerOrMember(BasePermission):
     """Allows access only for owner or members"""
@@ -14,18 +15,22 @@ class IsBoardOwnerOrMember(BasePermission):
         if not request.user or not request.user.is_authenticated:
             raise NotAuthenticated("Anmeldung erforderlich.")
 
-        if hasattr(obj, "owner") and hasattr(obj, "members"):
-            board = obj
-        elif hasattr(obj, "board"):
-            board = obj.board
-        elif hasattr(obj, "task") and hasattr(obj.task, "board"):
-            board = obj.task.board
-        else:
+        access = resolve_board_access(request.user, obj)
+        if access is None:
             raise PermissionDenied(self.message)
 
-        is_owner = board.owner_id == request.user.id
-        is_member = board.members.filter(id=request.user.id).exists()
-        if is_owner or is_member:
+        if access:
             return True
         
-        raise PermissionDenied(self.message)
\ No newline at end of file
+        raise PermissionDenied(self.message)
+
+    async def ahas_object_permission(self, request, view, obj):
+        """Async path for views on the async ORM, same rules as has_object_permission"""
+        if not request.user or not request.user.is_authenticated:
+            raise NotAuthenticated("Anmeldung erforderlich.")
+
+        access = await aresolve_board_access(request.user, obj)
+        if access:
+            return True
+
+        raise PermissionDenied(self.message)
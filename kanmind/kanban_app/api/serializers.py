@@ -1,7 +1,8 @@
 from django.contrib.auth.models import User
 from django.db.models.functions import Coalesce
 from rest_framework import serializers
-from kanban_app.models import Board, Task, Comment
+from kanban_app.membership import load_member_users
+from kanban_app.models import Board, BoardStats, Task, Comment
 
 
 class UserMiniSerializer(serializers.ModelSerializer):
@@ -21,10 +22,9 @@ class UserShortSerializer(serializers.ModelSerializer):
 
 
 class TaskSerializer(serializers.ModelSerializer):
-    board = serializers.ReadOnlyField(source="board.id")
+    board = serializers.ReadOnlyField(source="board_id")
     assignee = UserShortSerializer(read_only=True, allow_null=True)
     reviewer = UserShortSerializer(read_only=True, allow_null=True)
-    comments_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Task
@@ -41,23 +41,10 @@ class TaskSerializer(serializers.ModelSerializer):
             "comments_count",
         ]
         
-    def get_comments_count(self, obj):
-        val = getattr(obj, "comments_count", None)
-        if val is not None:
-            return val
-        return obj.comments.count()
-        
 
 class TaskInBoardSerializer(serializers.ModelSerializer):
     assignee = UserMiniSerializer(read_only=True)
     reviewer = UserMiniSerializer(read_only=True)
-    comments_count = serializers.SerializerMethodField()
-
-    def get_comments_count(self, obj):
-        val = getattr(obj, "comments_count", None)
-        if val is not None:
-            return int(val)
-        return obj.comments.count()
 
     class Meta:
         model = Task
@@ -67,9 +54,27 @@ class TaskInBoardSerializer(serializers.ModelSerializer):
         )
         
         
+class ContextBoardField(serializers.PrimaryKeyRelatedField):
+    """Board by primary key, taken from context["boards"] without a query when the view preloaded it"""
+
+    def to_internal_value(self, data):
+        boards = self.context.get("boards")
+        if boards is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            board = boards.get(int(data))
+        except ValueError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if board is None:
+            return super().to_internal_value(data)
+        return board
+
+
 class TaskWriteSerializer(serializers.ModelSerializer):
     """Serializes and validates new and updated task"""
-    board = serializers.PrimaryKeyRelatedField(queryset=Board.objects.all())
+    board = ContextBoardField(queryset=Board.objects.all())
     assignee_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
     reviewer_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
 
@@ -78,19 +83,30 @@ class TaskWriteSerializer(serializers.ModelSerializer):
         fields = ["id", "board", "title", "description", "status", "priority",
                   "assignee_id", "reviewer_id", "due_date"]
 
-    def _get_allowed_user_ids(self, board: Board):
-        return list(board.members.values_list("id", flat=True)) + [board.owner_id]
+    def _get_board(self, board_id):
+        boards = self.context.get("boards") or {}
+        return boards.get(board_id) or self.instance.board
+
+    def _get_allowed_users(self, board):
+        """{user_id: User} of owner and members, from context["board_users"] if preloaded"""
+        board_users = self.context.setdefault("board_users", {})
+        if board.id not in board_users:
+            board_users[board.id] = load_member_users(board)
+        return board_users[board.id]
 
     def validate(self, attrs):
-        board = attrs.get("board") or getattr(self.instance, "board", None)
+        board = attrs.get("board")
+        if board is None and self.instance is not None:
+            board = self._get_board(self.instance.board_id)
         if board is None:
             raise serializers.ValidationError({"board": "Dieses Feld wird benötigt."})
 
-        allowed = set(self._get_allowed_user_ids(board))
-
         assignee_id = attrs.pop("assignee_id", serializers.empty)
         reviewer_id = attrs.pop("reviewer_id", serializers.empty)
+        if assignee_id is serializers.empty and reviewer_id is serializers.empty:
+            return attrs
 
+        allowed = self._get_allowed_users(board)
         errors = {}
 
         if assignee_id is not serializers.empty:
@@ -99,7 +115,7 @@ class TaskWriteSerializer(serializers.ModelSerializer):
             elif assignee_id not in allowed:
                 errors["assignee_id"] = "Assignee ist kein Mitglied dieses Boards."
             else:
-                attrs["assignee"] = User.objects.filter(id=assignee_id).first()
+                attrs["assignee"] = allowed[assignee_id]
 
         if reviewer_id is not serializers.empty:
             if reviewer_id is None:
@@ -107,7 +123,7 @@ class TaskWriteSerializer(serializers.ModelSerializer):
             elif reviewer_id not in allowed:
                 errors["reviewer_id"] = "Reviewer ist kein Mitglied dieses Boards."
             else:
-                attrs["reviewer"] = User.objects.filter(id=reviewer_id).first()
+                attrs["reviewer"] = allowed[reviewer_id]
 
         if errors:
             raise serializers.ValidationError(errors)
@@ -126,7 +142,7 @@ class TaskWriteSerializer(serializers.ModelSerializer):
 
 class BoardListSerializer(serializers.ModelSerializer):
     """Serializes and validates board list"""
-    owner_id = serializers.ReadOnlyField(source="owner.id")
+    owner_id = serializers.ReadOnlyField()
     members = serializers.PrimaryKeyRelatedField(many=True, queryset=User.objects.all(), required=False, write_only=True)
     member_count = serializers.SerializerMethodField()
     ticket_count = serializers.SerializerMethodField()
@@ -144,16 +160,33 @@ class BoardListSerializer(serializers.ModelSerializer):
             board.members.set(members)
         return board
 
+    def _get_annotated(self, obj, name):
+        """Reads counts annotated by UserBoardsQuerysetMixin, None if not annotated"""
+        val = getattr(obj, name, None)
+        return int(val) if val is not None else None
+
     def get_member_count(self, obj):
+        val = self._get_annotated(obj, "member_count")
+        if val is not None:
+            return val
         return obj.members.count()
 
     def get_ticket_count(self, obj):
+        val = self._get_annotated(obj, "ticket_count")
+        if val is not None:
+            return val
         return obj.tasks.count()
 
     def get_tasks_to_do_count(self, obj):
+        val = self._get_annotated(obj, "tasks_to_do_count")
+        if val is not None:
+            return val
         return obj.tasks.filter(status="to-do").count()
 
     def get_tasks_high_prio_count(self, obj):
+        val = self._get_annotated(obj, "tasks_high_prio_count")
+        if val is not None:
+            return val
         return obj.tasks.filter(priority="high").count()
 
 
@@ -222,13 +255,75 @@ class CommentCreateSerializer(serializers.ModelSerializer):
 
 
 class CommentSerializer(serializers.ModelSerializer):
-    """Serializes and validates comment, read-only"""
+    """Serializes and validates comment, read-only; context["fields"] limits the output"""
+    AUTHOR_FIELDS = ("author__first_name", "author__last_name", "author__username", "author__email")
     author = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = ["id", "created_at", "author", "content"]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def get_author(self, obj):
         fullname = f"{obj.author.first_name} {obj.author.last_name}".strip()
         return fullname or obj.author.username or obj.author.email
+
+
+
+class BoardStatsSerializer(serializers.ModelSerializer):
+    """Serializes materialized board statistics, read-only"""
+    board = serializers.ReadOnlyField(source="board_id")
+    status = serializers.SerializerMethodField()
+    priority = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BoardStats
+        fields = ["board", "ticket_count", "status", "priority", "member_count", "comment_count"]
+
+    def get_status(self, obj):
+        return {value: getattr(obj, field) for value, field in BoardStats.STATUS_FIELDS.items()}
+
+    def get_priority(self, obj):
+        return {value: getattr(obj, field) for value, field in BoardStats.PRIORITY_FIELDS.items()}
+
+
+class MultiValueChoiceField(serializers.MultipleChoiceField):
+    """Accepts repeated (?status=a&status=b) and comma separated (?status=a,b) query parameters"""
+
+    def get_value(self, dictionary):
+        if self.field_name not in dictionary:
+            return serializers.empty
+        values = dictionary.getlist(self.field_name) if hasattr(dictionary, "getlist") else [dictionary[self.field_name]]
+        return [value.strip() for raw in values for value in raw.split(",") if value.strip()]
+
+
+class TaskFeedFilterSerializer(serializers.Serializer):
+    """Validates the filter and ordering query parameters of the task feeds"""
+    """Orderings served by the (assignee|reviewer, due_date|updated_at) indexes"""
+    ORDERING_FIELDS = ("due_date", "updated_at")
+    ORDERING_CHOICES = [field for name in ORDERING_FIELDS for field in (name, f"-{name}")]
+
+    status = MultiValueChoiceField(
+        choices=Task.STATUS_CHOICES, required=False, error_messages={"invalid_choice": "Ungültiger Status: {input}."},
+    )
+    priority = MultiValueChoiceField(
+        choices=Task.PRIORITY_CHOICES, required=False, error_messages={"invalid_choice": "Ungültige Priorität: {input}."},
+    )
+    board = serializers.IntegerField(required=False, min_value=1, error_messages={"invalid": "Ungültige Board-ID."})
+    due_before = serializers.DateField(required=False, error_messages={"invalid": "Datum im Format JJJJ-MM-TT erwartet."})
+    due_after = serializers.DateField(required=False, error_messages={"invalid": "Datum im Format JJJJ-MM-TT erwartet."})
+    overdue = serializers.BooleanField(required=False, allow_null=True, default=None)
+    ordering = serializers.ChoiceField(
+        choices=ORDERING_CHOICES, default="due_date", error_messages={"invalid_choice": "Ungültige Sortierung: {input}."},
+    )
+
+    def validate(self, attrs):
+        if attrs.get("due_before") and attrs.get("due_after") and attrs["due_after"] > attrs["due_before"]:
+            raise serializers.ValidationError({"due_after": "due_after darf nicht nach due_before liegen."})
+        return attrs
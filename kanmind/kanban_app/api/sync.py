@@ -0,0 +1,87 @@
+"""Delta sync of a board: everything created, updated or removed since an opaque token, read via (board, updated_at) indexes"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from kanban_app.api.fast_serializers import USER_VALUES, load_users, task_data, task_user_ids, task_values, user_data
+from kanban_app.api.serializers import CommentSerializer
+from kanban_app.models import Board, BoardStats, Comment, Task, Tombstone
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Token abgelaufen, bitte das Board vollständig neu laden."
+    default_code = "sync_token_expired"
+
+
+def encode_token(moment):
+    return base64.urlsafe_b64encode(json.dumps({"t": moment.isoformat()}).encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Moment encoded in a token; ValidationError if malformed, SyncTokenExpired if older than BOARD_SYNC_RETENTION"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        moment = datetime.fromisoformat(payload["t"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValidationError({"since": "Ungültiger Token."})
+    if timezone.is_naive(moment):
+        raise ValidationError({"since": "Ungültiger Token."})
+    if moment < timezone.now() - settings.BOARD_SYNC_RETENTION:
+        raise SyncTokenExpired()
+    return moment
+
+
+def board_changes(board_id, since=None):
+    """Changes of a board after since (full snapshot if None) and the token for the next call, None if the board does not exist
+
+    The new token lies BOARD_SYNC_OVERLAP before the start of the read, so writes committed while it ran are
+    delivered again next time; clients apply tasks, comments and members as upserts.
+    """
+    started = timezone.now()
+    board = Board.objects.filter(pk=board_id).values("id", "title", "owner_id").first()
+    if board is None:
+        return None
+
+    tasks = Task.objects.filter(board_id=board_id)
+    members_updated_at = None
+    if since is not None:
+        tasks = tasks.filter(updated_at__gt=since)
+        members_updated_at = BoardStats.objects.filter(board_id=board_id).values_list("members_updated_at", flat=True).first()
+    members = None
+    if since is None or members_updated_at is None or members_updated_at > since:
+        members = [user_data(row) for row in User.objects.filter(member_boards=board_id).order_by("id").values(*USER_VALUES)]
+
+    task_rows = list(tasks.order_by("id").values(*task_values()))
+    users = load_users(task_user_ids(task_rows), {member["id"]: member for member in members or []})
+
+    """Every comment write touches its task, so changed comments only sit on changed tasks"""
+    task_ids = [row["id"] for row in task_rows]
+    comments = Comment.objects.filter(task_id__in=task_ids)
+    deleted = {"tasks": [], "comments": []}
+    if since is not None:
+        comments = comments.filter(updated_at__gt=since)
+        tombstones = Tombstone.objects.filter(board_id=board_id, deleted_at__gt=since).order_by("id")
+        for kind, object_id in tombstones.values_list("kind", "object_id"):
+            deleted[f"{kind}s"].append(object_id)
+        """A task moved away and back again is current, not deleted"""
+        deleted["tasks"] = sorted(set(deleted["tasks"]) - set(task_ids))
+        deleted["comments"] = sorted(set(deleted["comments"]))
+    comments = list(comments.select_related("author").order_by("id"))
+
+    return {
+        "token": encode_token(started - settings.BOARD_SYNC_OVERLAP),
+        "board": board,
+        "members": members,
+        "tasks": task_data(task_rows, users),
+        "comments": [
+            {**data, "task": comment.task_id}
+            for comment, data in zip(comments, CommentSerializer(comments, many=True).data)
+        ],
+        "deleted": deleted,
+    }
@@ -1,16 +1,29 @@
 """Contains all endpoints after login/registration"""
 from django.urls import path
-from kanban_app.api.views import BoardListCreateView, BoardDetailView, TaskCreateView, TasksAssignedToMeView, TasksReviewedByMeView, TaskDetailView, TasksInvolvedView, CommentsListCreateView, CommentDeleteView
+from kanban_app.api.async_views import AsyncBoardListView, AsyncBoardDetailView, AsyncTasksAssignedToMeView, AsyncTasksReviewedByMeView, AsyncTasksInvolvedView, AsyncCommentsListView, AsyncBoardEventsView
+from kanban_app.api.views import BoardListCreateView, BoardDetailView, TaskCreateView, TasksAssignedToMeView, TasksReviewedByMeView, TaskDetailView, TasksInvolvedView, TaskBulkView, CommentsListCreateView, CommentDeleteView, BoardStatsView, BoardChangesView, SearchView
 
 
 urlpatterns = [
     path("boards/", BoardListCreateView.as_view(), name='board-list-create'),
     path("boards/<int:pk>/", BoardDetailView.as_view(), name='board-detail'),
+    path("boards/<int:pk>/stats/", BoardStatsView.as_view(), name='board-stats'),
+    path("boards/<int:pk>/changes/", BoardChangesView.as_view(), name='board-changes'),
+    path("boards/<int:pk>/events/", AsyncBoardEventsView.as_view(), name='board-events'),
     path("tasks/assigned-to-me/", TasksAssignedToMeView.as_view(), name="tasks-assigned"),
     path("tasks/reviewing/", TasksReviewedByMeView.as_view(), name="tasks-reviewing"),
     path("tasks/involved/", TasksInvolvedView.as_view(), name="tasks-involved"),
     path('tasks/', TaskCreateView.as_view(), name='task-create'),
+    path("tasks/bulk/", TaskBulkView.as_view(), name="task-bulk"),
     path("tasks/<int:pk>/", TaskDetailView.as_view(), name="task-detail"),
     path('tasks/<int:task_id>/comments/', CommentsListCreateView.as_view(), name='comments-list-create'),
     path('tasks/<int:task_id>/comments/<int:comment_id>/', CommentDeleteView.as_view(), name='comment-delete'),
-]
\ No newline at end of file
+    path("search/", SearchView.as_view(), name="search"),
+
+    path("async/boards/", AsyncBoardListView.as_view(), name="async-board-list"),
+    path("async/boards/<int:pk>/", AsyncBoardDetailView.as_view(), name="async-board-detail"),
+    path("async/tasks/assigned-to-me/", AsyncTasksAssignedToMeView.as_view(), name="async-tasks-assigned"),
+    path("async/tasks/reviewing/", AsyncTasksReviewedByMeView.as_view(), name="async-tasks-reviewing"),
+    path("async/tasks/involved/", AsyncTasksInvolvedView.as_view(), name="async-tasks-involved"),
+    path("async/tasks/<int:task_id>/comments/", AsyncCommentsListView.as_view(), name="async-comments-list"),
+]
@@ -1,16 +1,26 @@
-from django.db.models import Count
-from django.db.models.functions import Coalesce
+from django.contrib.auth.models import User
 from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from core.utils.exceptions import exception_handler_status500
-from kanban_app.models import Board, Task, Comment
-from kanban_app.api.serializers import BoardListSerializer, BoardDetailSerializer, TaskSerializer, TaskWriteSerializer, CommentSerializer, CommentCreateSerializer, BoardUpdateSerializer, UserShortSerializer
-from kanban_app.api.mixins import UserBoardsQuerysetMixin
+from kanban_app.models import Board, BoardStats, Task, Comment
+from kanban_app.api.serializers import BoardListSerializer, BoardDetailSerializer, TaskSerializer, TaskWriteSerializer, CommentSerializer, CommentCreateSerializer, BoardUpdateSerializer, UserShortSerializer, BoardStatsSerializer
+from kanban_app.api.fast_serializers import TASK_FIELDS, board_detail_data
+from kanban_app.api.mixins import UserBoardsQuerysetMixin, SparseFieldsMixin, TaskAccessMixin, TaskFeedQuerysetMixin
+from kanban_app.api.pagination import CommentPagination, SearchPagination, TaskFeedPagination
 from kanban_app.api.permissions import IsBoardOwnerOrMember
+from kanban_app.api.sync import board_changes, decode_token
+from kanban_app.membership import can_access_board, get_accessible_board_ids, load_board_users, with_board_access
+from kanban_app.search import get_search_backend, search_terms
+from kanban_app.signals import record_bulk_task_changes
+from kanban_app.versioning import board_etag, get_board_version
 
 
 class BoardListCreateView(UserBoardsQuerysetMixin, generics.ListCreateAPIView):
@@ -28,23 +38,22 @@ class BoardListCreateView(UserBoardsQuerysetMixin, generics.ListCreateAPIView):
             return exception_handler_status500(exc, context=None)
 
 
-class BoardDetailView(generics.RetrieveUpdateDestroyAPIView):
-    """Reads, updates or deletes a board"""
+class BoardDetailView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
+    """Reads, updates or deletes a board; ?fields= / ?exclude= select the keys of its tasks"""
     permission_classes = [permissions.IsAuthenticated, IsBoardOwnerOrMember]
     serializer_class = BoardDetailSerializer
     queryset = Board.objects.all()
+    sparse_fields = TASK_FIELDS
+    """The ETag comes from the primary's version, so the body must too"""
+    read_from_primary = True
 
     def get_queryset(self):
-        task_qs = (
-            Task.objects
-            .select_related("assignee", "reviewer", "board")
-            .annotate(num_comments=Coalesce(Count("comments"), 0))
-        )
+        task_qs = Task.objects.select_related("assignee", "reviewer").order_by("id")
         return (
             super()
             .get_queryset()
             .select_related("owner")
-            .prefetch_related("members")
+            .prefetch_related(Prefetch("members", queryset=User.objects.order_by("id")))
             .prefetch_related(Prefetch("tasks", queryset=task_qs))
         )
         
@@ -58,6 +67,27 @@ class BoardDetailView(generics.RetrieveUpdateDestroyAPIView):
         self.check_object_permissions(self.request, board)
         return board
 
+    def retrieve(self, request, *args, **kwargs):
+        """Strong ETag from the board version, 304 without loading the board if unchanged, else the fast serializers"""
+        board_id = self.kwargs["pk"]
+        fields = self.get_sparse_fields()
+        version = get_board_version(board_id)
+        if version is None:
+            """No stats row (e.g. created via bulk_create): no ETag, access checked on the board itself"""
+            self.check_object_permissions(request, get_object_or_404(Board.objects.only("id", "owner_id"), pk=board_id))
+            return Response(board_detail_data(board_id, fields))
+        if not can_access_board(request.user, board_id):
+            raise PermissionDenied(IsBoardOwnerOrMember.message)
+
+        etag = board_etag(board_id, version, ",".join(fields) if fields != TASK_FIELDS else None)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = board_detail_data(board_id, fields)
+        if data is None:
+            raise NotFound()
+        return Response(data, headers={"ETag": etag})
+
     def destroy(self, request, *args, **kwargs):
         try:
             board = self.get_object()
@@ -69,38 +99,99 @@ class BoardDetailView(generics.RetrieveUpdateDestroyAPIView):
             return exception_handler_status500(exc, context=None)
 
 
-class TasksAssignedToMeView(generics.ListAPIView):
+class BoardStatsView(generics.RetrieveAPIView):
+    """Reads the materialized statistics of a board"""
+    permission_classes = [permissions.IsAuthenticated, IsBoardOwnerOrMember]
+    serializer_class = BoardStatsSerializer
+
+    def get_object(self):
+        """Reads only the stats row; access is checked before anything about the board is revealed"""
+        board_id = self.kwargs["pk"]
+        stats = BoardStats.objects.filter(board_id=board_id).first()
+        if stats is None:
+            """Boards without stats row (e.g. created via bulk_create) get one from rebuild_board_stats"""
+            self.check_object_permissions(self.request, get_object_or_404(Board, pk=board_id))
+            raise NotFound("Für dieses Board gibt es noch keine Statistik.")
+        self.check_object_permissions(self.request, stats)
+        return stats
+
+
+class BoardChangesView(APIView):
+    """Delta sync of a board: ?since=<token> returns only what changed after it, without since a full snapshot"""
+    permission_classes = [permissions.IsAuthenticated]
+    """A token from a lagging replica would skip the changes it has not seen yet"""
+    read_from_primary = True
+
+    def get(self, request, pk, *args, **kwargs):
+        if not Board.objects.filter(pk=pk).exists():
+            raise NotFound()
+        if not can_access_board(request.user, pk):
+            raise PermissionDenied(IsBoardOwnerOrMember.message)
+        token = request.query_params.get("since")
+        data = board_changes(pk, decode_token(token) if token else None)
+        if data is None:
+            raise NotFound()
+        return Response(data)
+
+
+class SearchView(APIView):
+    """Ranked full-text search over tasks and comments of the boards the user can access"""
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SearchPagination
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        if not search_terms(query):
+            raise ValidationError({"q": "Suchbegriff fehlt."})
+        board_ids = get_accessible_board_ids(request.user)
+        paginator = self.pagination_class()
+        hits = paginator.paginate_search(
+            lambda limit, offset: get_search_backend().search(query, board_ids, limit, offset), request,
+        )
+        return paginator.get_paginated_response(self.get_hit_data(hits))
+
+    def get_hit_data(self, hits):
+        """Adds the task title and the comment text, one query each"""
+        titles = dict(Task.objects.filter(pk__in={hit["task"] for hit in hits}).values_list("id", "title"))
+        comment_ids = [hit["id"] for hit in hits if hit["type"] == "comment"]
+        contents = dict(Comment.objects.filter(pk__in=comment_ids).values_list("id", "content")) if comment_ids else {}
+        data = []
+        for hit in hits:
+            item = {**hit, "title": titles.get(hit["task"])}
+            if hit["type"] == "comment":
+                item["content"] = contents.get(hit["id"])
+            data.append(item)
+        return data
+
+
+class TasksAssignedToMeView(TaskFeedQuerysetMixin, generics.ListAPIView):
     """Lists all tasks assigned to the current user"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = TaskSerializer
+    pagination_class = TaskFeedPagination
 
-    def get_queryset(self):
-        user = self.request.user
-        accessible_boards = Board.objects.filter(Q(owner=user) | Q(members=user)).distinct()
-        return (Task.objects.filter(board__in=accessible_boards, assignee=user).select_related("board", "assignee", "reviewer"))
+    def get_feed_filter(self, user):
+        return Q(assignee=user)
 
 
-class TasksReviewedByMeView(generics.ListAPIView):
+class TasksReviewedByMeView(TaskFeedQuerysetMixin, generics.ListAPIView):
     """Lists all tasks reviewed by the current user"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = TaskSerializer
+    pagination_class = TaskFeedPagination
 
-    def get_queryset(self):
-        user = self.request.user
-        accessible_boards = Board.objects.filter(Q(owner=user) | Q(members=user)).distinct()
-        return (Task.objects.filter(board__in=accessible_boards, reviewer=user).select_related("board", "assignee", "reviewer"))
+    def get_feed_filter(self, user):
+        return Q(reviewer=user)
 
 
-class TasksInvolvedView(generics.ListAPIView):
+class TasksInvolvedView(TaskFeedQuerysetMixin, generics.ListAPIView):
     """Lists all tasks the current user is involved in"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = TaskSerializer
+    pagination_class = TaskFeedPagination
 
-    def get_queryset(self):
-        user = self.request.user
-        accessible_boards = Board.objects.filter(Q(owner=user) | Q(members=user)).distinct()
-        return (
-            Task.objects.filter(board__in=accessible_boards).filter(Q(assignee=user) | Q(reviewer=user)).select_related("board", "assignee", "reviewer"))
+    def get_feed_filter(self, user):
+        return Q(assignee=user) | Q(reviewer=user)
 
 
 class TaskCreateView(generics.CreateAPIView):
@@ -115,15 +206,114 @@ class TaskCreateView(generics.CreateAPIView):
         serializer.save()
 
     def create(self, request, *args, **kwargs):
+        """Board is loaded once for validation, the response is rendered from the saved instance"""
         try:
+            context = self.get_serializer_context()
             board_id = request.data.get("board")
-            if board_id is not None and not Board.objects.filter(pk=board_id).exists():
-                return Response({"detail": "Board not found."}, status=status.HTTP_404_NOT_FOUND)
+            if board_id is not None:
+                board = Board.objects.filter(pk=board_id).first() if str(board_id).isdigit() else None
+                if board is None:
+                    return Response({"detail": "Board not found."}, status=status.HTTP_404_NOT_FOUND)
+                context["boards"] = {board.id: board}
 
-            response = super().create(request, *args, **kwargs)
+            serializer = TaskWriteSerializer(data=request.data, context=context)
+            serializer.is_valid(raise_exception=True)
+            self.perform_create(serializer)
+            return Response(TaskSerializer(serializer.instance).data, status=status.HTTP_201_CREATED)
+        except Exception as exc:
+            return exception_handler_status500(exc, context=None)
+
+
+class TaskBulkView(APIView):
+    """Creates (POST) or updates (PATCH) a batch of tasks in one transaction, all or nothing"""
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 500
 
-            task = Task.objects.get(pk=response.data["id"])
-            return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
+    def _get_items(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+            raise ValidationError({"detail": "Erwartet wird eine nicht leere Liste von Tasks."})
+        if len(items) > self.max_batch_size:
+            raise ValidationError({"detail": f"Maximal {self.max_batch_size} Tasks pro Anfrage."})
+        return items
+
+    def _to_int(self, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _load_boards(self, board_ids):
+        """Boards with owner and all member users for the whole batch, independent of its size"""
+        boards, board_users = load_board_users({board_id for board_id in board_ids if board_id is not None})
+        context = {"request": self.request, "view": self, "boards": boards, "board_users": board_users}
+        return board_users, context
+
+    def _validate(self, items, instances, board_users, context):
+        """Validates every item, returns the serializers of the valid ones and the errors per index"""
+        user_id = self.request.user.id
+        valid, errors = [], []
+        for index, (item, instance) in enumerate(zip(items, instances)):
+            if instance is None and self.request.method == "PATCH":
+                errors.append({"index": index, "errors": {"id": "Task nicht gefunden."}})
+                continue
+            board_ids = {self._to_int(item.get("board"))} if "board" in item else set()
+            if instance is not None:
+                board_ids.add(instance.board_id)
+            if any(board_id in board_users and user_id not in board_users[board_id] for board_id in board_ids):
+                errors.append({"index": index, "errors": {"detail": IsBoardOwnerOrMember.message}})
+                continue
+            serializer = TaskWriteSerializer(instance, data=item, partial=instance is not None, context=context)
+            if serializer.is_valid():
+                valid.append(serializer)
+            else:
+                errors.append({"index": index, "errors": serializer.errors})
+        return valid, errors
+
+    def post(self, request, *args, **kwargs):
+        try:
+            items = self._get_items(request)
+            board_users, context = self._load_boards(self._to_int(item.get("board")) for item in items)
+            valid, errors = self._validate(items, [None] * len(items), board_users, context)
+            if errors:
+                return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            tasks = [Task(**serializer.validated_data) for serializer in valid]
+            with transaction.atomic():
+                Task.objects.bulk_create(tasks)
+                record_bulk_task_changes(tasks)
+            return Response(TaskSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+        except Exception as exc:
+            return exception_handler_status500(exc, context=None)
+
+    def patch(self, request, *args, **kwargs):
+        try:
+            items = self._get_items(request)
+            task_ids = [self._to_int(item.get("id")) for item in items]
+            if None in task_ids or len(set(task_ids)) != len(task_ids):
+                raise ValidationError({"detail": "Jeder Eintrag braucht eine eindeutige id."})
+
+            tasks = Task.objects.select_related("assignee", "reviewer").in_bulk(task_ids)
+            instances = [tasks.get(task_id) for task_id in task_ids]
+            board_ids = [task.board_id for task in tasks.values()]
+            board_ids += [self._to_int(item.get("board")) for item in items if "board" in item]
+            board_users, context = self._load_boards(board_ids)
+            valid, errors = self._validate(items, instances, board_users, context)
+            if errors:
+                return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            fields = {"updated_at"}
+            now = timezone.now()
+            for serializer in valid:
+                serializer.instance.updated_at = now
+                for attr, value in serializer.validated_data.items():
+                    setattr(serializer.instance, attr, value)
+                    fields.add(attr)
+            updated = [serializer.instance for serializer in valid]
+            with transaction.atomic():
+                Task.objects.bulk_update(updated, sorted(fields))
+                record_bulk_task_changes(updated)
+            return Response(TaskSerializer(updated, many=True).data, status=status.HTTP_200_OK)
         except Exception as exc:
             return exception_handler_status500(exc, context=None)
 
@@ -133,6 +323,10 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Task.objects.all()
     permission_classes = [permissions.IsAuthenticated, IsBoardOwnerOrMember]
 
+    def get_queryset(self):
+        """Task, board, assignee, reviewer and access flag in one query"""
+        return with_board_access(super().get_queryset().select_related("board", "assignee", "reviewer"), self.request.user)
+
     def get_object(self):
         task = super().get_object()
         self.check_object_permissions(self.request, task)
@@ -143,18 +337,22 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
             return TaskWriteSerializer
         return TaskSerializer
 
+    def _save(self, data, partial):
+        """Validates against the already loaded board and saves; moving to another board needs access there too"""
+        instance = self.get_object()
+        context = self.get_serializer_context()
+        context["boards"] = {instance.board_id: instance.board}
+        write_serializer = TaskWriteSerializer(instance, data=data, partial=partial, context=context)
+        write_serializer.is_valid(raise_exception=True)
+        board = write_serializer.validated_data.get("board")
+        if board is not None and board.id != instance.board_id:
+            self.check_object_permissions(self.request, board)
+        return write_serializer.save()
+
     def patch(self, request, *args, **kwargs):
         """Sparse PATCH: only show send fields; assignee/reviewer shown as user object"""
         try:
-            instance = self.get_object()
-            write_serializer = TaskWriteSerializer(
-                instance,
-                data=request.data,
-                partial=True,
-                context=self.get_serializer_context(),
-            )
-            write_serializer.is_valid(raise_exception=True)
-            task = write_serializer.save()
+            task = self._save(request.data, partial=True)
 
             sent = set(request.data.keys())
             resp = {}
@@ -182,29 +380,26 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     def put(self, request, *args, **kwargs):
         """PUT stays as complete response"""
         try:
-            write_serializer = TaskWriteSerializer(
-                self.get_object(),
-                data=request.data,
-                context=self.get_serializer_context(),
-            )
-            write_serializer.is_valid(raise_exception=True)
-            task = write_serializer.save()
+            task = self._save(request.data, partial=False)
             return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
         except Exception as exc:
             return exception_handler_status500(exc, context=None)
 
 
-class CommentsListCreateView(generics.ListCreateAPIView):
-    """Lists or creates comments"""
+class CommentsListCreateView(TaskAccessMixin, SparseFieldsMixin, generics.ListCreateAPIView):
+    """Lists (keyset paginated, ?fields= / ?exclude=) or creates comments"""
     permission_classes = [permissions.IsAuthenticated, IsBoardOwnerOrMember]
-
-    def get_task(self):
-        return get_object_or_404(Task, pk=self.kwargs["task_id"])
+    pagination_class = CommentPagination
+    sparse_fields = ("id", "created_at", "author", "content")
 
     def get_queryset(self):
+        """Reads only the columns of the requested fields, joins the author only if needed"""
         task = self.get_task()
-        self.check_object_permissions(self.request, task)
-        return task.comments.select_related("author").order_by("created_at")
+        fields = self.get_sparse_fields()
+        columns = ["id", "task", "created_at"] + (["content"] if "content" in fields else [])
+        if "author" in fields:
+            return task.comments.select_related("author").only(*columns, "author", *CommentSerializer.AUTHOR_FIELDS)
+        return task.comments.only(*columns)
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -214,12 +409,13 @@ class CommentsListCreateView(generics.ListCreateAPIView):
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx["task"] = self.get_task()
+        if self.request.method == "GET":
+            ctx["fields"] = self.get_sparse_fields()
         return ctx
 
     def create(self, request, *args, **kwargs):
         try:
-            task = self.get_task()
-            self.check_object_permissions(request, task)
+            self.get_task()
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             obj = serializer.save()
@@ -228,14 +424,13 @@ class CommentsListCreateView(generics.ListCreateAPIView):
             return exception_handler_status500(exc, context=None)
 
 
-class CommentDeleteView(APIView):
+class CommentDeleteView(TaskAccessMixin, APIView):
     """Deletes a comment"""
     permission_classes = [permissions.IsAuthenticated, IsBoardOwnerOrMember]
 
     def delete(self, request, task_id: int, comment_id: int):
         try:
-            task = get_object_or_404(Task, pk=task_id)
-            self.check_object_permissions(request, task)
+            task = self.get_task()
 
             comment = Comment.objects.filter(pk=comment_id, task=task).first()
             if not comment:
@@ -250,4 +445,4 @@ class CommentDeleteView(APIView):
         except Task.DoesNotExist:
             return Response({"error": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
         except Exception as exc:
-            return exception_handler_status500(exc, context=None)
+            return exception_handler_status500(exc, context=None)
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Board change events for the SSE endpoint, published from signals and fanned out by a pluggable broker"""
+import asyncio
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Event:
+    """A single change on a board, serialized as one SSE message"""
+
+    def __init__(self, id, board_id, type, data):
+        self.id = id
+        self.board_id = board_id
+        self.type = type
+        self.data = data
+
+    def encode(self):
+        payload = json.dumps(self.data, separators=(",", ":"), default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class BaseBroker:
+    """Interface of a broker: publish() from any thread, subscribe() from the event loop"""
+
+    def publish(self, board_id, type, data):
+        raise NotImplementedError
+
+    def subscribe(self, board_id, last_event_id=None, heartbeat=15):
+        """Returns an async iterator of events for board_id, yielding None when `heartbeat` seconds pass without events"""
+        raise NotImplementedError
+
+
+class _Subscription:
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class InProcessBroker(BaseBroker):
+    """Single-process broker, keeps the last `buffer` events per board to replay Last-Event-ID"""
+
+    def __init__(self, buffer=200, queue_size=1000):
+        self.queue_size = queue_size
+        self._ids = itertools.count(1)
+        self._recent = defaultdict(lambda: deque(maxlen=buffer))
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, board_id, type, data):
+        with self._lock:
+            event = Event(next(self._ids), board_id, type, data)
+            self._recent[board_id].append(event)
+            subscriptions = list(self._subscriptions[board_id])
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+        return event
+
+    async def subscribe(self, board_id, last_event_id=None, heartbeat=15):
+        subscription = _Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            replay = [event for event in self._recent[board_id] if last_event_id is not None and event.id > last_event_id]
+            self._subscriptions[board_id].add(subscription)
+        try:
+            for event in replay:
+                yield event
+            while not subscription.overflowed:
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscriptions[board_id].discard(subscription)
+
+
+class SQLiteBroker(BaseBroker):
+    """File-backed broker for several worker processes on one node, subscribers poll the shared event table"""
+
+    def __init__(self, path, poll_interval=0.5, retention=3600):
+        self.path = str(path)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS board_events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, board_id INTEGER NOT NULL, "
+                "type TEXT NOT NULL, data TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS board_events_board_id ON board_events (board_id, id)")
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def publish(self, board_id, type, data):
+        connection = self._connect()
+        now = time.time()
+        cursor = connection.execute(
+            "INSERT INTO board_events (board_id, type, data, created) VALUES (?, ?, ?, ?)",
+            (board_id, type, json.dumps(data, default=str), now),
+        )
+        if cursor.lastrowid % 1000 == 0:
+            connection.execute("DELETE FROM board_events WHERE created < ?", (now - self.retention,))
+        return Event(cursor.lastrowid, board_id, type, data)
+
+    def _fetch(self, board_id, after_id):
+        rows = self._connect().execute(
+            "SELECT id, type, data FROM board_events WHERE board_id = ? AND id > ? ORDER BY id LIMIT 500",
+            (board_id, after_id),
+        ).fetchall()
+        return [Event(row[0], board_id, row[1], json.loads(row[2])) for row in rows]
+
+    def _latest_id(self):
+        return self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM board_events").fetchone()[0]
+
+    async def subscribe(self, board_id, last_event_id=None, heartbeat=15):
+        after_id = last_event_id if last_event_id is not None else await asyncio.to_thread(self._latest_id)
+        idle_since = time.monotonic()
+        while True:
+            events = await asyncio.to_thread(self._fetch, board_id, after_id)
+            for event in events:
+                after_id = event.id
+                yield event
+            if events:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= heartbeat:
+                idle_since = time.monotonic()
+                yield None
+            await asyncio.sleep(self.poll_interval)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Broker configured in settings.KANMIND_EVENTS, created once per process"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = settings.KANMIND_EVENTS
+                _broker = import_string(config["BROKER"])(**config.get("OPTIONS", {}))
+    return _broker
+
+
+def _publish(board_id, type, data):
+    broker = get_broker()
+    try:
+        broker.publish(board_id, type, data)
+    except Exception:
+        logger.exception("Publishing %s for board %s failed", type, board_id)
+
+
+def publish_on_commit(board_id, type, data):
+    """Publishes once the surrounding transaction is committed, so clients never see rolled back changes;
+    a failing broker only costs the event, never the request or the other on_commit callbacks"""
+    if board_id is not None:
+        transaction.on_commit(lambda: _publish(board_id, type, data), robust=True)
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from kanban_app.models import Tombstone
+
+
+class Command(BaseCommand):
+    """Deletes tombstones no valid delta sync token can ask for anymore"""
+    help = "Deletes tombstones older than BOARD_SYNC_RETENTION."
+
+    def handle(self, *args, **options):
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - settings.BOARD_SYNC_RETENTION).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} Tombstones gelöscht."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from kanban_app.models import BoardStats
+
+
+class Command(BaseCommand):
+    """Rebuilds the materialized BoardStats table from scratch"""
+    help = "Recomputes BoardStats from tasks, comments and board members."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--board", type=int, action="append", dest="boards", help="Only rebuild the given board id (repeatable).")
+
+    def handle(self, *args, **options):
+        rebuilt = BoardStats.rebuild(options["boards"])
+        self.stdout.write(self.style.SUCCESS(f"BoardStats für {rebuilt} Boards neu berechnet."))
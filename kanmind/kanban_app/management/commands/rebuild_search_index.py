@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from kanban_app.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """Rebuilds the full-text search index, e.g. after loaddata or bulk imports that bypass the signals"""
+    help = "Rebuilds the search index over task titles, descriptions and comments."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = get_search_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Suchindex mit {indexed} Einträgen neu aufgebaut."))
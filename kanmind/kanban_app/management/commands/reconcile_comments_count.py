@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from kanban_app.models import Task
+
+
+class Command(BaseCommand):
+    """Repairs drift of the stored Task.comments_count"""
+    help = "Recomputes Task.comments_count where it differs from the actual number of comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--task", type=int, action="append", dest="tasks", help="Only check the given task id (repeatable).")
+
+    def handle(self, *args, **options):
+        repaired = Task.reconcile_comments_count(options["tasks"])
+        if repaired:
+            self.stdout.write(self.style.WARNING(f"comments_count für {len(repaired)} Tasks korrigiert: {', '.join(map(str, repaired))}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Alle comments_count-Werte stimmen."))
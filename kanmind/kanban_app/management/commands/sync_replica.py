@@ -0,0 +1,28 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from core.db_routing import copy_sqlite_database
+
+
+class Command(BaseCommand):
+    """Stand-in replication for a local SQLite replica: copies the primary file to the replica file"""
+    help = "Copies the primary SQLite database to REPLICA_DATABASE, once or every --interval seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, help="Keep copying every N seconds until interrupted.")
+
+    def handle(self, *args, **options):
+        alias = settings.REPLICA_DATABASE
+        if alias is None:
+            raise CommandError("Keine Replica konfiguriert (KANMIND_REPLICA_DB).")
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError("sync_replica kopiert nur SQLite-Dateien, andere Datenbanken replizieren selbst.")
+        while True:
+            started = time.perf_counter()
+            copy_sqlite_database(primary.settings_dict["NAME"], replica.settings_dict["NAME"])
+            self.stdout.write(self.style.SUCCESS(f"Replica aktualisiert in {(time.perf_counter() - started) * 1000:.0f} ms."))
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,114 @@
+"""Board access resolution: cached board ids per user and a single-query access annotation"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+from core.db_routing import use_primary
+from kanban_app.models import Board
+
+CACHE_KEY = "kanmind:board-access:{user_id}"
+
+
+def _cache_key(user_id):
+    return CACHE_KEY.format(user_id=user_id)
+
+
+def get_accessible_board_ids(user):
+    """Returns a frozenset of board ids, cached per user for BOARD_ACCESS_CACHE_TTL seconds (read from the primary)"""
+    key = _cache_key(user.id)
+    board_ids = cache.get(key)
+    if board_ids is None:
+        with use_primary():
+            board_ids = frozenset(
+                Board.objects.filter(Q(owner=user) | Q(members=user)).values_list("id", flat=True).distinct()
+            )
+        cache.set(key, board_ids, settings.BOARD_ACCESS_CACHE_TTL)
+    return board_ids
+
+
+async def aget_accessible_board_ids(user):
+    """Async counterpart of get_accessible_board_ids sharing the same cache entries"""
+    key = _cache_key(user.id)
+    board_ids = await cache.aget(key)
+    if board_ids is None:
+        with use_primary():
+            board_ids = frozenset([
+                board_id async for board_id in
+                Board.objects.filter(Q(owner=user) | Q(members=user)).values_list("id", flat=True).distinct()
+            ])
+        await cache.aset(key, board_ids, settings.BOARD_ACCESS_CACHE_TTL)
+    return board_ids
+
+
+def can_access_board(user, board_id):
+    """Checks owner/member access without touching the database on a warm cache"""
+    return board_id in get_accessible_board_ids(user)
+
+
+def get_board_id(obj):
+    """Resolves the board id of a board, task, comment or any object with a board FK, None if unknown"""
+    if isinstance(obj, Board):
+        return obj.pk
+    if hasattr(obj, "board_id"):
+        return obj.board_id
+    if hasattr(obj, "task"):
+        return getattr(obj.task, "board_id", None)
+    return None
+
+
+async def acan_access_board(user, board_id):
+    return board_id in await aget_accessible_board_ids(user)
+
+
+def invalidate_board_access(user_ids):
+    """Drops the cached board ids of the given users; deleted again after commit, so a request racing the
+    transaction cannot cache the old ids until BOARD_ACCESS_CACHE_TTL runs out"""
+    keys = [_cache_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def with_board_access(queryset, user, board_path="board"):
+    """Annotates has_board_access (owner or member of the board behind board_path) in the same query"""
+    is_member = Exists(Board.members.through.objects.filter(board_id=OuterRef(board_path), user_id=user.id))
+    return queryset.annotate(
+        has_board_access=ExpressionWrapper(Q(**{f"{board_path}__owner_id": user.id}) | Q(is_member), output_field=BooleanField())
+    )
+
+
+def resolve_board_access(user, obj):
+    """Uses a has_board_access annotation if present, otherwise the cached board ids; None if obj has no board"""
+    annotated = getattr(obj, "has_board_access", None)
+    if annotated is not None:
+        return bool(annotated)
+    board_id = get_board_id(obj)
+    if board_id is None:
+        return None
+    return can_access_board(user, board_id)
+
+
+async def aresolve_board_access(user, obj):
+    """Async counterpart of resolve_board_access, obj must not need lazy loading to find its board"""
+    annotated = getattr(obj, "has_board_access", None)
+    if annotated is not None:
+        return bool(annotated)
+    board_id = get_board_id(obj)
+    if board_id is None:
+        return None
+    return await acan_access_board(user, board_id)
+
+
+def load_board_users(board_ids):
+    """Boards (with owner) and {board_id: {user_id: User}} of their owners and members, in two queries"""
+    boards = {board.id: board for board in Board.objects.select_related("owner").filter(pk__in=board_ids)}
+    users = {board_id: {board.owner_id: board.owner} for board_id, board in boards.items()}
+    for membership in Board.members.through.objects.filter(board_id__in=boards).select_related("user"):
+        users[membership.board_id][membership.user_id] = membership.user
+    return boards, users
+
+
+def load_member_users(board):
+    """{user_id: User} of the owner and members of an already loaded board, in one query"""
+    return {user.id: user for user in User.objects.filter(Q(pk=board.owner_id) | Q(member_boards=board))}
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+STATUS_FIELDS = {"to-do": "tasks_to_do_count", "in-progress": "tasks_in_progress_count", "review": "tasks_review_count", "done": "tasks_done_count"}
+PRIORITY_FIELDS = {"low": "tasks_low_prio_count", "medium": "tasks_medium_prio_count", "high": "tasks_high_prio_count"}
+
+
+def populate_board_stats(apps, schema_editor):
+    """Fills BoardStats for boards created before the table existed"""
+    Board = apps.get_model("kanban_app", "Board")
+    Task = apps.get_model("kanban_app", "Task")
+    Comment = apps.get_model("kanban_app", "Comment")
+    BoardStats = apps.get_model("kanban_app", "BoardStats")
+
+    task_counts = {"ticket_count": Count("id")}
+    task_counts.update({field: Count("id", filter=Q(status=value)) for value, field in STATUS_FIELDS.items()})
+    task_counts.update({field: Count("id", filter=Q(priority=value)) for value, field in PRIORITY_FIELDS.items()})
+    tasks = {row.pop("board_id"): row for row in Task.objects.order_by().values("board_id").annotate(**task_counts)}
+    members = dict(Board.members.through.objects.order_by().values("board_id").annotate(total=Count("id")).values_list("board_id", "total"))
+    comments = dict(Comment.objects.order_by().values("task__board_id").annotate(total=Count("id")).values_list("task__board_id", "total"))
+
+    BoardStats.objects.bulk_create(
+        [
+            BoardStats(board_id=board_id, member_count=members.get(board_id, 0), comment_count=comments.get(board_id, 0), **tasks.get(board_id, {}))
+            for board_id in Board.objects.values_list("id", flat=True)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0003_delete_registrationusermodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardStats',
+            fields=[
+                ('board', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='kanban_app.board')),
+                ('ticket_count', models.IntegerField(default=0)),
+                ('tasks_to_do_count', models.IntegerField(default=0)),
+                ('tasks_in_progress_count', models.IntegerField(default=0)),
+                ('tasks_review_count', models.IntegerField(default=0)),
+                ('tasks_done_count', models.IntegerField(default=0)),
+                ('tasks_low_prio_count', models.IntegerField(default=0)),
+                ('tasks_medium_prio_count', models.IntegerField(default=0)),
+                ('tasks_high_prio_count', models.IntegerField(default=0)),
+                ('member_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_board_stats, migrations.RunPython.noop),
+    ]
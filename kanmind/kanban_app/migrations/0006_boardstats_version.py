@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0005_task_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boardstats',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1),
+        ),
+    ]
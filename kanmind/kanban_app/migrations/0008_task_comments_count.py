@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:34
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_comments_count(apps, schema_editor):
+    """Counts the comments of tasks created before the column existed"""
+    Task = apps.get_model("kanban_app", "Task")
+    Comment = apps.get_model("kanban_app", "Comment")
+    comments = Comment.objects.filter(task=OuterRef("pk")).order_by().values("task").annotate(total=Count("id")).values("total")
+    Task.objects.update(comments_count=Coalesce(Subquery(comments, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0007_comment_task_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_comments_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+TASK_VECTOR = "(setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', description), 'B'))"
+COMMENT_VECTOR = "(to_tsvector('simple', content))"
+
+
+def create_search_index(apps, schema_editor):
+    """FTS5 table filled from the existing rows on SQLite, GIN expression indexes on PostgreSQL, nothing elsewhere"""
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE kanban_search USING fts5(title, body, board, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO kanban_search (rowid, title, body, board) SELECT id * 2, title, description, 'b' || board_id FROM kanban_app_task"
+        )
+        schema_editor.execute(
+            "INSERT INTO kanban_search (rowid, title, body, board) SELECT c.id * 2 + 1, '', c.content, 'b' || t.board_id "
+            "FROM kanban_app_comment c JOIN kanban_app_task t ON t.id = c.task_id"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(f"CREATE INDEX task_search_idx ON kanban_app_task USING GIN ({TASK_VECTOR})")
+        schema_editor.execute(f"CREATE INDEX comment_search_idx ON kanban_app_comment USING GIN ({COMMENT_VECTOR})")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS kanban_search")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS task_search_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS comment_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0009_delta_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
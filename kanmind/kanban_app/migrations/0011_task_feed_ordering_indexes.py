@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0010_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'due_date', 'id'], name='task_assignee_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['reviewer', 'due_date', 'id'], name='task_reviewer_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'updated_at', 'id'], name='task_assignee_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['reviewer', 'updated_at', 'id'], name='task_reviewer_updated_idx'),
+        ),
+    ]
@@ -1,5 +1,56 @@
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+class CascadeDeletion:
+    """Boards and tasks being deleted (filled by the pre_delete signals) and what their cascaded comments left behind
+
+    Per-row signal work for comments and tasks whose parent goes away in the same delete is skipped and done
+    once for the parent instead, see kanban_app.signals.
+    """
+
+    def __init__(self):
+        self.boards = set()
+        """task id -> board id"""
+        self.tasks = {}
+        """task id -> ids of its comments deleted with it"""
+        self.comment_ids = defaultdict(set)
+
+
+_cascade_deletion = contextvars.ContextVar("kanban_cascade_deletion", default=None)
+
+
+@contextmanager
+def cascade_deletion():
+    """Scope of one delete() call; nested deletes share the outer scope"""
+    state = _cascade_deletion.get()
+    if state is not None:
+        yield state
+        return
+    token = _cascade_deletion.set(CascadeDeletion())
+    try:
+        yield _cascade_deletion.get()
+    finally:
+        _cascade_deletion.reset(token)
+
+
+def get_cascade_deletion():
+    return _cascade_deletion.get()
+
+
+class CascadeDeletionQuerySet(models.QuerySet):
+    def delete(self):
+        with cascade_deletion():
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class Board(models.Model):
@@ -8,9 +59,24 @@ class Board(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="owned_boards")
     members = models.ManyToManyField(User, related_name="member_boards", blank=True)
 
+    objects = CascadeDeletionQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    def delete(self, *args, **kwargs):
+        with cascade_deletion():
+            return super().delete(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remembers the loaded owner, so an owner change can invalidate cached board access"""
+        instance = super().from_db(db, field_names, values)
+        owner_id = dict(zip(field_names, values)).get("owner_id", models.DEFERRED)
+        if owner_id is not models.DEFERRED:
+            instance._loaded_owner_id = owner_id
+        return instance
+
 
 class Task(models.Model):
     """Model for task with predefined choices"""
@@ -25,9 +91,67 @@ class Task(models.Model):
     assignee = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="assigned_tasks")
     reviewer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="review_tasks")
     due_date = models.DateField(null=True, blank=True)
+    """Maintained by kanban_app.signals, never written by save()"""
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    """Also touched when one of its comments changes, see kanban_app.sync"""
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CascadeDeletionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["board", "updated_at"], name="task_board_updated_idx"),
+            models.Index(fields=["board", "status"], name="task_board_status_idx"),
+            models.Index(fields=["board", "priority"], name="task_board_priority_idx"),
+            models.Index(fields=["assignee", "board"], name="task_assignee_board_idx"),
+            models.Index(fields=["reviewer", "board"], name="task_reviewer_board_idx"),
+            models.Index(fields=["assignee", "due_date", "id"], name="task_assignee_due_idx"),
+            models.Index(fields=["reviewer", "due_date", "id"], name="task_reviewer_due_idx"),
+            models.Index(fields=["assignee", "updated_at", "id"], name="task_assignee_updated_idx"),
+            models.Index(fields=["reviewer", "updated_at", "id"], name="task_reviewer_updated_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+    def delete(self, *args, **kwargs):
+        with cascade_deletion():
+            return super().delete(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remembers the loaded board/status/priority and text, so BoardStats and the search index skip unchanged rows"""
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if all(loaded.get(name, models.DEFERRED) is not models.DEFERRED for name in ("board_id", "status", "priority")):
+            instance._stats_snapshot = (loaded["board_id"], loaded["status"], loaded["priority"])
+        if all(loaded.get(name, models.DEFERRED) is not models.DEFERRED for name in ("title", "description", "board_id")):
+            instance._search_snapshot = (loaded["title"], loaded["description"], loaded["board_id"])
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Signals keeping BoardStats up to date run inside the same transaction"""
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            """A stale comments_count in memory must not overwrite concurrent increments"""
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields if not field.primary_key and field.name != "comments_count"
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def reconcile_comments_count(cls, task_ids=None):
+        """Rewrites comments_count where it drifted from the real comment count, returns the repaired task ids"""
+        actual = Coalesce(Subquery(
+            Comment.objects.filter(task=OuterRef("pk")).order_by().values("task").annotate(total=Count("id")).values("total"),
+            output_field=IntegerField(),
+        ), 0)
+        tasks = cls.objects.all() if task_ids is None else cls.objects.filter(pk__in=task_ids)
+        drifted = list(tasks.annotate(actual=actual).exclude(comments_count=F("actual")).values_list("id", flat=True))
+        """Chunked, a bulk import can leave more ids than the database accepts as parameters"""
+        for start in range(0, len(drifted), 10_000):
+            cls.objects.filter(pk__in=drifted[start:start + 10_000]).update(comments_count=actual)
+        return drifted
     
     
 class Comment(models.Model):
@@ -36,6 +160,109 @@ class Comment(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.CharField(max_length=600)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["task", "created_at", "id"], name="comment_task_created_id_idx"),
+            models.Index(fields=["task", "updated_at"], name="comment_task_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author.username} on {self.task.title}"
+
+    def save(self, *args, **kwargs):
+        """Signals keeping BoardStats up to date run inside the same transaction"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class BoardStats(models.Model):
+    """Materialized statistics per board, maintained by kanban_app.signals"""
+    STATUS_FIELDS = {
+        "to-do": "tasks_to_do_count",
+        "in-progress": "tasks_in_progress_count",
+        "review": "tasks_review_count",
+        "done": "tasks_done_count",
+    }
+    PRIORITY_FIELDS = {
+        "low": "tasks_low_prio_count",
+        "medium": "tasks_medium_prio_count",
+        "high": "tasks_high_prio_count",
+    }
+
+    board = models.OneToOneField(Board, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    ticket_count = models.IntegerField(default=0)
+    tasks_to_do_count = models.IntegerField(default=0)
+    tasks_in_progress_count = models.IntegerField(default=0)
+    tasks_review_count = models.IntegerField(default=0)
+    tasks_done_count = models.IntegerField(default=0)
+    tasks_low_prio_count = models.IntegerField(default=0)
+    tasks_medium_prio_count = models.IntegerField(default=0)
+    tasks_high_prio_count = models.IntegerField(default=0)
+    member_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=1)
+    members_updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Stats for {self.board_id}"
+
+    @classmethod
+    def rebuild(cls, board_ids=None):
+        """Recomputes stats from Task, Comment and Board.members, returns number of rebuilt boards"""
+        boards = Board.objects.all()
+        if board_ids is not None:
+            boards = boards.filter(pk__in=board_ids)
+        board_ids = list(boards.values_list("id", flat=True))
+
+        task_counts = {"ticket_count": Count("id")}
+        for value, field in cls.STATUS_FIELDS.items():
+            task_counts[field] = Count("id", filter=Q(status=value))
+        for value, field in cls.PRIORITY_FIELDS.items():
+            task_counts[field] = Count("id", filter=Q(priority=value))
+        tasks = {
+            row.pop("board_id"): row
+            for row in Task.objects.filter(board_id__in=board_ids).order_by().values("board_id").annotate(**task_counts)
+        }
+        members = dict(
+            Board.members.through.objects.filter(board_id__in=board_ids).order_by()
+            .values("board_id").annotate(total=Count("id")).values_list("board_id", "total")
+        )
+        comments = dict(
+            Comment.objects.filter(task__board_id__in=board_ids).order_by()
+            .values("task__board_id").annotate(total=Count("id")).values_list("task__board_id", "total")
+        )
+
+        stats = [
+            cls(
+                board_id=board_id,
+                member_count=members.get(board_id, 0),
+                comment_count=comments.get(board_id, 0),
+                **tasks.get(board_id, {}),
+            )
+            for board_id in board_ids
+        ]
+        """Upsert keeps the version counter and sync timestamp of existing rows"""
+        update_fields = [field.name for field in cls._meta.concrete_fields if field.name not in ("board", "version", "members_updated_at")]
+        cls.objects.bulk_create(stats, batch_size=500, update_conflicts=True, unique_fields=["board"], update_fields=update_fields)
+        return len(stats)
+
+
+class Tombstone(models.Model):
+    """Task or comment removed from a board, kept for the delta sync until BOARD_SYNC_RETENTION has passed"""
+    KIND_CHOICES = [("task", "Task"), ("comment", "Comment")]
+
+    """No FK constraint: tombstones written while a board is deleted must not block its deletion"""
+    board = models.ForeignKey(Board, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["board", "deleted_at"], name="tombstone_board_deleted_idx"),
+        ]
 
     def __str__(self):
-        return f"Comment by {self.author.username} on {self.task.title}"
\ No newline at end of file
+        return f"{self.kind} {self.object_id} removed from board {self.board_id}"
@@ -0,0 +1,191 @@
+"""Full-text search over task titles, descriptions and comments, backed by the database's native full-text index
+
+SQLite keeps an FTS5 table (kanban_search) in sync from the signals; PostgreSQL searches GIN expression indexes
+it maintains itself; other databases fall back to an unranked icontains scan.
+"""
+import re
+from django.db import connection
+from django.db.models import Q
+from kanban_app.models import Comment, Task
+
+FTS_TABLE = "kanban_search"
+TERM = re.compile(r"\w+", re.UNICODE)
+
+"""FTS5 rowids encode the source row: task id * 2 or comment id * 2 + 1"""
+KIND_OFFSETS = {"task": 0, "comment": 1}
+
+
+def search_terms(query):
+    """Words of a user query, operators and quotes are dropped so any input is a valid search"""
+    return TERM.findall(query.lower())
+
+
+class BaseSearchBackend:
+    """Interface of a search backend; hits are dicts with type, id, task, board and rank (higher is better)"""
+
+    def index_tasks(self, tasks):
+        pass
+
+    def index_comments(self, comments, board_id):
+        pass
+
+    def remove(self, kind, ids):
+        pass
+
+    def rebuild(self):
+        """Rebuilds the index from the tables, returns the number of indexed rows"""
+        return 0
+
+    def search(self, query, board_ids, limit, offset=0):
+        raise NotImplementedError
+
+
+class FTS5SearchBackend(BaseSearchBackend):
+    """SQLite FTS5 table (title, body, board), bm25 ranking with titles weighted higher
+
+    The board column holds a token like "b42", so the access filter is a posting list intersection inside
+    FTS5 instead of a join per match; a moved task re-indexes its comments under the new board.
+    """
+    TITLE_WEIGHT = 10.0
+
+    def _write(self, rows):
+        """rows are (rowid, title, body, board_id); OR REPLACE swaps the entry of an already indexed row"""
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, body, board) VALUES (%s, %s, %s, 'b' || %s)", rows,
+            )
+
+    def index_tasks(self, tasks):
+        self._write([(task.pk * 2, task.title, task.description, task.board_id) for task in tasks])
+
+    def index_comments(self, comments, board_id):
+        self._write([(comment.pk * 2 + 1, "", comment.content, board_id) for comment in comments])
+
+    def remove(self, kind, ids):
+        rowids = [object_id * 2 + KIND_OFFSETS[kind] for object_id in ids]
+        with connection.cursor() as cursor:
+            for start in range(0, len(rowids), 500):
+                chunk = rowids[start:start + 500]
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})", chunk)
+
+    def rebuild(self):
+        task_table, comment_table = Task._meta.db_table, Comment._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body, board) "
+                f"SELECT id * 2, title, description, 'b' || board_id FROM {task_table}"
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body, board) "
+                f"SELECT c.id * 2 + 1, '', c.content, 'b' || t.board_id FROM {comment_table} c JOIN {task_table} t ON t.id = c.task_id"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+            return cursor.fetchone()[0]
+
+    def match_expression(self, query, board_ids):
+        """Every word must occur in title or body, the last one also as prefix (search while typing)"""
+        terms = [f'"{term}"' for term in search_terms(query)]
+        if not terms or not board_ids:
+            return ""
+        terms[-1] += "*"
+        boards = " OR ".join(f"b{int(board_id)}" for board_id in board_ids)
+        return f"{{title body}} : ({' '.join(terms)}) AND board : ({boards})"
+
+    def search(self, query, board_ids, limit, offset=0):
+        match = self.match_expression(query, board_ids)
+        if not match:
+            return []
+        task_table, comment_table = Task._meta.db_table, Comment._meta.db_table
+        """Only the page of hits is joined to find task and board"""
+        sql = f"""
+            SELECT hits.rowid, COALESCE(t.id, c.task_id), COALESCE(t.board_id, ct.board_id), hits.score
+            FROM (
+                SELECT rowid, bm25({FTS_TABLE}, %s, 1.0, 0.0) AS score FROM {FTS_TABLE}
+                WHERE {FTS_TABLE} MATCH %s ORDER BY score, rowid LIMIT %s OFFSET %s
+            ) hits
+            LEFT JOIN {task_table} t ON hits.rowid %% 2 = 0 AND t.id = hits.rowid / 2
+            LEFT JOIN {comment_table} c ON hits.rowid %% 2 = 1 AND c.id = hits.rowid / 2
+            LEFT JOIN {task_table} ct ON ct.id = c.task_id
+            ORDER BY hits.score, hits.rowid
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.TITLE_WEIGHT, match, limit, offset])
+            rows = cursor.fetchall()
+        """bm25 is lower for better matches, the API reports higher-is-better"""
+        return [
+            {"type": "comment" if rowid % 2 else "task", "id": rowid // 2, "task": task_id, "board": board_id, "rank": -score}
+            for rowid, task_id, board_id, score in rows
+        ]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """tsvector expressions matching the GIN indexes of migration 0010, so PostgreSQL keeps them up to date"""
+    TASK_VECTOR = "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', description), 'B')"
+    COMMENT_VECTOR = "to_tsvector('simple', content)"
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute("REINDEX INDEX task_search_idx")
+            cursor.execute("REINDEX INDEX comment_search_idx")
+        return Task.objects.count() + Comment.objects.count()
+
+    def search(self, query, board_ids, limit, offset=0):
+        board_ids = list(board_ids)
+        terms = search_terms(query)
+        if not board_ids or not terms:
+            return []
+        tsquery = " & ".join(terms) + ":*"
+        task_table, comment_table = Task._meta.db_table, Comment._meta.db_table
+        sql = f"""
+            SELECT type, id, task_id, board_id, rank FROM (
+                SELECT 'task' AS type, t.id, t.id AS task_id, t.board_id, ts_rank({self.TASK_VECTOR}, q) AS rank
+                FROM {task_table} t, to_tsquery('simple', %s) q
+                WHERE {self.TASK_VECTOR} @@ q AND t.board_id = ANY(%s)
+                UNION ALL
+                SELECT 'comment', c.id, c.task_id, t.board_id, ts_rank({self.COMMENT_VECTOR}, q) * 0.4
+                FROM {comment_table} c JOIN {task_table} t ON t.id = c.task_id, to_tsquery('simple', %s) q
+                WHERE {self.COMMENT_VECTOR} @@ q AND t.board_id = ANY(%s)
+            ) hits ORDER BY rank DESC, type DESC, id LIMIT %s OFFSET %s
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [tsquery, board_ids, tsquery, board_ids, limit, offset])
+            rows = cursor.fetchall()
+        return [
+            {"type": type, "id": object_id, "task": task_id, "board": board_id, "rank": rank}
+            for type, object_id, task_id, board_id, rank in rows
+        ]
+
+
+class ScanSearchBackend(BaseSearchBackend):
+    """Unranked icontains scan for databases without a supported full-text index"""
+
+    def search(self, query, board_ids, limit, offset=0):
+        terms = search_terms(query)
+        if not terms:
+            return []
+        tasks = Task.objects.filter(board_id__in=board_ids)
+        comments = Comment.objects.filter(task__board_id__in=board_ids)
+        for term in terms:
+            tasks = tasks.filter(Q(title__icontains=term) | Q(description__icontains=term))
+            comments = comments.filter(content__icontains=term)
+        hits = [
+            {"type": "task", "id": row["id"], "task": row["id"], "board": row["board_id"], "rank": None}
+            for row in tasks.order_by("id").values("id", "board_id")[:offset + limit]
+        ] + [
+            {"type": "comment", "id": row["id"], "task": row["task_id"], "board": row["task__board_id"], "rank": None}
+            for row in comments.order_by("id").values("id", "task_id", "task__board_id")[:offset + limit]
+        ]
+        return hits[offset:offset + limit]
+
+
+def get_search_backend():
+    """Backend for the vendor of the default database"""
+    if connection.vendor == "sqlite":
+        return FTS5SearchBackend()
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    return ScanSearchBackend()
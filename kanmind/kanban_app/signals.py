@@ -0,0 +1,450 @@
+"""Keeps BoardStats (incl. the board version, also bumped by user renames), Task.comments_count, the delta sync timestamps and tombstones, the search index, the cached board access and the board event stream in sync with Task, Comment, Board and Board.members changes"""
+from collections import Counter, defaultdict
+from django.contrib.auth.models import User
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from kanban_app.events import publish_on_commit
+from kanban_app.membership import invalidate_board_access
+from kanban_app.models import Board, BoardStats, Comment, Task, Tombstone, get_cascade_deletion
+from kanban_app.search import get_search_backend
+from kanban_app.versioning import invalidate_board_versions
+
+
+def _task_fields(status, priority):
+    fields = ["ticket_count"]
+    for field in (BoardStats.STATUS_FIELDS.get(status), BoardStats.PRIORITY_FIELDS.get(priority)):
+        if field:
+            fields.append(field)
+    return fields
+
+
+def _apply_deltas(deltas):
+    """Writes {board_id: Counter(field=delta)} with one F-expression UPDATE per board, bumping its version"""
+    for board_id, counter in deltas.items():
+        changes = {field: F(field) + delta for field, delta in counter.items() if delta}
+        BoardStats.objects.filter(board_id=board_id).update(version=F("version") + 1, **changes)
+    invalidate_board_versions(deltas.keys())
+
+
+def _add_task_deltas(deltas, previous, current):
+    """Adds the counter changes of a task moving from snapshot previous (None if new) to current"""
+    deltas.setdefault(current[0], Counter())
+    if previous != current:
+        for field in _task_fields(current[1], current[2]):
+            deltas[current[0]][field] += 1
+        if previous is not None:
+            for field in _task_fields(previous[1], previous[2]):
+                deltas[previous[0]][field] -= 1
+
+
+def _bump_versions(board_ids):
+    """New ETags for boards whose detail changed without a stats change, in one UPDATE"""
+    if board_ids:
+        BoardStats.objects.filter(board_id__in=board_ids).update(version=F("version") + 1)
+        invalidate_board_versions(board_ids)
+
+
+def _refresh_member_counts(board_ids):
+    member_count = (
+        Board.members.through.objects.filter(board_id=OuterRef("board_id"))
+        .order_by().values("board_id").annotate(total=Count("id")).values("total")
+    )
+    BoardStats.objects.filter(board_id__in=board_ids).update(
+        member_count=Coalesce(Subquery(member_count), 0), version=F("version") + 1, members_updated_at=timezone.now(),
+    )
+    invalidate_board_versions(board_ids)
+
+
+def _comment_board_id(comment):
+    """Board of a comment, looked up at most once per instance"""
+    if not hasattr(comment, "_board_id"):
+        if Comment.task.is_cached(comment):
+            comment._board_id = comment.task.board_id
+        else:
+            comment._board_id = Task.objects.filter(pk=comment.task_id).values_list("board_id", flat=True).first()
+    return comment._board_id
+
+
+def _deleted_with_board(task):
+    """True for a task removed by the deletion of its board, whose post_delete does the work once"""
+    state = get_cascade_deletion()
+    return state is not None and task.board_id in state.boards
+
+
+def _deleted_with_task(comment):
+    """True for a comment removed by the deletion of its task; remembers it for the task's post_delete"""
+    state = get_cascade_deletion()
+    if state is None or comment.task_id not in state.tasks:
+        return False
+    state.comment_ids[comment.task_id].add(comment.pk)
+    return True
+
+
+def _cascaded_comment_ids(task_id):
+    state = get_cascade_deletion()
+    return state.comment_ids.get(task_id, set()) if state is not None else set()
+
+
+@receiver(pre_delete, sender=Board)
+def remember_deleted_board(sender, instance, **kwargs):
+    state = get_cascade_deletion()
+    if state is not None:
+        state.boards.add(instance.pk)
+
+
+@receiver(pre_delete, sender=Task)
+def remember_deleted_task(sender, instance, **kwargs):
+    state = get_cascade_deletion()
+    if state is not None:
+        state.tasks[instance.pk] = instance.board_id
+
+
+@receiver(post_save, sender=Board)
+def create_board_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        BoardStats.objects.get_or_create(board=instance)
+    else:
+        _apply_deltas({instance.pk: Counter()})
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_state(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._stats_previous = None
+        return
+    snapshot = getattr(instance, "_stats_snapshot", None)
+    if snapshot is None:
+        snapshot = Task.objects.filter(pk=instance.pk).values_list("board_id", "status", "priority").first()
+    instance._stats_previous = snapshot
+
+
+@receiver(post_save, sender=Task)
+def update_stats_on_task_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.board_id, instance.status, instance.priority)
+    previous = getattr(instance, "_stats_previous", None)
+    instance._stats_snapshot = current
+
+    deltas = defaultdict(Counter)
+    _add_task_deltas(deltas, previous, current)
+    _apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_on_task_delete(sender, instance, **kwargs):
+    """Also takes off the comments deleted with the task; nothing to count when the board goes too"""
+    if _deleted_with_board(instance):
+        return
+    deltas = defaultdict(Counter)
+    for field in _task_fields(instance.status, instance.priority):
+        deltas[instance.board_id][field] -= 1
+    deltas[instance.board_id]["comment_count"] -= len(_cascaded_comment_ids(instance.pk))
+    _apply_deltas(deltas)
+
+
+@receiver(post_save, sender=Comment)
+def update_stats_on_comment_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        _apply_deltas({_comment_board_id(instance): Counter(comment_count=1 if created else 0)})
+
+
+@receiver(post_delete, sender=Comment)
+def update_stats_on_comment_delete(sender, instance, **kwargs):
+    if _deleted_with_task(instance):
+        return
+    _apply_deltas({_comment_board_id(instance): Counter(comment_count=-1)})
+
+
+@receiver(post_save, sender=Comment)
+def update_task_on_comment_save(sender, instance, created, raw=False, **kwargs):
+    """Counts new comments and touches the task, so the delta sync finds changed comments via their task"""
+    if raw:
+        return
+    changes = {"updated_at": timezone.now()}
+    if created:
+        changes["comments_count"] = F("comments_count") + 1
+    Task.objects.filter(pk=instance.task_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def update_task_on_comment_delete(sender, instance, **kwargs):
+    """Also runs for comments removed by an author cascade; the tombstone of a deleted task covers its comments"""
+    if _deleted_with_task(instance):
+        return
+    Task.objects.filter(pk=instance.task_id).update(
+        comments_count=Greatest(F("comments_count") - 1, 0), updated_at=timezone.now(),
+    )
+    Tombstone.objects.create(board_id=_comment_board_id(instance), kind="comment", object_id=instance.pk)
+
+
+def _record_task_move(task, previous_board_id):
+    """The old board sees the task as removed, the new one receives it together with its comments"""
+    Tombstone.objects.create(board_id=previous_board_id, kind="task", object_id=task.pk)
+    Comment.objects.filter(task_id=task.pk).update(updated_at=timezone.now())
+    get_search_backend().index_comments(Comment.objects.filter(task_id=task.pk).only("id", "content"), task.board_id)
+
+
+@receiver(post_save, sender=Task)
+def record_task_move(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, "_stats_previous", None)
+    if not raw and previous is not None and previous[0] != instance.board_id:
+        _record_task_move(instance, previous[0])
+
+
+@receiver(post_delete, sender=Task)
+def record_task_delete(sender, instance, **kwargs):
+    if _deleted_with_board(instance):
+        return
+    Tombstone.objects.create(board_id=instance.board_id, kind="task", object_id=instance.pk)
+
+
+def _index_changed_tasks(tasks):
+    """Indexes tasks whose text or board differs from what they were loaded or last indexed with"""
+    changed = [task for task in tasks if getattr(task, "_search_snapshot", None) != (task.title, task.description, task.board_id)]
+    get_search_backend().index_tasks(changed)
+    for task in changed:
+        task._search_snapshot = (task.title, task.description, task.board_id)
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _index_changed_tasks([instance])
+
+
+@receiver(post_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    if _deleted_with_board(instance):
+        return
+    backend = get_search_backend()
+    backend.remove("task", [instance.pk])
+    backend.remove("comment", sorted(_cascaded_comment_ids(instance.pk)))
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index_comments([instance], _comment_board_id(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    if _deleted_with_task(instance):
+        return
+    get_search_backend().remove("comment", [instance.pk])
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def update_stats_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        board_ids = [instance.pk]
+    elif action == "post_clear":
+        board_ids = getattr(instance, "_stats_cleared_board_ids", [])
+    else:
+        board_ids = list(pk_set or [])
+    _refresh_member_counts(board_ids)
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def remember_boards_before_clear(sender, instance, action, reverse, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._stats_cleared_board_ids = list(instance.member_boards.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=User)
+def remember_member_boards(sender, instance, **kwargs):
+    """Membership rows of a deleted user vanish without m2m_changed"""
+    instance._stats_member_board_ids = list(instance.member_boards.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=User)
+def update_stats_on_user_delete(sender, instance, **kwargs):
+    board_ids = getattr(instance, "_stats_member_board_ids", [])
+    if board_ids:
+        _refresh_member_counts(board_ids)
+
+
+@receiver(pre_delete, sender=User)
+def remember_user_tasks(sender, instance, **kwargs):
+    """Assignee and reviewer are nulled by an UPDATE of the collector, which sends no signals"""
+    instance._sync_tasks = list(
+        Task.objects.filter(Q(assignee=instance) | Q(reviewer=instance)).values_list("id", "board_id")
+    )
+
+
+@receiver(post_delete, sender=User)
+def touch_tasks_on_user_delete(sender, instance, **kwargs):
+    """So the delta sync and board ETags pick up the lost assignee or reviewer"""
+    tasks = getattr(instance, "_sync_tasks", [])
+    if tasks:
+        Task.objects.filter(pk__in=[task_id for task_id, _ in tasks]).update(updated_at=timezone.now())
+        _bump_versions({board_id for _, board_id in tasks})
+
+
+"""User fields the board detail shows for owner, members, assignees and reviewers"""
+USER_DETAIL_FIELDS = ("email", "first_name", "last_name")
+
+
+@receiver(pre_save, sender=User)
+def remember_user_details(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Skips logins and other saves limited to fields the board detail does not show"""
+    instance._board_user_details = None
+    if raw or instance.pk is None or (update_fields is not None and not set(USER_DETAIL_FIELDS) & set(update_fields)):
+        return
+    instance._board_user_details = User.objects.filter(pk=instance.pk).values_list(*USER_DETAIL_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def bump_versions_on_user_change(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_board_user_details", None)
+    if created or previous is None or previous == tuple(getattr(instance, field) for field in USER_DETAIL_FIELDS):
+        return
+    board_ids = set(Board.objects.filter(Q(owner=instance) | Q(members=instance)).values_list("id", flat=True))
+    board_ids |= set(Task.objects.filter(Q(assignee=instance) | Q(reviewer=instance)).values_list("board_id", flat=True))
+    _bump_versions(board_ids)
+
+
+@receiver(pre_save, sender=Board)
+def remember_board_owner(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._access_previous_owner_id = None
+        return
+    if hasattr(instance, "_loaded_owner_id"):
+        instance._access_previous_owner_id = instance._loaded_owner_id
+    else:
+        instance._access_previous_owner_id = Board.objects.filter(pk=instance.pk).values_list("owner_id", flat=True).first()
+
+
+@receiver(post_save, sender=Board)
+def invalidate_access_on_board_save(sender, instance, created, raw=False, **kwargs):
+    previous_owner_id = getattr(instance, "_access_previous_owner_id", None)
+    instance._loaded_owner_id = instance.owner_id
+    if created or previous_owner_id != instance.owner_id:
+        invalidate_board_access([instance.owner_id, previous_owner_id])
+
+
+@receiver(pre_delete, sender=Board)
+def remember_board_users(sender, instance, **kwargs):
+    """Membership rows are gone when post_delete fires"""
+    instance._access_user_ids = [instance.owner_id, *instance.members.values_list("id", flat=True)]
+
+
+@receiver(post_delete, sender=Board)
+def invalidate_access_on_board_delete(sender, instance, **kwargs):
+    invalidate_board_access(getattr(instance, "_access_user_ids", [instance.owner_id]))
+
+
+@receiver(post_delete, sender=Board)
+def clean_up_deleted_board(sender, instance, **kwargs):
+    """Tombstones and search rows of the board in a few statements instead of per cascaded task and comment"""
+    Tombstone.objects.filter(board_id=instance.pk).delete()
+    state = get_cascade_deletion()
+    if state is None:
+        return
+    task_ids = sorted(task_id for task_id, board_id in state.tasks.items() if board_id == instance.pk)
+    backend = get_search_backend()
+    backend.remove("task", task_ids)
+    backend.remove("comment", sorted(comment_id for task_id in task_ids for comment_id in state.comment_ids.get(task_id, ())))
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def invalidate_access_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and not reverse:
+        instance._access_cleared_user_ids = list(instance.members.values_list("id", flat=True))
+    elif action in ("post_add", "post_remove"):
+        invalidate_board_access([instance.pk] if reverse else pk_set or [])
+    elif action == "post_clear":
+        invalidate_board_access([instance.pk] if reverse else getattr(instance, "_access_cleared_user_ids", []))
+
+
+def _task_event_data(task):
+    return {
+        "id": task.id,
+        "title": task.title,
+        "status": task.status,
+        "priority": task.priority,
+        "assignee": task.assignee_id,
+        "reviewer": task.reviewer_id,
+        "due_date": task.due_date,
+    }
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    _publish_task(instance, getattr(instance, "_stats_previous", None), created)
+
+
+def _publish_task(task, previous, created):
+    if previous is not None and previous[0] != task.board_id:
+        publish_on_commit(previous[0], "task.deleted", {"id": task.id})
+        created = True
+    publish_on_commit(task.board_id, "task.created" if created else "task.updated", _task_event_data(task))
+
+
+def record_bulk_task_changes(tasks):
+    """Stats, versions, search index and events for tasks written by bulk_create/bulk_update, which send no signals
+
+    Each task carries the snapshot it was loaded with (_stats_snapshot, absent for new tasks).
+    """
+    deltas = defaultdict(Counter)
+    for task in tasks:
+        previous = getattr(task, "_stats_snapshot", None)
+        current = (task.board_id, task.status, task.priority)
+        _add_task_deltas(deltas, previous, current)
+        if previous is not None and previous[0] != current[0]:
+            _record_task_move(task, previous[0])
+        _publish_task(task, previous, previous is None)
+        task._stats_snapshot = current
+    _apply_deltas(deltas)
+    _index_changed_tasks(tasks)
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, **kwargs):
+    """board.deleted stands for the tasks and comments of a deleted board"""
+    if _deleted_with_board(instance):
+        return
+    publish_on_commit(instance.board_id, "task.deleted", {"id": instance.id})
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        data = {"id": instance.id, "task": instance.task_id, "author": instance.author_id}
+        publish_on_commit(_comment_board_id(instance), "comment.added" if created else "comment.updated", data)
+
+
+@receiver(post_delete, sender=Comment)
+def publish_comment_deleted(sender, instance, **kwargs):
+    if _deleted_with_task(instance):
+        return
+    publish_on_commit(_comment_board_id(instance), "comment.removed", {"id": instance.id, "task": instance.task_id})
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def publish_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    actions = {"post_add": "added", "post_remove": "removed", "post_clear": "cleared"}
+    if action not in actions:
+        return
+    if not reverse:
+        users = sorted(pk_set) if pk_set else getattr(instance, "_access_cleared_user_ids", [])
+        publish_on_commit(instance.pk, "members.changed", {"action": actions[action], "users": users})
+        return
+    board_ids = pk_set if pk_set else getattr(instance, "_stats_cleared_board_ids", [])
+    for board_id in board_ids:
+        publish_on_commit(board_id, "members.changed", {"action": actions[action], "users": [instance.pk]})
+
+
+@receiver(post_delete, sender=Board)
+def publish_board_deleted(sender, instance, **kwargs):
+    publish_on_commit(instance.pk, "board.deleted", {"id": instance.pk})
@@ -1,3 +1,1303 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from io import StringIO
+from datetime import date, timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.db import OperationalError, connection, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from auth_app.api.authentication import token_cache
+from core.db_routing import ReplicaRoutingMiddleware, copy_sqlite_database, use_primary
+from core.utils.renderers import FastJSONRenderer
+from kanban_app.api.fast_serializers import TASK_VALUES, board_detail_data, load_users, task_data, task_user_ids
+from kanban_app.api.serializers import BoardDetailSerializer, TaskSerializer
+from kanban_app.api.sync import encode_token
+from kanban_app.api.views import BoardDetailView
+from kanban_app.events import InProcessBroker, SQLiteBroker, get_broker
+from kanban_app.membership import CACHE_KEY
+from kanban_app.models import Board, BoardStats, Comment, Task, Tombstone
+from kanban_app.search import get_search_backend
 
-# Create your tests here.
+
+class KanbanTestCase(TestCase):
+    """Clears cached board access, ids are reused after each test rollback"""
+
+    def setUp(self):
+        cache.clear()
+
+
+class BoardListQueryCountTests(KanbanTestCase):
+    """Board list must cost the same number of queries regardless of board count"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.other = User.objects.create_user(username="member@example.com", email="member@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _create_boards(self, amount):
+        boards = Board.objects.bulk_create([Board(title=f"Board {i}", owner=self.user) for i in range(amount)])
+        Board.members.through.objects.bulk_create(
+            [Board.members.through(board_id=b.id, user_id=self.other.id) for b in boards]
+        )
+        Task.objects.bulk_create(
+            [Task(board=b, title="T", status="to-do", priority="high") for b in boards]
+            + [Task(board=b, title="T", status="done", priority="low") for b in boards]
+        )
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("board-list-create"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_query_count_independent_of_board_count(self):
+        self._create_boards(5)
+        small, data = self._count_queries()
+        self.assertEqual(len(data), 5)
+
+        self._create_boards(495)
+        large, data = self._count_queries()
+        self.assertEqual(len(data), 500)
+        self.assertEqual(small, large)
+
+    def test_counts_are_aggregated_per_board(self):
+        self._create_boards(1)
+        member_board = Board.objects.create(title="Shared", owner=self.other)
+        member_board.members.add(self.user, self.other)
+        _, data = self._count_queries()
+
+        by_title = {row["title"]: row for row in data}
+        self.assertEqual(by_title["Board 0"]["member_count"], 1)
+        self.assertEqual(by_title["Board 0"]["ticket_count"], 2)
+        self.assertEqual(by_title["Board 0"]["tasks_to_do_count"], 1)
+        self.assertEqual(by_title["Board 0"]["tasks_high_prio_count"], 1)
+        self.assertEqual(by_title["Shared"]["member_count"], 2)
+        self.assertEqual(by_title["Shared"]["ticket_count"], 0)
+
+
+class BoardStatsTests(KanbanTestCase):
+    """BoardStats must follow task, comment and membership changes"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.member = User.objects.create_user(username="member@example.com", email="member@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+
+    def _stats(self):
+        return BoardStats.objects.get(board=self.board)
+
+    def _assert_matches_rebuild(self):
+        maintained = BoardStats.objects.filter(board=self.board).values().get()
+        BoardStats.rebuild([self.board.id])
+        self.assertEqual(maintained, BoardStats.objects.filter(board=self.board).values().get())
+
+    def test_task_comment_and_member_changes(self):
+        self.board.members.add(self.member)
+        task = Task.objects.create(board=self.board, title="A", status="to-do", priority="high")
+        Task.objects.create(board=self.board, title="B", status="done", priority="low")
+        Comment.objects.create(task=task, author=self.owner, content="Hi")
+        Comment.objects.create(task=task, author=self.member, content="Ho")
+
+        stats = self._stats()
+        self.assertEqual((stats.ticket_count, stats.tasks_to_do_count, stats.tasks_high_prio_count), (2, 1, 1))
+        self.assertEqual((stats.member_count, stats.comment_count), (1, 2))
+
+        task = Task.objects.get(pk=task.pk)
+        task.status = "review"
+        task.priority = "medium"
+        task.save()
+        stats = self._stats()
+        self.assertEqual((stats.tasks_to_do_count, stats.tasks_review_count, stats.tasks_medium_prio_count), (0, 1, 1))
+        self._assert_matches_rebuild()
+
+        task.delete()
+        self.member.member_boards.clear()
+        stats = self._stats()
+        self.assertEqual((stats.ticket_count, stats.comment_count, stats.member_count), (1, 0, 0))
+        self._assert_matches_rebuild()
+
+    def test_stats_endpoint(self):
+        Task.objects.create(board=self.board, title="A", status="in-progress", priority="high")
+        client = APIClient()
+        client.force_authenticate(self.member)
+        url = reverse("board-stats", kwargs={"pk": self.board.id})
+        self.assertEqual(client.get(url).status_code, 403)
+
+        self.board.members.add(self.member)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"]["in-progress"], 1)
+        self.assertEqual(response.data["priority"]["high"], 1)
+        self.assertEqual(response.data["member_count"], 1)
+
+    def test_stats_endpoint_never_writes(self):
+        """A board without stats row is not rebuilt by the read, not even for strangers"""
+        board = Board.objects.bulk_create([Board(title="Bulk", owner=self.owner)])[0]
+        url = reverse("board-stats", kwargs={"pk": board.id})
+        client = APIClient()
+        client.force_authenticate(self.member)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(client.get(url).status_code, 403)
+        self.assertFalse(any(query["sql"].startswith(("INSERT", "UPDATE", "DELETE")) for query in ctx.captured_queries))
+        self.assertFalse(BoardStats.objects.filter(board=board).exists())
+
+        client.force_authenticate(self.owner)
+        self.assertEqual(client.get(url).status_code, 404)
+        call_command("rebuild_board_stats", stdout=StringIO())
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(client.get(url).status_code, 200)
+        stats_queries = [query["sql"] for query in ctx.captured_queries if "kanban_app_boardstats" in query["sql"]]
+        self.assertEqual(len(stats_queries), 1)
+        self.assertNotIn("JOIN", stats_queries[0])
+
+
+class TaskFeedPaginationTests(KanbanTestCase):
+    """Task feeds are keyset paginated on (due_date, id) with nulls last"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        board = Board.objects.create(title="Board", owner=self.user)
+        due_dates = [date(2025, 1, 3), None, date(2025, 1, 1), date(2025, 1, 3), None, date(2025, 1, 2), date(2025, 1, 1)]
+        for i, due in enumerate(due_dates):
+            Task.objects.create(board=board, title=f"T{i}", assignee=self.user, due_date=due)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_walks_all_pages_in_stable_order(self):
+        url = reverse("tasks-assigned") + "?page_size=3"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen.extend(response.data["results"])
+            url = response.data["next"]
+
+        expected = list(
+            Task.objects.order_by(F("due_date").asc(nulls_last=True), "id").values_list("id", flat=True)
+        )
+        self.assertEqual([task["id"] for task in seen], expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("tasks-involved") + "?cursor=kaputt")
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskFeedFilterTests(KanbanTestCase):
+    """Task feeds filter and order in the database on validated query parameters"""
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.user = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.user)
+        self.other_board = Board.objects.create(title="Other", owner=self.user)
+        today = timezone.localdate()
+        specs = [
+            (self.board, "to-do", "high", today - timedelta(days=2)),
+            (self.board, "done", "low", today - timedelta(days=1)),
+            (self.board, "review", "medium", today + timedelta(days=3)),
+            (self.other_board, "in-progress", "high", None),
+            (self.other_board, "to-do", "low", today + timedelta(days=1)),
+        ]
+        self.tasks = [
+            Task.objects.create(board=board, title=f"T{i}", status=status, priority=priority, due_date=due, assignee=self.user)
+            for i, (board, status, priority, due) in enumerate(specs)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _ids(self, params, name="tasks-assigned"):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [task["id"] for task in response.data["results"]]
+
+    def _expected(self, *indexes):
+        return [self.tasks[i].id for i in indexes]
+
+    def test_filters(self):
+        self.assertEqual(self._ids({"status": ["to-do", "review"]}), self._expected(0, 4, 2))
+        self.assertEqual(self._ids({"status": "to-do,review", "priority": "high"}), self._expected(0))
+        self.assertEqual(self._ids({"board": self.other_board.id}), self._expected(4, 3))
+        self.assertEqual(self._ids({"due_after": timezone.localdate().isoformat()}), self._expected(4, 2))
+        self.assertEqual(self._ids({"due_before": timezone.localdate().isoformat()}), self._expected(0, 1))
+        self.assertEqual(self._ids({"overdue": "true"}), self._expected(0))
+        self.assertEqual(self._ids({"overdue": "false"}), self._expected(1, 4, 2, 3))
+
+    def test_ordering_walks_pages(self):
+        Task.objects.filter(pk=self.tasks[2].pk).update(updated_at=timezone.now() - timedelta(days=1))
+        for ordering, expected in [
+            ("-due_date", self._expected(3, 2, 4, 1, 0)),
+            ("updated_at", self._expected(2, 0, 1, 3, 4)),
+            ("-updated_at", self._expected(4, 3, 1, 0, 2)),
+        ]:
+            url, seen = reverse("tasks-involved") + f"?ordering={ordering}&page_size=2", []
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                seen.extend(task["id"] for task in response.data["results"])
+                url = response.data["next"]
+            self.assertEqual(seen, expected, ordering)
+
+    def test_invalid_parameters(self):
+        for params, field in [
+            ({"status": "to-do,erledigt"}, "status"),
+            ({"priority": "urgent"}, "priority"),
+            ({"board": "abc"}, "board"),
+            ({"due_before": "morgen"}, "due_before"),
+            ({"due_after": "2025-02-01", "due_before": "2025-01-01"}, "due_after"),
+            ({"ordering": "title"}, "ordering"),
+        ]:
+            response = self.client.get(reverse("tasks-reviewing"), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(field, response.data)
+        self.assertIn("erledigt", str(self.client.get(reverse("tasks-assigned"), {"status": "erledigt"}).data["status"]))
+
+    def test_async_feed_filters(self):
+        headers = {"Authorization": f"Token {Token.objects.create(user=self.user).key}"}
+        response = self.client.get(reverse("async-tasks-assigned"), {"priority": "low", "ordering": "-due_date"}, headers=headers)
+        self.assertEqual([task["id"] for task in response.json()["results"]], self._expected(4, 1))
+        response = self.client.get(reverse("async-tasks-assigned"), {"ordering": "title"}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+
+class BoardAccessCacheTests(KanbanTestCase):
+    """Object permission checks use cached board ids and are invalidated on changes"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.member = User.objects.create_user(username="member@example.com", email="member@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.task = Task.objects.create(board=self.board, title="Task")
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        self.url = reverse("task-detail", kwargs={"pk": self.task.id})
+
+    def test_warm_request_runs_no_membership_query(self):
+        self.board.members.add(self.member)
+        url = reverse("board-stats", kwargs={"pk": self.board.id})
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("kanban_app_board_members", ctx.captured_queries[0]["sql"])
+
+    def test_invalidated_on_membership_and_owner_change(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.board.members.add(self.member)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.board.members.remove(self.member)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.board.owner = self.member
+        self.board.save()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.member.owned_boards.all().delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_invalidated_again_after_commit(self):
+        """A request that cached the old ids while the membership change was uncommitted must not keep them"""
+        key = CACHE_KEY.format(user_id=self.member.id)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.board.members.add(self.member)
+            cache.set(key, frozenset())
+        self.assertTrue(callbacks)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class AccessResolutionQueryCountTests(KanbanTestCase):
+    """Task and comment endpoints resolve object, board and access in one query"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.member = User.objects.create_user(username="member@example.com", email="member@example.com", password="x")
+        self.stranger = User.objects.create_user(username="stranger@example.com", email="stranger@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.board.members.add(self.member)
+        self.task = Task.objects.create(board=self.board, title="Task", assignee=self.member, reviewer=self.owner)
+        Comment.objects.create(task=self.task, author=self.owner, content="Hallo")
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        cache.clear()
+
+    def test_task_detail_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("task-detail", kwargs={"pk": self.task.id}))
+        self.assertEqual(response.data["comments_count"], 1)
+        self.assertEqual(response.data["assignee"]["id"], self.member.id)
+
+    def test_comment_list_two_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("comments-list-create", kwargs={"task_id": self.task.id}))
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_comment_delete(self):
+        comment = Comment.objects.create(task=self.task, author=self.member, content="Weg")
+        url = reverse("comment-delete", kwargs={"task_id": self.task.id, "comment_id": comment.id})
+        self.client.force_authenticate(self.stranger)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+
+class BoardDetailETagTests(KanbanTestCase):
+    """Board detail answers If-None-Match with 304 until the board changes"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.task = Task.objects.create(board=self.board, title="Task")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse("board-detail", kwargs={"pk": self.board.id})
+
+    def _etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_not_modified_without_queries(self):
+        etag = self._etag()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_changes_produce_new_etag(self):
+        member = User.objects.create_user(username="m@example.com", email="m@example.com", password="x")
+        reviewer = User.objects.create_user(username="r@example.com", email="r@example.com", password="x")
+        Task.objects.filter(pk=self.task.pk).update(reviewer=reviewer)
+
+        def change_user(user, **values):
+            user = User.objects.get(pk=user.pk)
+            for field, value in values.items():
+                setattr(user, field, value)
+            user.save()
+
+        changes = [
+            lambda: Task.objects.filter(pk=self.task.pk).first().save(),
+            lambda: Comment.objects.create(task=self.task, author=self.owner, content="Hallo"),
+            lambda: Comment.objects.filter(task=self.task).delete(),
+            lambda: self.board.members.add(member),
+            lambda: Board.objects.get(pk=self.board.pk).save(),
+            lambda: change_user(member, first_name="Marie"),
+            lambda: change_user(self.owner, email="owner.neu@example.com"),
+            lambda: change_user(reviewer, last_name="Rot"),
+            lambda: self.task.delete(),
+        ]
+        etags = [self._etag()]
+        for change in changes:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            etags.append(self._etag())
+        self.assertEqual(len(set(etags)), len(etags))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[-1]).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[0]).status_code, 200)
+
+        """A login only writes last_login, which the board detail does not show"""
+        member.last_login = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            member.save(update_fields=["last_login"])
+        self.assertEqual(self._etag(), etags[-1])
+
+    def test_rebuild_keeps_version(self):
+        etag = self._etag()
+        BoardStats.rebuild()
+        cache.clear()
+        self.assertEqual(self._etag(), etag)
+
+
+class AsyncEndpointTests(KanbanTestCase):
+    """Async endpoints return the same data as their sync counterparts"""
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x", first_name="O", last_name="Wner")
+        self.stranger = User.objects.create_user(username="stranger@example.com", email="stranger@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.task = Task.objects.create(board=self.board, title="Task", assignee=self.owner, due_date=date(2025, 5, 1))
+        Comment.objects.create(task=self.task, author=self.owner, content="Hallo")
+        self.headers = {"Authorization": f"Token {Token.objects.create(user=self.owner).key}"}
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    async def test_matches_sync_endpoints(self):
+        pairs = [
+            ("board-list-create", "async-board-list", {}),
+            ("board-detail", "async-board-detail", {"pk": self.board.id}),
+            ("tasks-assigned", "async-tasks-assigned", {}),
+            ("tasks-reviewing", "async-tasks-reviewing", {}),
+            ("tasks-involved", "async-tasks-involved", {}),
+            ("comments-list-create", "async-comments-list", {"task_id": self.task.id}),
+        ]
+        for sync_name, async_name, kwargs in pairs:
+            expected = await sync_to_async(self.client.get)(reverse(sync_name, kwargs=kwargs), HTTP_ACCEPT="application/json")
+            response = await self.async_client.get(reverse(async_name, kwargs=kwargs), headers=self.headers)
+            self.assertEqual(response.status_code, 200, async_name)
+            data, expected_data = json.loads(response.content), json.loads(expected.content)
+            if isinstance(data, dict):
+                """Links point at the respective endpoint"""
+                data.pop("newer", None), expected_data.pop("newer", None)
+            self.assertEqual(data, expected_data, async_name)
+
+    async def test_auth_and_permissions(self):
+        url = reverse("async-board-detail", kwargs={"pk": self.board.id})
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+        stranger_token = await Token.objects.acreate(user=self.stranger)
+        response = await self.async_client.get(url, headers={"Authorization": f"Token {stranger_token.key}"})
+        self.assertEqual(response.status_code, 403)
+        etag = (await self.async_client.get(url, headers=self.headers))["ETag"]
+        response = await self.async_client.get(url, headers={**self.headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+
+class BoardEventStreamTests(KanbanTestCase):
+    """Signals publish board events, the SSE endpoint streams them to members only"""
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.member = User.objects.create_user(username="member@example.com", email="member@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.headers = {"Authorization": f"Token {Token.objects.create(user=self.owner).key}"}
+        self.url = reverse("board-events", kwargs={"pk": self.board.id})
+
+    def _change(self, func):
+        with self.captureOnCommitCallbacks(execute=True):
+            return func()
+
+    async def _next(self, stream):
+        return await asyncio.wait_for(anext(stream), 5)
+
+    async def test_streams_task_comment_and_member_events(self):
+        response = await self.async_client.get(self.url, headers=self.headers)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await self._next(stream), b"retry: 3000\n\n")
+        pending = asyncio.ensure_future(self._next(stream))
+        broker = get_broker()
+        while not broker._subscriptions[self.board.id]:
+            await asyncio.sleep(0.01)
+
+        task = await sync_to_async(self._change)(lambda: Task.objects.create(board=self.board, title="Neu"))
+        self.assertIn(b"event: task.created", await pending)
+        await sync_to_async(self._change)(lambda: Comment.objects.create(task=task, author=self.owner, content="Hi"))
+        self.assertIn(b"event: comment.added", await self._next(stream))
+        await sync_to_async(self._change)(lambda: self.board.members.add(self.member))
+        chunk = await self._next(stream)
+        self.assertIn(b"event: members.changed", chunk)
+        self.assertIn(b'"users":[%d]' % self.member.id, chunk)
+        await stream.aclose()
+
+    def test_wsgi_request_is_refused_instead_of_hanging(self):
+        response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+
+    async def test_requires_board_access(self):
+        token = await Token.objects.acreate(user=self.member)
+        response = await self.async_client.get(self.url, headers={"Authorization": f"Token {token.key}"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_broker_failure_is_logged_not_raised(self):
+        with mock.patch.object(get_broker(), "publish", side_effect=sqlite3.OperationalError("database is locked")), \
+                self.assertLogs("kanban_app.events", "ERROR") as logs, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            task = Task.objects.create(board=self.board, title="Neu")
+            transaction.on_commit(lambda: Task.objects.filter(pk=task.pk).update(title="Danach"))
+        self.assertGreater(len(callbacks), 1)
+        self.assertIn(f"task.created for board {self.board.id} failed", logs.output[0])
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "Danach")
+
+    def test_in_process_broker_replays_after_last_event_id(self):
+        broker = InProcessBroker(buffer=10)
+        first = broker.publish(self.board.id, "task.created", {"id": 1})
+        broker.publish(self.board.id, "task.deleted", {"id": 1})
+
+        async def collect():
+            stream = broker.subscribe(self.board.id, last_event_id=first.id, heartbeat=0.01)
+            events = [await anext(stream), await anext(stream)]
+            await stream.aclose()
+            return events
+
+        replayed, heartbeat = async_to_sync(collect)()
+        self.assertEqual(replayed.type, "task.deleted")
+        self.assertIsNone(heartbeat)
+
+    def test_sqlite_broker_shares_events_between_instances(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.sqlite3")
+            publisher, subscriber = SQLiteBroker(path), SQLiteBroker(path, poll_interval=0.01)
+            before = publisher.publish(self.board.id, "task.created", {"id": 1})
+            publisher.publish(self.board.id, "task.updated", {"id": 1})
+
+            async def first_event():
+                stream = subscriber.subscribe(self.board.id, last_event_id=before.id)
+                event = await anext(stream)
+                await stream.aclose()
+                return event
+
+            event = async_to_sync(first_event)()
+        self.assertEqual((event.type, event.data), ("task.updated", {"id": 1}))
+
+
+class TaskBulkTests(KanbanTestCase):
+    """Bulk create/update validates the whole batch with a fixed number of queries"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.member = User.objects.create_user(username="member@example.com", email="member@example.com", password="x")
+        self.stranger = User.objects.create_user(username="stranger@example.com", email="stranger@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.board.members.add(self.member)
+        self.other_board = Board.objects.create(title="Other", owner=self.stranger)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse("task-bulk")
+
+    def _items(self, amount):
+        return [{"board": self.board.id, "title": f"Task {i}", "status": "to-do", "priority": "high",
+                 "assignee_id": self.member.id, "reviewer_id": self.owner.id} for i in range(amount)]
+
+    def _create_queries(self, amount):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, self._items(amount), format="json")
+        self.assertEqual(response.status_code, 201)
+        return len(ctx.captured_queries), response.data
+
+    def test_create_query_count_independent_of_batch_size(self):
+        small, _ = self._create_queries(2)
+        large, data = self._create_queries(50)
+        self.assertEqual(small, large)
+        self.assertEqual(len(data), 50)
+        self.assertEqual(data[0]["assignee"]["id"], self.member.id)
+        self.assertEqual(data[0]["comments_count"], 0)
+
+        stats = BoardStats.objects.get(board=self.board)
+        self.assertEqual((stats.ticket_count, stats.tasks_to_do_count, stats.tasks_high_prio_count), (52, 52, 52))
+
+    def test_invalid_items_reported_and_nothing_written(self):
+        items = self._items(3)
+        items[1]["assignee_id"] = self.stranger.id
+        items[2]["board"] = self.other_board.id
+        response = self.client.post(self.url, items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1, 2])
+        self.assertIn("assignee_id", response.data["errors"][0]["errors"])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_update_batch(self):
+        tasks = [Task.objects.create(board=self.board, title=f"T{i}", status="to-do") for i in range(3)]
+        items = [{"id": task.id, "status": "done", "reviewer_id": self.member.id} for task in tasks]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row["reviewer"]["id"] for row in response.data}, {self.member.id})
+        self.assertEqual(Task.objects.filter(board=self.board, status="done").count(), 3)
+
+        maintained = BoardStats.objects.filter(board=self.board).values().get()
+        BoardStats.rebuild([self.board.id])
+        rebuilt = BoardStats.objects.filter(board=self.board).values().get()
+        self.assertEqual({**maintained, "version": 0}, {**rebuilt, "version": 0})
+        self.assertEqual(maintained["tasks_done_count"], 3)
+
+    def test_update_unknown_or_foreign_task(self):
+        foreign = Task.objects.create(board=self.other_board, title="Fremd")
+        response = self.client.patch(self.url, [{"id": 999999, "title": "X"}, {"id": foreign.id, "title": "X"}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("id", response.data["errors"][0]["errors"])
+        self.assertEqual(response.data["errors"][1]["errors"]["detail"], "Kein Zugriff auf dieses Board.")
+
+
+class TaskWriteQueryCountTests(KanbanTestCase):
+    """Task create/update load board, membership and users once, whatever fields are sent"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.member = User.objects.create_user(username="member@example.com", email="member@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.board.members.add(self.member)
+        self.task = Task.objects.create(board=self.board, title="Task")
+        Comment.objects.create(task=self.task, author=self.owner, content="Hallo")
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        self.url = reverse("task-detail", kwargs={"pk": self.task.id})
+
+    def test_patch_query_count_is_fixed(self):
+        payloads = [
+            {"title": "Neu"},
+            {"assignee_id": self.member.id},
+            {"assignee_id": self.member.id, "reviewer_id": self.owner.id, "status": "review"},
+            {"board": self.board.id, "assignee_id": None, "reviewer_id": self.member.id, "priority": "high"},
+        ]
+        for payload in payloads:
+            """Changing the text adds one search index write"""
+            expected = (6 if {"assignee_id", "reviewer_id"} & payload.keys() else 5) + ("title" in payload)
+            with self.subTest(payload=payload), self.assertNumQueries(expected):
+                response = self.client.patch(self.url, payload, format="json")
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["reviewer"]["id"], self.member.id)
+        self.assertIsNone(response.data["assignee"])
+
+    def test_put_renders_without_extra_queries(self):
+        payload = {"board": self.board.id, "title": "Voll", "description": "", "status": "done", "priority": "low",
+                   "assignee_id": self.owner.id, "reviewer_id": self.member.id, "due_date": None}
+        with self.assertNumQueries(7):
+            response = self.client.put(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["assignee"]["id"], response.data["comments_count"]), (self.owner.id, 1))
+
+    def test_create_without_refetch(self):
+        payload = {"board": self.board.id, "title": "Neu", "assignee_id": self.member.id, "reviewer_id": self.owner.id}
+        self.client.get(reverse("board-stats", kwargs={"pk": self.board.id}))
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse("task-create"), payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["reviewer"]["id"], response.data["comments_count"]), (self.owner.id, 0))
+
+    def test_move_requires_access_to_target_board(self):
+        other = Board.objects.create(title="Fremd", owner=self.owner)
+        response = self.client.patch(self.url, {"board": other.id}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Task.objects.get(pk=self.task.id).board_id, self.board.id)
+
+
+class CommentPaginationTests(KanbanTestCase):
+    """Comments are keyset paginated on (created_at, id) in both directions and since a cursor"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.task = Task.objects.create(board=self.board, title="Incident")
+        self.comments = [Comment.objects.create(task=self.task, author=self.owner, content=f"C{i}") for i in range(5)]
+        """Two comments share a timestamp, so the id must break the tie"""
+        stamp = self.comments[0].created_at.replace(microsecond=0) - timedelta(minutes=1)
+        for offset, comment in zip((0, 1, 1, 2, 3), self.comments):
+            Comment.objects.filter(pk=comment.pk).update(created_at=stamp + timedelta(seconds=offset))
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse("comments-list-create", kwargs={"task_id": self.task.id})
+
+    def _walk(self, url):
+        contents = []
+        while url:
+            data = self.client.get(url).data
+            contents += [row["content"] for row in data["results"]]
+            url = data["next"]
+        return contents, data
+
+    def test_newest_first_and_load_older(self):
+        contents, _ = self._walk(f"{self.url}?page_size=2")
+        self.assertEqual(contents, ["C4", "C3", "C2", "C1", "C0"])
+
+    def test_oldest_first(self):
+        contents, _ = self._walk(f"{self.url}?page_size=2&order=oldest")
+        self.assertEqual(contents, ["C0", "C1", "C2", "C3", "C4"])
+
+    def test_since_returns_only_newer_comments(self):
+        first = self.client.get(f"{self.url}?page_size=3&order=oldest").data
+        newer = first["newer"]
+        self.assertEqual(self.client.get(newer).data["results"][0]["content"], "C3")
+
+        latest = self.client.get(self.url).data["newer"]
+        empty = self.client.get(latest).data
+        self.assertEqual((empty["results"], empty["next"]), ([], None))
+        self.assertEqual(empty["newer"], latest)
+        Comment.objects.create(task=self.task, author=self.owner, content="Neu")
+        contents, _ = self._walk(latest)
+        self.assertEqual(contents, ["Neu"])
+
+    def test_page_costs_fixed_queries(self):
+        cursor = self.client.get(f"{self.url}?page_size=2").data["next"]
+        with self.assertNumQueries(2):
+            response = self.client.get(cursor)
+        self.assertEqual([row["content"] for row in response.data["results"]], ["C2", "C1"])
+        self.assertEqual(self.client.get(f"{self.url}?cursor=kaputt").status_code, 404)
+
+
+class TaskCommentsCountTests(KanbanTestCase):
+    """Task.comments_count follows comment changes and is read without counting"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.author = User.objects.create_user(username="author@example.com", email="author@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.board.members.add(self.author)
+        self.task = Task.objects.create(board=self.board, title="Task")
+
+    def _count(self):
+        return Task.objects.values_list("comments_count", flat=True).get(pk=self.task.pk)
+
+    def test_create_delete_and_author_cascade(self):
+        comment = Comment.objects.create(task=self.task, author=self.owner, content="A")
+        Comment.objects.create(task=self.task, author=self.author, content="B")
+        Comment.objects.create(task=self.task, author=self.author, content="C")
+        self.assertEqual(self._count(), 3)
+        comment.delete()
+        self.author.delete()
+        self.assertEqual(self._count(), 0)
+
+    def test_stale_task_save_keeps_count(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        Comment.objects.create(task=self.task, author=self.owner, content="A")
+        stale.title = "Umbenannt"
+        stale.save()
+        self.assertEqual(self._count(), 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        Comment.objects.create(task=self.task, author=self.owner, content="A")
+        Task.objects.filter(pk=self.task.pk).update(comments_count=7)
+        out = StringIO()
+        call_command("reconcile_comments_count", stdout=out)
+        self.assertIn(str(self.task.pk), out.getvalue())
+        self.assertEqual(self._count(), 1)
+        self.assertEqual(Task.reconcile_comments_count(), [])
+
+    def test_board_detail_does_not_count_per_task(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = reverse("board-detail", kwargs={"pk": self.board.id})
+        client.get(url)
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as few:
+            client.get(url)
+        for i in range(5):
+            task = Task.objects.create(board=self.board, title=f"T{i}")
+            Comment.objects.create(task=task, author=self.author, content="Hi")
+        with CaptureQueriesContext(connection) as many:
+            response = client.get(url)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+        self.assertEqual({task["comments_count"] for task in response.data["tasks"]}, {0, 1})
+
+
+class FastSerializerCompatibilityTests(KanbanTestCase):
+    """The fast read path must render byte for byte what the DRF serializers render"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x", first_name="Ölaf", last_name="")
+        self.member = User.objects.create_user(username="m@example.com", email="m@example.com", password="x", first_name=" Mia", last_name="Müller ")
+        self.former = User.objects.create_user(username="former@example.com", email="former@example.com", password="x")
+        self.board = Board.objects.create(title="Board \u2028 €", owner=self.owner)
+        self.board.members.add(self.member, self.owner)
+        texts = ["", "Zeile\nzwei \"zitiert\" \\ \t", "Steuer\x01\x1f\x7f", "Emoji 😀 \u2029 Ende"]
+        for i, text in enumerate(texts * 3):
+            task = Task.objects.create(
+                board=self.board, title=f"Task {i} {text[:5]}", description=text,
+                status=["to-do", "in-progress", "review", "done"][i % 4], priority=["low", "medium", "high"][i % 3],
+                assignee=[None, self.member, self.owner, self.former][i % 4], reviewer=[self.owner, None, self.former][i % 3],
+                due_date=None if i % 2 else date(2025, 1 + i, 28),
+            )
+            for _ in range(i % 3):
+                Comment.objects.create(task=task, author=self.owner, content="C")
+
+    def _render_both(self, expected, data):
+        expected = JSONRenderer().render(expected)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        with mock.patch("core.utils.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_board_detail(self):
+        board = BoardDetailView().get_queryset().get(pk=self.board.pk)
+        self._render_both(BoardDetailSerializer(board).data, board_detail_data(self.board.pk))
+
+    def test_task_rows(self):
+        tasks = Task.objects.select_related("assignee", "reviewer").order_by("id")
+        rows = list(Task.objects.order_by("id").values(*TASK_VALUES))
+        self._render_both(TaskSerializer(tasks, many=True).data, task_data(rows, load_users(task_user_ids(rows))))
+
+    def test_feed_endpoint_output_unchanged(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(reverse("tasks-involved"), {"page_size": 5})
+        tasks = Task.objects.filter(id__in=[row["id"] for row in response.data["results"]]).order_by(F("due_date").asc(nulls_last=True), "id")
+        expected = JSONRenderer().render({"next": response.data["next"], "results": TaskSerializer(tasks, many=True).data})
+        self.assertEqual(response.content, expected)
+
+
+class SparseFieldsetTests(KanbanTestCase):
+    """?fields= / ?exclude= trim the output and the columns read"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.task = Task.objects.create(board=self.board, title="Task", description="Sehr lang", assignee=self.owner)
+        Comment.objects.create(task=self.task, author=self.owner, content="Hallo")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _get(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, " ".join(query["sql"] for query in ctx.captured_queries)
+
+    def test_task_feed_fields(self):
+        data, sql = self._get(reverse("tasks-assigned"), {"fields": "id,title,status,priority,assignee"})
+        self.assertEqual(list(data["results"][0]), ["id", "title", "status", "priority", "assignee"])
+        self.assertEqual(data["results"][0]["assignee"]["id"], self.owner.id)
+        self.assertNotIn('"description"', sql)
+
+        data, sql = self._get(reverse("tasks-involved"), {"exclude": "description,assignee,reviewer"})
+        self.assertEqual(list(data["results"][0]), ["id", "board", "title", "status", "priority", "due_date", "comments_count"])
+        self.assertNotIn("auth_user", sql)
+
+    def test_board_detail_fields_and_etag(self):
+        url = reverse("board-detail", kwargs={"pk": self.board.id})
+        full = self.client.get(url)
+        data, sql = self._get(url, {"fields": "id,title"})
+        self.assertEqual(data["tasks"], [{"id": self.task.id, "title": "Task"}])
+        self.assertNotIn('"description"', sql)
+        sparse = self.client.get(url, {"fields": "id,title"})
+        self.assertNotEqual(full["ETag"], sparse["ETag"])
+        self.assertEqual(self.client.get(url, {"fields": "id,title"}, HTTP_IF_NONE_MATCH=sparse["ETag"]).status_code, 304)
+
+    def test_comment_fields(self):
+        url = reverse("comments-list-create", kwargs={"task_id": self.task.id})
+        data, sql = self._get(url, {"fields": "id,content"})
+        self.assertEqual(list(data["results"][0]), ["id", "content"])
+        self.assertNotIn("auth_user", sql)
+        data, _ = self._get(url, {"exclude": "content"})
+        self.assertEqual(list(data["results"][0]), ["id", "created_at", "author"])
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse("tasks-involved"), {"fields": "id,passwort"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("passwort", response.data["fields"])
+
+
+@override_settings(BOARD_SYNC_OVERLAP=timedelta(0))
+class BoardChangesTests(KanbanTestCase):
+    """Delta sync returns only what changed after the token"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.member = User.objects.create_user(username="member@example.com", email="member@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.other_board = Board.objects.create(title="Other", owner=self.owner)
+        self.tasks = [Task.objects.create(board=self.board, title=f"Task {i}") for i in range(5)]
+        self.comment = Comment.objects.create(task=self.tasks[0], author=self.owner, content="Hallo")
+        self.url = reverse("board-changes", kwargs={"pk": self.board.id})
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _sync(self, token=None):
+        response = self.client.get(self.url, {"since": token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_snapshot_then_nothing(self):
+        data = self._sync()
+        self.assertEqual([task["id"] for task in data["tasks"]], [task.id for task in self.tasks])
+        self.assertEqual([(c["id"], c["task"]) for c in data["comments"]], [(self.comment.id, self.tasks[0].id)])
+        self.assertEqual(data["members"], [])
+
+        data = self._sync(data["token"])
+        self.assertEqual((data["tasks"], data["comments"], data["members"]), ([], [], None))
+        self.assertEqual(data["deleted"], {"tasks": [], "comments": []})
+
+    def test_changes_since_token(self):
+        token = self._sync()["token"]
+        self.tasks[1].title = "Neu"
+        self.tasks[1].save()
+        new_comment = Comment.objects.create(task=self.tasks[2], author=self.owner, content="Neu")
+        comment_id, deleted_task_id = self.comment.id, self.tasks[3].id
+        self.comment.delete()
+        self.tasks[3].delete()
+        self.tasks[4].board = self.other_board
+        self.tasks[4].save()
+        self.board.members.add(self.member)
+
+        data = self._sync(token)
+        self.assertEqual([task["id"] for task in data["tasks"]], [self.tasks[0].id, self.tasks[1].id, self.tasks[2].id])
+        self.assertEqual(data["tasks"][0]["comments_count"], 0)
+        self.assertEqual([c["id"] for c in data["comments"]], [new_comment.id])
+        self.assertEqual(data["deleted"], {"tasks": sorted([deleted_task_id, self.tasks[4].id]), "comments": [comment_id]})
+        self.assertEqual([member["id"] for member in data["members"]], [self.member.id])
+
+        other = self.client.get(reverse("board-changes", kwargs={"pk": self.other_board.id}), {"since": token}).data
+        self.assertEqual([task["id"] for task in other["tasks"]], [self.tasks[4].id])
+
+    def test_deleted_assignee_and_reviewer_are_synced(self):
+        Task.objects.filter(pk=self.tasks[1].pk).update(assignee=self.member)
+        Task.objects.filter(pk=self.tasks[2].pk).update(reviewer=self.member)
+        token = self._sync()["token"]
+        detail_url = reverse("board-detail", kwargs={"pk": self.board.id})
+        etag = self.client.get(detail_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.delete()
+        data = self._sync(token)
+        self.assertEqual([(t["id"], t["assignee"], t["reviewer"]) for t in data["tasks"]],
+                         [(self.tasks[1].id, None, None), (self.tasks[2].id, None, None)])
+        self.assertNotEqual(self.client.get(detail_url)["ETag"], etag)
+
+    def test_task_moved_back_is_not_deleted(self):
+        token = self._sync()["token"]
+        task = self.tasks[0]
+        task.board = self.other_board
+        task.save()
+        task.board = self.board
+        task.save()
+        data = self._sync(token)
+        self.assertEqual([t["id"] for t in data["tasks"]], [task.id])
+        self.assertEqual([c["id"] for c in data["comments"]], [self.comment.id])
+        self.assertEqual(data["deleted"]["tasks"], [])
+
+    def test_bulk_update_is_synced(self):
+        token = self._sync()["token"]
+        response = self.client.patch(reverse("task-bulk"), [{"id": self.tasks[1].id, "status": "done"}], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([task["id"] for task in self._sync(token)["tasks"]], [self.tasks[1].id])
+
+    def test_only_changed_rows_are_read(self):
+        token = self._sync()["token"]
+        Task.objects.bulk_create([Task(board=self.board, title=f"Alt {i}") for i in range(50)])
+        Task.objects.filter(board=self.board).update(updated_at=F("updated_at") - timedelta(days=1))
+        self.tasks[0].save()
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._sync(token)
+        self.assertEqual([task["id"] for task in data["tasks"]], [self.tasks[0].id])
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+
+    def test_invalid_expired_and_foreign_tokens(self):
+        self.assertEqual(self.client.get(self.url, {"since": "kaputt"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"since": encode_token(date(2020, 1, 1))}).status_code, 400)
+        expired = encode_token(timezone.now() - timedelta(days=31))
+        self.assertEqual(self.client.get(self.url, {"since": expired}).status_code, 410)
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(reverse("board-changes", kwargs={"pk": 9999})).status_code, 404)
+
+    def test_prune_tombstones(self):
+        self.tasks[0].delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=31))
+        task_id = self.tasks[1].id
+        self.tasks[1].delete()
+        call_command("prune_tombstones", stdout=StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), [task_id])
+
+
+class CascadeDeletionTests(KanbanTestCase):
+    """Tasks and comments removed with their board or task are handled once for the parent, not per row"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.other_board = Board.objects.create(title="Other", owner=self.owner)
+        self.tasks = Task.objects.bulk_create([Task(board=self.board, title=f"Datenbank {i}") for i in range(100)])
+        Comment.objects.bulk_create([
+            Comment(task=task, author=self.owner, content="Backup") for task in self.tasks for _ in range(5)
+        ])
+        self.other_task = Task.objects.create(board=self.other_board, title="Datenbank fremd")
+        Comment.objects.create(task=self.other_task, author=self.owner, content="Backup fremd")
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks]).update(comments_count=5)
+        BoardStats.rebuild([self.board.id])
+        get_search_backend().rebuild()
+
+    def _indexed_boards(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT board, COUNT(*) FROM kanban_search GROUP BY board")
+            return dict(cursor.fetchall())
+
+    def test_task_delete_takes_its_comments_along(self):
+        task, task_id = self.tasks[0], self.tasks[0].id
+        comment_ids = list(task.comments.values_list("id", flat=True))
+        with CaptureQueriesContext(connection) as ctx:
+            task.delete()
+        self.assertLessEqual(len(ctx.captured_queries), 12)
+        self.assertEqual(list(Tombstone.objects.values_list("kind", "object_id")), [("task", task_id)])
+        self.assertEqual(BoardStats.objects.get(board=self.board).comment_count, 495)
+        self.assertEqual(self._indexed_boards()[f"b{self.board.id}"], 99 + 495)
+        self.assertFalse(Comment.objects.filter(pk__in=comment_ids).exists())
+
+    def test_board_delete_is_bulk_and_leaves_nothing_behind(self):
+        self.tasks[0].delete()
+        with CaptureQueriesContext(connection) as ctx:
+            self.board.delete()
+        self.assertLessEqual(len(ctx.captured_queries), 20)
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertEqual(self._indexed_boards(), {f"b{self.other_board.id}": 2})
+        self.assertEqual(BoardStats.objects.get(board=self.other_board).comment_count, 1)
+
+    def test_queryset_delete_and_author_cascade(self):
+        Board.objects.filter(pk=self.board.pk).delete()
+        self.assertFalse(Tombstone.objects.exists())
+        self.owner.delete()
+        self.assertFalse(Board.objects.exists())
+        self.assertEqual(self._indexed_boards(), {})
+
+
+class SearchTests(KanbanTestCase):
+    """Full-text search over tasks and comments, ranked and limited to accessible boards"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner@example.com", email="owner@example.com", password="x")
+        self.stranger = User.objects.create_user(username="stranger@example.com", email="stranger@example.com", password="x")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.foreign_board = Board.objects.create(title="Fremd", owner=self.stranger)
+        self.title_hit = Task.objects.create(board=self.board, title="Datenbank migrieren", description="Schema")
+        self.description_hit = Task.objects.create(board=self.board, title="Aufräumen", description="Alte Datenbank löschen")
+        self.comment = Comment.objects.create(task=self.description_hit, author=self.owner, content="Backup der Datenbank zuerst")
+        Task.objects.create(board=self.foreign_board, title="Datenbank fremd")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _search(self, q, **params):
+        response = self.client.get(reverse("search"), {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def _hits(self, q):
+        return [(hit["type"], hit["id"]) for hit in self._search(q)["results"]]
+
+    def test_ranked_and_limited_to_accessible_boards(self):
+        data = self._search("datenbank")
+        hits = [(hit["type"], hit["id"]) for hit in data["results"]]
+        self.assertEqual(hits[0], ("task", self.title_hit.id))
+        self.assertCountEqual(hits[1:], [("task", self.description_hit.id), ("comment", self.comment.id)])
+        self.assertEqual([hit["rank"] for hit in data["results"]], sorted((hit["rank"] for hit in data["results"]), reverse=True))
+        comment = next(hit for hit in data["results"] if hit["type"] == "comment")
+        self.assertEqual(comment["content"], "Backup der Datenbank zuerst")
+        self.assertEqual(comment["title"], "Aufräumen")
+        self.assertEqual(comment["task"], self.description_hit.id)
+
+    def test_prefix_diacritics_and_operators(self):
+        self.assertEqual(self._hits("aufraum"), [("task", self.description_hit.id)])
+        self.assertEqual(self._hits('backup" *'), [("comment", self.comment.id)])
+        self.assertEqual(self.client.get(reverse("search"), {"q": " \"* "}).status_code, 400)
+
+    def test_index_follows_writes(self):
+        self.title_hit.title = "Server neu starten"
+        self.title_hit.save()
+        self.comment.content = "Kein Backup nötig"
+        self.comment.save()
+        self.assertEqual(self._hits("datenbank"), [("task", self.description_hit.id)])
+        self.assertEqual(self._hits("server"), [("task", self.title_hit.id)])
+
+        comment_id = self.comment.id
+        self.comment.delete()
+        self.assertEqual(self._hits("backup"), [])
+        task_id = self.description_hit.id
+        self.description_hit.delete()
+        self.assertEqual(self._hits("datenbank"), [])
+        self.assertNotIn(("comment", comment_id), self._hits("kein"))
+        self.assertNotIn(("task", task_id), self._hits("alte"))
+
+    def test_moved_task_is_found_on_its_new_board(self):
+        self.description_hit.board = self.foreign_board
+        self.description_hit.save()
+        self.assertEqual(self._hits("alte"), [])
+        self.assertEqual(self._hits("backup"), [])
+        self.foreign_board.members.add(self.owner)
+        self.assertEqual(self._hits("backup"), [("comment", self.comment.id)])
+        self.assertEqual(self._search("alte")["results"][0]["board"], self.foreign_board.id)
+
+    def test_bulk_writes_are_indexed(self):
+        response = self.client.post(reverse("task-bulk"), [{"board": self.board.id, "title": "Bulk Suche"}], format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._hits("bulk"), [("task", response.data[0]["id"])])
+
+    def test_pagination(self):
+        Task.objects.bulk_create([Task(board=self.board, title=f"Datenbank {i}") for i in range(5)])
+        call_command("rebuild_search_index", stdout=StringIO())
+        first = self._search("datenbank", limit=4)
+        self.assertEqual(len(first["results"]), 4)
+        self.assertIn("offset=4", first["next"])
+        second = self.client.get(first["next"]).data
+        self.assertEqual(len(second["results"]), 4)
+        self.assertIsNone(second["next"])
+        ids = [(hit["type"], hit["id"]) for hit in first["results"] + second["results"]]
+        self.assertEqual(len(set(ids)), 8)
+
+
+@override_settings(REPLICA_DATABASE="replica")
+class ReplicaRoutingTests(SimpleTestCase):
+    """Safe API requests read from the replica until the request or, for a few seconds, the client wrote"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def _route(self, request, write=False, view_class=None):
+        """Runs the middleware around a view recording where its reads go"""
+        reads = []
+
+        def view(request):
+            reads.append(router.db_for_read(Task))
+            if write:
+                router.db_for_write(Task)
+                reads.append(router.db_for_read(Task))
+            return HttpResponse()
+        view.cls = view_class
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+        middleware = ReplicaRoutingMiddleware(get_response)
+        middleware(request)
+        return reads
+
+    def test_safe_api_requests_use_the_replica(self):
+        headers = {"HTTP_AUTHORIZATION": "Token abc"}
+        self.assertEqual(self._route(self.factory.get("/api/boards/", **headers)), ["replica"])
+        self.assertEqual(self._route(self.factory.head("/api/tasks/assigned-to-me/", **headers)), ["replica"])
+        self.assertEqual(self._route(self.factory.post("/api/boards/", **headers)), ["default"])
+        self.assertEqual(self._route(self.factory.get("/admin/", **headers)), ["default"])
+        self.assertEqual(router.db_for_read(Task), "default")
+        with override_settings(REPLICA_DATABASE=None):
+            self.assertEqual(self._route(self.factory.get("/api/boards/", **headers)), ["default"])
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        anna, bert = {"HTTP_AUTHORIZATION": "Token anna"}, {"HTTP_AUTHORIZATION": "Token bert"}
+        self.assertEqual(self._route(self.factory.get("/api/boards/", **anna), write=True), ["replica", "default"])
+        self.assertEqual(self._route(self.factory.get("/api/boards/", **anna)), ["default"])
+        self.assertEqual(self._route(self.factory.get("/api/boards/", **bert)), ["replica"])
+
+        self._route(self.factory.patch("/api/tasks/1/", **bert), write=True)
+        self.assertEqual(self._route(self.factory.get("/api/tasks/1/", **bert)), ["default"])
+        with mock.patch.object(cache, "get", return_value=None):
+            """Pin expired"""
+            self.assertEqual(self._route(self.factory.get("/api/tasks/1/", **bert)), ["replica"])
+
+    def test_primary_only_views_and_blocks(self):
+        request = self.factory.get("/api/boards/1/", HTTP_AUTHORIZATION="Token abc")
+        self.assertEqual(self._route(request, view_class=BoardDetailView), ["default"])
+
+        reads = []
+
+        def view(request):
+            with use_primary():
+                reads.append(router.db_for_read(Task))
+            reads.append(router.db_for_read(Task))
+            return HttpResponse()
+        ReplicaRoutingMiddleware(view)(self.factory.get("/api/boards/"))
+        self.assertEqual(reads, ["default", "replica"])
+
+    def test_copy_sqlite_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source, target = os.path.join(directory, "primary.sqlite3"), os.path.join(directory, "replica.sqlite3")
+            with sqlite3.connect(source) as db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("CREATE TABLE item (name TEXT)")
+                db.execute("INSERT INTO item VALUES ('eins')")
+            copy_sqlite_database(source, target)
+            reader = sqlite3.connect(target)
+            self.assertEqual(reader.execute("SELECT name FROM item").fetchall(), [("eins",)])
+            self.assertEqual(reader.execute("PRAGMA journal_mode").fetchone(), ("delete",))
+
+            with sqlite3.connect(source) as db:
+                db.execute("INSERT INTO item VALUES ('zwei')")
+            copy_sqlite_database(source, target)
+            """Open connections keep their snapshot, new ones see the copy"""
+            self.assertEqual(reader.execute("SELECT COUNT(*) FROM item").fetchone(), (1,))
+            reader.close()
+            with sqlite3.connect(target) as fresh:
+                self.assertEqual(fresh.execute("SELECT COUNT(*) FROM item").fetchone(), (2,))
+            fresh.close()
+            db.close()
+
+
+class SQLiteWriteSerializationTests(unittest.TestCase):
+    """Threads writing through the production SQLite profile queue on the write lock instead of failing
+
+    A plain unittest case: it opens its own database file, which SimpleTestCase would forbid.
+    """
+
+    def _stress(self, options, writers=8, transactions=50):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = {**connection.settings_dict, "ENGINE": "core.sqlite", "NAME": os.path.join(directory.name, "stress.sqlite3"),
+                         "OPTIONS": options}
+        errors, done = [], threading.Event()
+
+        def write(worker):
+            try:
+                for _ in range(transactions):
+                    try:
+                        """Read-modify-write: under DEFERRED two of these deadlock on the lock upgrade"""
+                        with transaction.atomic(using="stress"), connections["stress"].cursor() as cursor:
+                            cursor.execute("SELECT value FROM counter WHERE id = 1")
+                            value = cursor.fetchone()[0]
+                            cursor.execute("INSERT INTO item (worker) VALUES (%s)", [worker])
+                            cursor.execute("UPDATE counter SET value = %s WHERE id = 1", [value + 1])
+                    except OperationalError as exc:
+                        errors.append(str(exc))
+            finally:
+                connections["stress"].close()
+
+        def read():
+            try:
+                while not done.is_set():
+                    with connections["stress"].cursor() as cursor:
+                        cursor.execute("SELECT COUNT(*) FROM item")
+            except OperationalError as exc:
+                errors.append(str(exc))
+            finally:
+                connections["stress"].close()
+
+        with mock.patch.dict(connections.settings, {"stress": settings_dict}):
+            try:
+                with connections["stress"].cursor() as cursor:
+                    cursor.execute("CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER)")
+                    cursor.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, worker INTEGER)")
+                    cursor.execute("INSERT INTO counter VALUES (1, 0)")
+                threads = [threading.Thread(target=write, args=(worker,)) for worker in range(writers)]
+                reader = threading.Thread(target=read)
+                reader.start()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                done.set()
+                reader.join()
+                with connections["stress"].cursor() as cursor:
+                    cursor.execute("SELECT (SELECT value FROM counter), (SELECT COUNT(*) FROM item)")
+                    counter, items = cursor.fetchone()
+                    cursor.execute("PRAGMA journal_mode")
+                    journal_mode = cursor.fetchone()[0]
+            finally:
+                connections["stress"].close()
+                del connections["stress"]
+        return {"errors": errors, "counter": counter, "items": items, "journal_mode": journal_mode}
+
+    def test_concurrent_writers_without_lock_errors(self):
+        result = self._stress(settings.SQLITE_PROFILES["production"])
+        self.assertEqual(result["errors"], [])
+        self.assertEqual((result["counter"], result["items"]), (400, 400))
+        self.assertEqual(result["journal_mode"], "wal")
@@ -0,0 +1,48 @@
+"""Per-board version counter (stored in BoardStats) used for ETags, cached between changes"""
+import zlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from kanban_app.models import BoardStats
+
+CACHE_KEY = "kanmind:board-version:{board_id}"
+
+
+def _cache_key(board_id):
+    return CACHE_KEY.format(board_id=board_id)
+
+
+def get_board_version(board_id):
+    """Returns the board version from cache or one primary key lookup, None if the board has no stats row"""
+    key = _cache_key(board_id)
+    version = cache.get(key)
+    if version is None:
+        version = BoardStats.objects.filter(board_id=board_id).values_list("version", flat=True).first()
+        if version is not None:
+            cache.set(key, version, settings.BOARD_VERSION_CACHE_TTL)
+    return version
+
+
+async def aget_board_version(board_id):
+    """Async counterpart of get_board_version"""
+    key = _cache_key(board_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = await BoardStats.objects.filter(board_id=board_id).values_list("version", flat=True).afirst()
+        if version is not None:
+            await cache.aset(key, version, settings.BOARD_VERSION_CACHE_TTL)
+    return version
+
+
+def board_etag(board_id, version, variant=None):
+    """variant distinguishes representations of the same version, e.g. sparse fieldsets"""
+    if variant:
+        return f'"board-{board_id}-v{version}-{zlib.crc32(variant.encode()):08x}"'
+    return f'"board-{board_id}-v{version}"'
+
+
+def invalidate_board_versions(board_ids):
+    """Drops cached versions once the bumping transaction is committed"""
+    keys = [_cache_key(board_id) for board_id in set(board_ids) if board_id is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))